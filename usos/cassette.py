@@ -0,0 +1,261 @@
+import base64
+import copy
+import gzip
+import json
+import threading
+import time
+
+from .client import (
+    Client, ClientError, NetworkError, Timeout, ProtocolError, HttpError, BadRequest, Unauthorized, FileWrapper
+)
+from .utils.object import sanitized_attr
+from .tal.fieldselector import parse_basic as parse_basic_field_selector, stringify as stringify_field_selector
+
+
+CASSETTE_VERSION = 1
+
+
+class CassetteError(ClientError):
+    """
+    Raised when a cassette is invalid or contains no response matching a replayed call.
+    """
+
+
+class _BufferedResponse(object):
+    """
+    In-memory replacement of httplib.HTTPResponse, good enough for FileWrapper.
+    """
+
+    def __init__(self, content_type, data):
+        self._content_type = content_type
+        self._data = data
+        self._pos = 0
+        self._closed = False
+
+    def getheader(self, name, default=None):
+        return self._content_type if name.lower() == 'content-type' else default
+
+    def isclosed(self):
+        return self._closed
+
+    def close(self):
+        self._closed = True
+
+    def read(self, size=-1):
+        end = len(self._data) if size is None or size < 0 else self._pos + size
+        ret = self._data[self._pos:end]
+        self._pos += len(ret)
+        return ret
+
+    def fileno(self):
+        raise IOError('Replayed file has no file descriptor')
+
+
+def _canonical_params(params):
+    """
+    Returns hashable representation of (already prepared) params. Values of 'fields' are compared as field
+    selectors, so order of fields does not matter.
+    """
+    ret = []
+    for k, v in params.iteritems():
+        if k == 'fields':
+            v = stringify_field_selector(parse_basic_field_selector(v))
+        ret.append((k, v))
+    ret.sort()
+    return tuple(ret)
+
+
+def _dump_error(err):
+    if isinstance(err, BadRequest):
+        return dict(type='BadRequest', params=err._d)
+    elif isinstance(err, Unauthorized):
+        return dict(type='Unauthorized', message=unicode(err.args[0]))
+    elif isinstance(err, HttpError):
+        return dict(type='HttpError', status=err.status, message=unicode(err.args[0]))
+    elif isinstance(err, Timeout):
+        return dict(type='Timeout', message=unicode(err))
+    elif isinstance(err, NetworkError):
+        return dict(type='NetworkError', message=unicode(err))
+    elif isinstance(err, ProtocolError):
+        return dict(type='ProtocolError', message=unicode(err))
+    else:
+        # Other errors are replayed as plain ClientError
+        return dict(type='ClientError', class_name=type(err).__name__, message=unicode(err))
+
+
+def _load_error(d):
+    error_type = d['type']
+    if error_type == 'BadRequest':
+        return BadRequest(d['params'])
+    elif error_type == 'Unauthorized':
+        return Unauthorized(d['message'])
+    elif error_type == 'HttpError':
+        return HttpError(d['status'], d['message'])
+    elif error_type == 'Timeout':
+        return Timeout(d['message'])
+    elif error_type == 'NetworkError':
+        return NetworkError(d['message'])
+    elif error_type == 'ProtocolError':
+        return ProtocolError(d['message'])
+    elif error_type == 'ClientError':
+        return ClientError('{0}: {1}'.format(d['class_name'], d['message']))
+    else:
+        raise CassetteError('Invalid error type: {0!r}'.format(error_type))
+
+
+class CassetteWriter(object):
+    """
+    Writes method calls to a cassette: gzip-compressed file with one JSON object per line. The first line is
+    a header with base_url, the others describe calls: path, params, mode, elapsed time (in seconds) and either
+    response, file (content type and base64-encoded data) or error.
+    """
+
+    def __init__(self, filename, base_url):
+        self._file = gzip.open(filename, 'wb')
+        self._lock = threading.Lock()
+        self._write_line(dict(version=CASSETTE_VERSION, base_url=base_url))
+
+    def _write_line(self, obj):
+        self._file.write(json.dumps(obj, sort_keys=True, separators=(',', ':')))
+        self._file.write('\n')
+
+    def write(self, path, params, mode, elapsed, response=None, file=None, error=None):
+        entry = dict(path=path, params=params, mode=mode, elapsed=elapsed)
+        if error is not None:
+            entry['error'] = _dump_error(error)
+        elif file is not None:
+            content_type, data = file
+            entry['file'] = dict(content_type=content_type, data=base64.b64encode(data))
+        else:
+            entry['response'] = response
+        with self._lock:
+            self._write_line(entry)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_cassette(filename):
+    """
+    Returns (header, entries) read from a cassette.
+    """
+    with gzip.open(filename, 'rb') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get('version') != CASSETTE_VERSION:
+        raise CassetteError('Invalid cassette: {0}'.format(filename))
+    return lines[0], lines[1:]
+
+
+class RecordingClient(Client):
+    """
+    Client writing all calls, with their responses and errors, to a cassette, which can be replayed later by
+    ReplayClient. Call close() (or use the client as a context manager) to finish writing.
+    """
+
+    def __init__(self, base_url, filename, consumer=None, token=None, **kwargs):
+        super(RecordingClient, self).__init__(base_url, consumer, token, **kwargs)
+        self.writer = CassetteWriter(filename, self.base_url)
+
+    def _call_method(self, path, params, mode, timeout=None):
+        # Params are recorded in their prepared form, as sent to USOS API
+        recorded_params = {k: v.decode('UTF-8') for k, v in self._prep_params(params)}
+        start = time.time()
+        try:
+            response = super(RecordingClient, self)._call_method(path, params, mode, timeout)
+            if mode == 'file':
+                # Files are read upfront, so that they can be recorded
+                with response:
+                    data = response.read()
+                file = (response.content_type, data)
+                response = FileWrapper(_BufferedResponse(response.content_type, data))
+                self.writer.write(path, recorded_params, mode, time.time() - start, file=file)
+            else:
+                self.writer.write(path, recorded_params, mode, time.time() - start, response=response)
+            return response
+        except ClientError as err:
+            self.writer.write(path, recorded_params, mode, time.time() - start, error=err)
+            raise
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ReplayClient(Client):
+    """
+    Client answering calls with responses recorded in a cassette, without any network communication.
+
+    Calls are matched by path and params (fields are compared as field selectors). Each recorded call is replayed
+    once, in recording order, unless reuse is set, in which case the last matching call is replayed again once
+    all matching calls were used.
+
+    latency may be None (no delay), 'recorded' (elapsed time of recorded calls), a number of seconds or a function
+    called with path and recorded elapsed time, returning number of seconds. Calls delayed longer than their
+    timeout raise Timeout.
+    """
+
+    def __init__(self, filename, latency=None, reuse=False, consumer=None, token=None):
+        header, entries = load_cassette(filename)
+        super(ReplayClient, self).__init__(header['base_url'], consumer, token)
+        self.latency = latency
+        self.reuse = reuse
+        self._entries = {}
+        self._lock = threading.Lock()
+        for entry in entries:
+            key = (entry['path'], _canonical_params(entry['params']))
+            self._entries.setdefault(key, []).append(entry)
+
+    @sanitized_attr
+    def base_url(self, value):
+        # Nothing is sent to base_url, so cassettes recorded over plain HTTP can be replayed as well
+        return value
+
+    def _get_delay(self, path, elapsed):
+        if self.latency is None:
+            return 0
+        elif self.latency == 'recorded':
+            return elapsed
+        elif callable(self.latency):
+            return self.latency(path, elapsed)
+        else:
+            return self.latency
+
+    def _call_method(self, path, params, mode, timeout=None):
+        key = (path, _canonical_params({k: v.decode('UTF-8') for k, v in self._prep_params(params)}))
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteError('No recorded call of {0} matches {1!r}'.format(path, params))
+            reused = self.reuse and len(entries) == 1
+            entry = entries[0] if reused else entries.pop(0)
+
+        delay = self._get_delay(path, entry['elapsed'])
+        timeout, client_timeout = self._get_timeout(timeout)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise Timeout('timed out', client_timeout=client_timeout)
+        if delay > 0:
+            time.sleep(delay)
+
+        if 'error' in entry:
+            raise _load_error(entry['error'])
+        elif 'file' in entry:
+            return FileWrapper(_BufferedResponse(entry['file']['content_type'],
+                                                 base64.b64decode(entry['file']['data'])))
+        elif reused:
+            # Callers may modify responses
+            return copy.deepcopy(entry['response'])
+        else:
+            return entry['response']
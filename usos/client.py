@@ -36,6 +36,17 @@ class NetworkError(ClientError):
     """
 
 
+class Timeout(NetworkError):
+    """
+    Indicates that USOS API did not answer within the timeout. client_timeout is set if the timeout of the client
+    expired, rather than a shorter one given to a single call.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.client_timeout = kwargs.pop('client_timeout', False)
+        super(Timeout, self).__init__(*args, **kwargs)
+
+
 class ProtocolError(ClientError):
     """
     Indicates protocol failure (SSL, HTTP, invalid JSON string, etc.)
@@ -103,16 +114,67 @@ class FileWrapper(object):
         return self._response.fileno()
 
 
+def _get_remaining(deadline):
+    """
+    Returns number of seconds left until deadline (None if there is no deadline), raising Timeout if it passed.
+    """
+    if deadline is None:
+        return None
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise Timeout('Timeout expired before sending the request')
+    return remaining
+
+
+class _DeadlineSocket(object):
+    """
+    Socket wrapper cutting the timeout of each receive to the time left until deadline, so that a response sent
+    slowly cannot outlive the deadline.
+    """
+
+    def __init__(self, sock, deadline, timeout):
+        self._sock = sock
+        self._deadline = deadline
+        self._timeout = timeout
+
+    def recv(self, *args):
+        remaining = self._deadline - time.time()
+        if remaining <= 0:
+            raise Timeout('Timeout expired while reading the response')
+        if self._timeout is not None and self._timeout <= remaining:
+            return self._sock.recv(*args)
+        self._sock.settimeout(remaining)
+        try:
+            return self._sock.recv(*args)
+        except socket.timeout as err:
+            raise Timeout(str(err))
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+
 class Client(object):
-    def __init__(self, base_url, consumer=None, token=None):
+    def __init__(self, base_url, consumer=None, token=None, hedging=None, concurrency_limiter=None,
+                 rate_limiter=None, timeout=None, allow_insecure_connections=False):
+        # Allows plain HTTP base_url for this client only, like ALLOW_INSECURE_CONNECTIONS does for all clients
+        self.allow_insecure_connections = allow_insecure_connections
         self.base_url = base_url
         self.consumer = consumer
         self.token = token
+        # Timeout (in seconds) of connecting and of each read from the socket; None means no timeout
+        self.timeout = timeout
+        # Optional usos.hedging.HedgingPolicy, applied to all methods except URLENCODED_METHODS
+        self.hedging = hedging
+        # Optional usos.concurrency.ConcurrencyLimiter, usually shared by all clients of an installation
+        self.concurrency_limiter = concurrency_limiter
+        # Optional usos.ratelimit.RateLimiter, shared by all clients using the same consumer key
+        self.rate_limiter = rate_limiter
         self.services = MethodProxy(self, 'services')
 
     @sanitized_attr
     def base_url(self, value):
-        if not ALLOW_INSECURE_CONNECTIONS and not value.startswith('https://'):
+        insecure = ALLOW_INSECURE_CONNECTIONS or self.allow_insecure_connections
+        if not insecure and not value.startswith('https://'):
             scheme, rest = splittype(value)
             host, path = splithost(rest)
             _, port = splitport(host)
@@ -172,7 +234,13 @@ class Client(object):
     def _prep_request(self, path, params):
         return self.base_url + path, self._prep_headers(), urlencode(list(self._prep_params(params)))
 
-    def call_method(self, path, params=None, mode=None):
+    def call_method(self, path, params=None, mode=None, timeout=None):
+        """
+        Calls USOS API method. If timeout is given, the call (including waiting for the rate and concurrency
+        limiters and every read of the response) is given at most that many seconds; Timeout is raised otherwise.
+        Files returned for FILE_METHODS are read by the caller, so the timeout does not cover reading them. The
+        timeout of the client applies to each network operation separately.
+        """
         if mode is None:
             if path in FILE_METHODS:
                 mode = 'file'
@@ -180,10 +248,38 @@ class Client(object):
                 mode = 'urlencoded'
             else:
                 mode = 'format'
-        return self._call_method(path, params, mode)
-
-    def _call_method(self, path, params, mode):
+        deadline = None if timeout is None else time.time() + timeout
+        if self.hedging is not None and path not in URLENCODED_METHODS:
+            return self.hedging.call(self._call_limited, path, params, mode, deadline)
+        return self._call_limited(path, params, mode, deadline)
+
+    def _call_limited(self, path, params, mode, deadline):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(None if self.consumer is None else self.consumer.key, path,
+                                      _get_remaining(deadline))
+        if self.concurrency_limiter is None:
+            return self._call_until(path, params, mode, deadline)
+        return self.concurrency_limiter.call(self._call_until, path, (params, mode, deadline),
+                                             _get_remaining(deadline))
+
+    def _call_until(self, path, params, mode, deadline):
+        return self._call_method(path, params, mode, _get_remaining(deadline))
+
+    def _get_timeout(self, timeout):
+        """
+        Returns (timeout, client_timeout) pair, where timeout is the effective timeout of a call and client_timeout
+        is set if it is the timeout of the client.
+        """
+        if self.timeout is not None and (timeout is None or self.timeout <= timeout):
+            return self.timeout, True
+        return timeout, False
+
+    def _call_method(self, path, params, mode, timeout=None):
         url, headers, body = self._prep_request(path, params)
+        deadline = None if timeout is None else time.time() + timeout
+        timeout, client_timeout = self._get_timeout(timeout)
+        if timeout is None:
+            timeout = socket._GLOBAL_DEFAULT_TIMEOUT
 
         # It would be nice to use high-level network interface here, like urllib2, but there is no way
         # to distinguish whether URLError was caused by network failure or protocol (HTTP, SSL) failure
@@ -191,11 +287,13 @@ class Client(object):
         scheme, rest = splittype(url)
         host, path = splithost(rest)
         hostname, port = splitport(host)
+        # Port may be unicode (if path was), which socket functions do not accept
+        port = int(port) if port else None
 
         if scheme == 'http':
-            conn = httplib.HTTPConnection(hostname, port)
+            conn = httplib.HTTPConnection(hostname, port, timeout=timeout)
         elif scheme == 'https':
-            conn = HTTPSVerifyingConnection(hostname, port, ca_certs_file=CA_CERTS_FILE)
+            conn = HTTPSVerifyingConnection(hostname, port, ca_certs_file=CA_CERTS_FILE, timeout=timeout)
         else:
             raise ValueError('Invalid scheme: {0!r}'.format(scheme))
 
@@ -204,11 +302,28 @@ class Client(object):
             response = conn.getresponse()
         except httplib.HTTPException as err:
             raise ProtocolError(str(err))
+        except socket.timeout as err:
+            raise Timeout(str(err), client_timeout=client_timeout)
         except ssl.SSLError as err:
+            # Timeouts during SSL handshake are reported as SSLError
+            if 'timed out' in str(err):
+                raise Timeout(str(err), client_timeout=client_timeout)
             raise ProtocolError(str(err))
         except socket.error as err:
             raise NetworkError(str(err))
 
+        if deadline is not None and mode != 'file' and getattr(response.fp, '_sock', None) is not None:
+            # Socket timeouts apply to each read separately, so reads of the body are cut to the deadline
+            response.fp._sock = _DeadlineSocket(response.fp._sock, deadline, self.timeout)
+
+        try:
+            return self._read_response(response, mode)
+        except socket.timeout as err:
+            raise Timeout(str(err), client_timeout=client_timeout)
+        except socket.error as err:
+            raise NetworkError(str(err))
+
+    def _read_response(self, response, mode):
         content_type = response.getheader('content-type', '')
         if response.status == 200:
             if mode == 'file':
@@ -0,0 +1,128 @@
+import collections
+import threading
+import time
+
+from .client import HttpError, NetworkError, Timeout
+
+
+class ConcurrencyLimiter(object):
+    """
+    Limits the number of in-flight requests, adjusting the limit with AIMD (additive increase, multiplicative
+    decrease). The limit grows by about 1 per limit successful requests and is multiplied by backoff on overload
+    signals: HTTP 429 and 5xx errors, NetworkError and latency exceeding latency_tolerance times the lowest
+    recent latency of the same method (but at least min_baseline seconds, so that jitter of very fast responses
+    is ignored). Timeouts shorter than the timeout of the client are caused by callers and do not count. The limit
+    is decreased at most once per batch of requests, i.e. only by requests started after the previous decrease.
+
+    A limiter should be shared by all clients of a single USOS API installation, see get_limiter(...).
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=32, backoff=0.5, latency_tolerance=3.0,
+                 min_baseline=0.01, window_size=50):
+        if not min_limit <= initial_limit <= max_limit:
+            raise ValueError('Invalid limits: {0!r} <= {1!r} <= {2!r}'.format(min_limit, initial_limit, max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.min_baseline = min_baseline
+        self.window_size = window_size
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.decreases = 0
+        self._limit = float(initial_limit)
+        self._latencies = {}
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def get_metrics(self):
+        with self._cond:
+            return dict(limit=self.limit, in_flight=self.in_flight, queue_depth=self.queue_depth,
+                        decreases=self.decreases)
+
+    def acquire(self, timeout=None):
+        """
+        Waits until a request can be sent and returns its start time, to be passed to release(...). Raises Timeout
+        if the request cannot be sent within timeout seconds.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            self.queue_depth += 1
+            try:
+                while self.in_flight >= self.limit:
+                    if deadline is None:
+                        self._cond.wait()
+                    else:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            raise Timeout('Timeout expired while waiting for the concurrency limiter')
+                        self._cond.wait(remaining)
+            finally:
+                self.queue_depth -= 1
+            self.in_flight += 1
+            return time.time()
+
+    def release(self, start, path, overloaded=False):
+        """
+        Marks a request as finished. Latency of successful requests (overloaded not set) is taken into account.
+        """
+        now = time.time()
+        with self._cond:
+            self.in_flight -= 1
+            if not overloaded:
+                overloaded = self._add_latency(path, now - start)
+            if overloaded:
+                if start >= self._last_decrease:
+                    self._limit = max(self._limit * self.backoff, self.min_limit)
+                    self._last_decrease = now
+                    self.decreases += 1
+            else:
+                self._limit = min(self._limit + 1.0 / self._limit, self.max_limit)
+            self._cond.notify_all()
+
+    def _add_latency(self, path, latency):
+        latencies = self._latencies.get(path)
+        if latencies is None:
+            latencies = self._latencies[path] = collections.deque(maxlen=self.window_size)
+        latencies.append(latency)
+        return len(latencies) > 1 and latency > self.latency_tolerance * max(min(latencies), self.min_baseline)
+
+    def call(self, func, path, args=(), timeout=None):
+        """
+        Calls func(path, *args) once a request can be sent, waiting at most timeout seconds.
+        """
+        start = self.acquire(timeout)
+        overloaded = False
+        try:
+            return func(path, *args)
+        except HttpError as e:
+            overloaded = e.status == 429 or e.status >= 500
+            raise
+        except Timeout as e:
+            overloaded = e.client_timeout
+            raise
+        except NetworkError:
+            overloaded = True
+            raise
+        finally:
+            self.release(start, path, overloaded)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(base_url, **kwargs):
+    """
+    Returns ConcurrencyLimiter shared by all clients of the USOS API installation at base_url. kwargs are used
+    only when the limiter is created.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(base_url)
+        if limiter is None:
+            limiter = _limiters[base_url] = ConcurrencyLimiter(**kwargs)
+        return limiter
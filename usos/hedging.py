@@ -0,0 +1,142 @@
+import collections
+import math
+import sys
+import threading
+import time
+
+from .client import FileWrapper
+
+
+class HedgingStats(object):
+    def __init__(self):
+        self.calls = 0
+        # Calls for which a duplicate (hedge) request was sent
+        self.hedges = 0
+        # Hedged calls answered first by the duplicate request
+        self.hedge_wins = 0
+
+    @property
+    def hedge_rate(self):
+        return float(self.hedges) / self.calls if self.calls else 0.0
+
+    def __repr__(self):
+        return '<HedgingStats calls={0} hedges={1} hedge_wins={2}>'.format(self.calls, self.hedges, self.hedge_wins)
+
+
+class _Attempts(object):
+    """
+    Shared state of the original and the duplicate request of a single call.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.results = []
+        self.pending = 0
+        self.winner = None
+
+    def finish(self, index, result, error):
+        with self.cond:
+            self.pending -= 1
+            if self.winner is None and (error is None or self.pending == 0):
+                self.winner = index
+            self.results.append((index, result, error))
+            self.cond.notify_all()
+            lost = self.winner is not None and self.winner != index
+        if lost and isinstance(result, FileWrapper):
+            result.close()
+
+
+class HedgingPolicy(object):
+    """
+    Sends a duplicate request if a call has not been answered within given percentile of recent latencies
+    of the same method; the first successful answer wins. Only suitable for idempotent calls.
+
+    Hedging starts once min_samples latencies of the method were observed, using last window_size of them.
+    Delay before the duplicate request is never shorter than min_delay seconds.
+    """
+
+    def __init__(self, percentile=95, window_size=100, min_samples=20, min_delay=0.0):
+        if not 0 < percentile <= 100:
+            raise ValueError('Invalid percentile: {0!r}'.format(percentile))
+        self.percentile = percentile
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.stats = HedgingStats()
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def get_delay(self, path):
+        """
+        Returns delay (in seconds) after which a call of given method should be hedged, or None if there are not
+        enough latency samples yet.
+        """
+        with self._lock:
+            latencies = self._latencies.get(path)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            latencies = sorted(latencies)
+        rank = max(int(math.ceil(self.percentile / 100.0 * len(latencies))), 1)
+        return max(latencies[rank - 1], self.min_delay)
+
+    def add_latency(self, path, latency):
+        with self._lock:
+            latencies = self._latencies.get(path)
+            if latencies is None:
+                latencies = self._latencies[path] = collections.deque(maxlen=self.window_size)
+            latencies.append(latency)
+
+    def call(self, func, path, *args):
+        """
+        Calls func(path, *args), possibly twice, and returns the first successful result. If all requests fail,
+        the error of the first failed one is raised.
+        """
+        delay = self.get_delay(path)
+        with self._lock:
+            self.stats.calls += 1
+        if delay is None:
+            start = time.time()
+            result = func(path, *args)
+            self.add_latency(path, time.time() - start)
+            return result
+
+        attempts = _Attempts()
+        self._start(attempts, 0, func, path, args)
+        with attempts.cond:
+            if not attempts.results:
+                attempts.cond.wait(delay)
+            if not attempts.results:
+                with self._lock:
+                    self.stats.hedges += 1
+                self._start(attempts, 1, func, path, args)
+            while attempts.winner is None:
+                attempts.cond.wait()
+
+            if attempts.winner == 1:
+                with self._lock:
+                    self.stats.hedge_wins += 1
+            for index, result, error in attempts.results:
+                if index == attempts.winner:
+                    break
+
+        if error is not None:
+            # Winner is failed only if all requests failed; report the first error
+            index, result, error = attempts.results[0]
+            raise error[0], error[1], error[2]
+        return result
+
+    def _start(self, attempts, index, func, path, args):
+        def run():
+            start = time.time()
+            try:
+                result = func(path, *args)
+            except Exception:
+                attempts.finish(index, None, sys.exc_info())
+            else:
+                self.add_latency(path, time.time() - start)
+                attempts.finish(index, result, None)
+
+        attempts.pending += 1
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import struct
+import threading
+import time
+
+from .client import Timeout
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class TokenBucket(object):
+    """
+    Token bucket refilled with rate tokens per second, holding at most burst tokens.
+
+    Callers reserve tokens in order of arrival, possibly going into debt, and then sleep until their tokens are
+    available. Waiting callers are therefore served in FIFO order, without polling.
+    """
+
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError('Invalid rate: {0!r}'.format(rate))
+        self.rate = float(rate)
+        self.burst = float(rate if burst is None else burst)
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.time()
+
+    def _take(self, tokens, updated, now, n):
+        tokens = min(self.burst, tokens + (now - updated) * self.rate) - n
+        return tokens, max(-tokens / self.rate, 0.0)
+
+    def reserve(self, n=1, timeout=None):
+        """
+        Takes n tokens and returns number of seconds to wait before they can be used. If the wait would be longer
+        than timeout, no tokens are taken and None is returned.
+        """
+        with self._lock:
+            now = time.time()
+            tokens, wait = self._take(self._tokens, self._updated, now, n)
+            if timeout is not None and wait > timeout:
+                return None
+            self._tokens, self._updated = tokens, now
+        return wait
+
+    def release(self, n=1):
+        """
+        Gives back n tokens taken by reserve(...), e.g. when the request they were reserved for is not sent.
+        """
+        self.reserve(-n)
+
+    def acquire(self, n=1, timeout=None):
+        wait = self.reserve(n, timeout)
+        if wait is None:
+            raise Timeout('Timeout expired while waiting for the rate limiter')
+        if wait > 0:
+            time.sleep(wait)
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket with state stored in a file, shared by all processes (and threads) using the same file.
+    Requires fcntl (i.e. a Unix-like system).
+    """
+
+    _format = struct.Struct('<dd')
+
+    def __init__(self, filename, rate, burst=None):
+        if fcntl is None:
+            raise ImportError('FileTokenBucket requires fcntl')
+        super(FileTokenBucket, self).__init__(rate, burst)
+        self.filename = filename
+        self._fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def reserve(self, n=1, timeout=None):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                data = os.read(self._fd, self._format.size)
+                if len(data) == self._format.size:
+                    tokens, updated = self._format.unpack(data)
+                else:
+                    tokens, updated = self.burst, now
+                tokens, wait = self._take(tokens, updated, now, n)
+                if timeout is not None and wait > timeout:
+                    return None
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.write(self._fd, self._format.pack(tokens, now))
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return wait
+
+    def close(self):
+        os.close(self._fd)
+
+
+class RateLimiter(object):
+    """
+    Limits rate of requests with a token bucket per consumer key and, for paths listed in path_rates (mapping
+    paths to rates or (rate, burst) pairs), an additional bucket per consumer key and path.
+
+    A single limiter should be shared by all clients (and so sessions and threads) using the same consumer key.
+    If directory is given, buckets are stored in files there and shared by all processes using the directory.
+    """
+
+    def __init__(self, rate, burst=None, path_rates=None, directory=None):
+        self.rate = rate
+        self.burst = burst
+        self.path_rates = path_rates or {}
+        self.directory = directory
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _make_bucket(self, key, rate, burst):
+        if self.directory is None:
+            return TokenBucket(rate, burst)
+        # Equal str and unicode keys must share the file, so the key is hashed as UTF-8
+        name = '\n'.join('' if part is None else part if isinstance(part, str) else part.encode('UTF-8')
+                         for part in key)
+        filename = os.path.join(self.directory, hashlib.sha1(name).hexdigest() + '.bucket')
+        return FileTokenBucket(filename, rate, burst)
+
+    def get_bucket(self, consumer_key, path=None):
+        key = (consumer_key, path)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if path is None:
+                    rate, burst = self.rate, self.burst
+                else:
+                    rate = self.path_rates[path]
+                    rate, burst = rate if isinstance(rate, tuple) else (rate, None)
+                bucket = self._buckets[key] = self._make_bucket(key, rate, burst)
+            return bucket
+
+    def acquire(self, consumer_key, path, timeout=None):
+        """
+        Waits until a request of given consumer to given path can be sent. Raises Timeout without waiting if that
+        would take longer than timeout seconds.
+        """
+        bucket = self.get_bucket(consumer_key)
+        wait = bucket.reserve(timeout=timeout)
+        if wait is not None and path in self.path_rates:
+            path_wait = self.get_bucket(consumer_key, path).reserve(timeout=timeout)
+            if path_wait is None:
+                # The request is not sent, so the consumer token must not be used up
+                bucket.release()
+                wait = None
+            else:
+                wait = max(wait, path_wait)
+        if wait is None:
+            raise Timeout('Timeout expired while waiting for the rate limiter')
+        if wait > 0:
+            time.sleep(wait)
+
+    def close(self):
+        """
+        Closes files of buckets stored in directory.
+        """
+        with self._lock:
+            buckets, self._buckets = self._buckets, {}
+        for bucket in buckets.itervalues():
+            if isinstance(bucket, FileTokenBucket):
+                bucket.close()
@@ -1,4 +1,7 @@
 from .session import Session, EntityNotFound
+from .reactor import DeadlineExceeded
+from .stats import OperationStats, CallBudgetExceeded, NPlusOneWarning, NPlusOneError
 from .entities import (User, Term, Course, CourseEdition, Faculty, CourseUnit, CourseGroup, ClassType, Room, Building,
                        CourseTestNode, Thesis, Programme, GradeType, Card)
 from .matchstring import MatchString
+from .typeahead import TypeaheadSearch
@@ -0,0 +1,272 @@
+import csv
+import datetime
+import decimal
+import json
+
+from .fieldselector import parse as parse_field_selector, freeze as freeze_field_selector
+from .matchstring import MatchString
+from .factory.entities import (
+    Entity, EntityField, OptionalEntityField, BaseEntityField, OptionalType, IntType, BoolType, DateType, DateTimeType
+)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def _get_value(obj, name):
+    # Works both with entities and rows returned by EntityTable.get_row(...)
+    if isinstance(obj, dict):
+        return obj.get(name)
+    elif name == 'id' or obj.is_loaded(name):
+        return getattr(obj, name)
+    else:
+        return None
+
+
+class Column(object):
+    """
+    Column of exported records. Entity fields referring to single entities are flattened into columns of the
+    referred entity, e.g. 'room.building.name'. Other entity fields (lists, maps, recursive fields) are exported
+    as nested records (or ids for recursive fields) in a single column.
+    """
+
+    def __init__(self, path, field=None, nested_columns=None, id_only=False):
+        self.path = path
+        self.name = '.'.join(path)
+        self.field = field
+        self.nested_columns = nested_columns
+        self.id_only = id_only
+
+    def get_value(self, obj):
+        for name in self.path[:-1]:
+            obj = _get_value(obj, name)
+            if obj is None:
+                return None
+
+        value = _get_value(obj, self.path[-1])
+        if value is None:
+            return None
+        elif self.id_only:
+            return self.field.map(lambda e: _get_value(e, 'id'), value)
+        elif self.nested_columns is not None:
+            return self.field.map(lambda e: make_record(self.nested_columns, e), value)
+        else:
+            return value
+
+
+def get_columns(entity_class, field_selector, path=(), ancestor_selectors=()):
+    columns = [Column(path + ('id', ))]
+    ancestor_selectors += (field_selector, )
+    for field in entity_class.fields:
+        subfield_selector = field_selector.get(field.name)
+        if subfield_selector is None:
+            continue
+
+        field_path = path + (field.name, )
+        if not isinstance(field, BaseEntityField):
+            columns.append(Column(field_path, field))
+        elif any(subfield_selector is selector for selector in ancestor_selectors):
+            columns.append(Column(field_path, field, id_only=True))
+        elif isinstance(field, (EntityField, OptionalEntityField)):
+            columns.extend(get_columns(field.ref_entity_class, subfield_selector, field_path, ancestor_selectors))
+        else:
+            nested_columns = get_columns(field.ref_entity_class, subfield_selector, (), ancestor_selectors)
+            columns.append(Column(field_path, field, nested_columns=nested_columns))
+    return columns
+
+
+class _NestedRecord(list):
+    """
+    List of (column name, value) pairs of an entity nested in a list or map field.
+    """
+
+
+def make_record(columns, obj):
+    return _NestedRecord((column.name, column.get_value(obj)) for column in columns)
+
+
+def _to_json_value(value):
+    if isinstance(value, _NestedRecord):
+        return {name: _to_json_value(v) for name, v in value}
+    elif isinstance(value, (list, tuple)):
+        return [_to_json_value(v) for v in value]
+    elif isinstance(value, dict):
+        return {k: _to_json_value(v) for k, v in value.iteritems()}
+    elif isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    elif isinstance(value, (decimal.Decimal, MatchString)):
+        return unicode(value)
+    else:
+        return value
+
+
+class Exporter(object):
+    """
+    Base class of exporters writing entities (or EntityTable rows) to a file, one record per entity.
+
+    Entities are buffered and written in chunks of chunk_size records, so memory usage does not depend on
+    the number of exported entities as long as they are produced lazily, e.g. by Session.iter_get_many(...)
+    or Session.iter_list(...).
+    """
+
+    def __init__(self, f, entity_class, fields=None, chunk_size=1000):
+        if fields is None:
+            field_selector = entity_class.get_default_field_selector()
+        elif isinstance(fields, basestring):
+            field_selector = parse_field_selector(fields, entity_class)
+        else:
+            field_selector = freeze_field_selector(fields)
+
+        self.f = f
+        self.entity_class = entity_class
+        self.columns = get_columns(entity_class, field_selector)
+        self.chunk_size = chunk_size
+        self._records = []
+
+    @property
+    def column_names(self):
+        return [column.name for column in self.columns]
+
+    def write(self, entity):
+        if not isinstance(entity, (Entity, dict)):
+            raise TypeError('Not an entity: {0!r}'.format(entity))
+        self._records.append([column.get_value(entity) for column in self.columns])
+        if len(self._records) >= self.chunk_size:
+            self.flush()
+
+    def write_many(self, entities):
+        for entity in entities:
+            self.write(entity)
+
+    def write_table(self, table):
+        self.write_many(table.iter_rows())
+
+    def flush(self):
+        records, self._records = self._records, []
+        if records:
+            self._write_chunk(records)
+
+    def _write_chunk(self, records):
+        raise NotImplementedError('Subclasses should override this')
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._close()
+
+    def _close(self):
+        """
+        Releases resources of the exporter. Called also when exporting fails, in which case buffered records
+        are not written.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._close()
+
+
+class NDJSONExporter(Exporter):
+    def _write_chunk(self, records):
+        names = self.column_names
+        lines = []
+        for record in records:
+            lines.append(json.dumps({name: _to_json_value(value) for name, value in zip(names, record)},
+                                    sort_keys=True))
+            lines.append('\n')
+        self.f.write(''.join(lines))
+
+
+def _to_csv_value(value):
+    if value is None:
+        return ''
+    elif isinstance(value, (list, tuple, dict)):
+        return json.dumps(_to_json_value(value), sort_keys=True)
+    value = _to_json_value(value)
+    if isinstance(value, unicode):
+        return value.encode('UTF-8')
+    return value
+
+
+class CSVExporter(Exporter):
+    def __init__(self, f, entity_class, fields=None, chunk_size=1000, **csv_kwargs):
+        super(CSVExporter, self).__init__(f, entity_class, fields, chunk_size)
+        self._writer = csv.writer(f, **csv_kwargs)
+        self._writer.writerow(self.column_names)
+
+    def _write_chunk(self, records):
+        self._writer.writerows([_to_csv_value(value) for value in record] for record in records)
+
+
+def _get_arrow_type(column):
+    if column.field is None or column.id_only or column.nested_columns is not None:
+        return pyarrow.string()
+
+    data_type = column.field.type
+    if isinstance(data_type, OptionalType):
+        data_type = data_type.item_type
+    if isinstance(data_type, IntType):
+        return pyarrow.int64()
+    elif isinstance(data_type, BoolType):
+        return pyarrow.bool_()
+    elif isinstance(data_type, DateTimeType):
+        return pyarrow.timestamp('us')
+    elif isinstance(data_type, DateType):
+        return pyarrow.date32()
+    else:
+        return pyarrow.string()
+
+
+class ParquetExporter(Exporter):
+    """
+    Writes entities to a Parquet file, one row group per chunk. Requires pyarrow.
+    """
+
+    def __init__(self, f, entity_class, fields=None, chunk_size=10000):
+        if pyarrow is None:
+            raise ImportError('ParquetExporter requires pyarrow')
+        super(ParquetExporter, self).__init__(f, entity_class, fields, chunk_size)
+        self._schema = pyarrow.schema([(column.name, _get_arrow_type(column)) for column in self.columns])
+        self._writer = pyarrow.parquet.ParquetWriter(f, self._schema)
+
+    def _prep_value(self, arrow_type, value):
+        if value is None or arrow_type != pyarrow.string():
+            return value
+        elif isinstance(value, (list, tuple, dict)):
+            return json.dumps(_to_json_value(value), sort_keys=True)
+        else:
+            return unicode(_to_json_value(value))
+
+    def _write_chunk(self, records):
+        arrays = []
+        for i, arrow_field in enumerate(self._schema):
+            arrays.append(pyarrow.array(
+                [self._prep_value(arrow_field.type, record[i]) for record in records], type=arrow_field.type))
+        self._writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self._schema))
+
+    def _close(self):
+        self._writer.close()
+
+
+def export(entities, f, entity_class, fields=None, format='ndjson', **kwargs):
+    """
+    Exports entities (any iterable, or EntityTable) to file f in one of formats: 'ndjson', 'csv', 'parquet'.
+    """
+    try:
+        exporter_class = dict(ndjson=NDJSONExporter, csv=CSVExporter, parquet=ParquetExporter)[format]
+    except KeyError:
+        raise ValueError('Invalid format: {0!r}'.format(format))
+
+    with exporter_class(f, entity_class, fields, **kwargs) as exporter:
+        if hasattr(entities, 'iter_rows'):
+            exporter.write_table(entities)
+        else:
+            exporter.write_many(entities)
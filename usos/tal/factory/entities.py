@@ -3,6 +3,8 @@ import decimal
 from collections import namedtuple
 
 from .. import naming
+from ...utils.cache import IdentityCache
+from .selectors import freeze
 from ..matchstring import MatchString
 
 
@@ -140,6 +142,8 @@ class Field(object):
     def __init__(self, default=False, variant=False):
         self.entity_class = None
         self.name = None
+        # Bit representing the field in Entity._loaded_fields mask
+        self.bit = None
         self.default = default
         self.variant = variant
         self._order = next(_field_order)
@@ -201,6 +205,13 @@ class EntityFields(object):
         self._fields = fields
         self._field_list = fields.values()
         self._field_list.sort(key=lambda f: f._order)
+        self.bits = {}
+        self._masks = IdentityCache()
+        self._subselectors = IdentityCache()
+        for i, field in enumerate(self._field_list):
+            field.bit = 1 << i
+            self.bits[field.name] = field.bit
+        self._cacheable_names = IdentityCache()
 
     def __iter__(self):
         return iter(self._field_list)
@@ -208,6 +219,63 @@ class EntityFields(object):
     def __getitem__(self, item):
         return self._fields[item]
 
+    def get_mask(self, field_names):
+        """
+        Returns bitmask of given fields. If field_names is a field selector, its mask is cached.
+        """
+        mask = self._masks.get(field_names)
+        if mask is None:
+            bits = self.bits
+            mask = 0
+            for field_name in field_names:
+                mask |= bits[field_name]
+            if isinstance(field_names, dict):
+                self._masks.set(field_names, mask)
+        return mask
+
+    def select(self, field_selector, mask):
+        """
+        Returns selector of fields from field_selector that are present in mask. Results are cached, so that
+        repeated calls return the same selector object.
+        """
+        if self.get_mask(field_selector) & ~mask == 0:
+            return field_selector
+        subselectors = self._subselectors.get(field_selector)
+        if subselectors is None:
+            subselectors = {}
+            self._subselectors.set(field_selector, subselectors)
+        subselector = subselectors.get(mask)
+        if subselector is None:
+            bits = self.bits
+            subselector = subselectors[mask] = freeze({
+                field_name: subfield_selector
+                for field_name, subfield_selector in field_selector.iteritems()
+                if bits[field_name] & mask
+            })
+        return subselector
+
+    def get_cacheable_names(self, field_selector):
+        """
+        Returns (entity_field_names, value_field_names) pair: names of fields from field_selector referring to other
+        entities, and of other fields selected without subfields. Values of such fields do not depend on the rest of
+        the selector, so reactors may reuse them. Results are cached.
+        """
+        names = self._cacheable_names.get(field_selector)
+        if names is None:
+            entity_field_names = []
+            value_field_names = []
+            for field_name, subfield_selector in field_selector.iteritems():
+                if isinstance(self._fields[field_name], BaseEntityField):
+                    entity_field_names.append(field_name)
+                elif not subfield_selector:  # subfield_selector == {}
+                    value_field_names.append(field_name)
+            names = tuple(entity_field_names), tuple(value_field_names)
+            self._cacheable_names.set(field_selector, names)
+        return names
+
+    def get_names(self, mask):
+        return [field.name for field in self._field_list if field.bit & mask]
+
     def __len__(self):
         return len(self._fields)
 
@@ -230,11 +298,16 @@ class EntityMeta(type):
             else:
                 new_attrs[k] = v
 
+        # Field values are stored in slots, which makes entities much smaller than dict-based objects
+        if '__slots__' not in new_attrs:
+            new_attrs['__slots__'] = tuple(sorted(fields))
+
         subclass = super(EntityMeta, cls).__new__(cls, name, bases, new_attrs)
-        subclass.fields = EntityFields(fields)
         for field_name, field in fields.iteritems():
             field.name = field_name
             field.entity_class = subclass
+        subclass.fields = EntityFields(fields)
+        subclass._field_bits = subclass.fields.bits
         if name != 'Entity' and not hidden:
             _entity_classes_by_name[name] = subclass
 
@@ -255,25 +328,64 @@ class EntityMeta(type):
 
 _entity_classes_by_name = {}
 
+# Entities override __setattr__, so object.__setattr__ is used to bypass loaded fields tracking
+_setattr = object.__setattr__
+
 
 class Entity(object):
     __metaclass__ = EntityMeta
+    # __dict__ (created only when needed) keeps attributes other than fields working, as before slots were used
+    __slots__ = ('id', '_loaded_fields', '__dict__')
     _default_field_selector = None
+    _field_bits = {}
     fields = None
 
     def __init__(self, id, **kwargs):
-        self.id = id
-        for k, v in kwargs.iteritems():
-            setattr(self, k, v)
+        _setattr(self, 'id', id)
+        loaded_fields = 0
+        if kwargs:
+            field_bits = self._field_bits
+            for k, v in kwargs.iteritems():
+                _setattr(self, k, v)
+                loaded_fields |= field_bits.get(k, 0)
+        _setattr(self, '_loaded_fields', loaded_fields)
+
+    def __setattr__(self, name, value):
+        _setattr(self, name, value)
+        bit = self._field_bits.get(name)
+        if bit is not None:
+            _setattr(self, '_loaded_fields', self._loaded_fields | bit)
+
+    def __delattr__(self, name):
+        object.__delattr__(self, name)
+        bit = self._field_bits.get(name)
+        if bit is not None:
+            _setattr(self, '_loaded_fields', self._loaded_fields & ~bit)
+
+    def __getstate__(self):
+        # Required for pickling slotted objects with protocols < 2
+        state = dict(getattr(self, '__dict__', ()))
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if name != '__dict__' and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.iteritems():
+            _setattr(self, name, value)
 
     def __repr__(self):
-        return '<{0} {1}>'.format(self.__class__.__name__, self.__dict__)
+        values = {field.name: getattr(self, field.name) for field in self.fields if self._loaded_fields & field.bit}
+        values['id'] = self.id
+        return '<{0} {1}>'.format(self.__class__.__name__, values)
 
     def is_loaded(self, field):
-        if not isinstance(field, basestring):
-            field = field.name
-
-        return field in self.__dict__
+        if isinstance(field, basestring):
+            bit = self._field_bits.get(field)
+        else:
+            bit = field.bit
+        return bit is not None and bool(self._loaded_fields & bit)
 
     @classmethod
     def get_default_field_names(cls):
@@ -281,15 +393,23 @@ class Entity(object):
 
     @classmethod
     def get_default_field_selector(cls):
-        if not cls._default_field_selector:
+        if cls._default_field_selector is None:
             selector = {}
             for field in cls.fields:
                 if not field.default:
                     continue
                 selector[field.name] = field.get_default_subfield_selector()
-            cls._default_field_selector = selector
+            cls._default_field_selector = freeze(selector)
         return cls._default_field_selector
 
 
+def make_search_item(entity_class, entity, match):
+    search_item_class = entity_class.SearchItem
+    search_item = search_item_class(id='')
+    setattr(search_item, search_item_class.entity_field.name, entity)
+    search_item.match = match
+    return search_item
+
+
 def get_entity_classes():
     return _entity_classes_by_name.values()
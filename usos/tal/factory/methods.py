@@ -1,14 +1,17 @@
 import datetime
-import re
 import decimal
 import copy
 
 from ..matchstring import MatchString
-from ..factory.entities import Coords
-from ..fieldselector import stringify as stringify_field_selector, is_recursive as is_field_selector_recursive
+from ..factory.entities import Coords, ListType, OptionalType
+from ..fieldselector import (
+    stringify as stringify_field_selector, is_recursive as is_field_selector_recursive,
+    get_key as get_field_selector_key
+)
 from ...client import BadRequest
 from ..packid import pack_id, unpack_id
 from ..lang import DEFAULT_LANG
+from ...utils.cache import memoize, IdentityCache
 
 
 class Id(object):
@@ -43,7 +46,7 @@ class ElementaryId(Id):
         if value is None:
             return None
         else:
-            return unicode(response[self.name])
+            return reactor.intern(unicode(value))
 
 
 class CompositeId(Id):
@@ -63,7 +66,7 @@ class CompositeId(Id):
             api_field_selector[name] = {}
 
     def load_value(self, reactor, response):
-        return pack_id(unicode(response[name]) for name in self.names)
+        return reactor.intern(pack_id(unicode(response[name]) for name in self.names))
 
 
 class IdList(object):
@@ -93,13 +96,43 @@ class CompositeTupleIdList(IdList):
         params[self.param_name] = '|'.join(map(self.get_key, ids))
 
     def get_key(self, id):
-        return '({0})'.format(','.join(map(unicode, unpack_id(id))))
+        return _make_tuple_key(id)
+
+
+@memoize(4096)
+def _make_tuple_key(id):
+    return '({0})'.format(','.join(map(unicode, unpack_id(id))))
+
+
+def _compile_loader(steps):
+    # Generates straight-line code building the values dict, e.g.:
+    #   def load_values(reactor, response):
+    #       return {'first_name': response['first_name'], 'room': _load_1(reactor, response)}
+    namespace = {}
+    items = []
+    for i, (field_name, picker, subfield_selector) in enumerate(steps):
+        inline_key = picker.get_inline_key()
+        if inline_key is not None:
+            items.append('{0!r}: response[{1!r}]'.format(field_name, inline_key))
+        else:
+            load_name = '_load_{0}'.format(i)
+            namespace[load_name] = picker.compile(subfield_selector)
+            items.append('{0!r}: {1}(reactor, response)'.format(field_name, load_name))
+    source = 'def load_values(reactor, response):\n    return {{{0}}}\n'.format(', '.join(items))
+    exec compile(source, '<compiled field pickers>', 'exec') in namespace
+    return namespace['load_values']
+
+
+_MAX_LOADERS = 256
 
 
 class FieldPickers(object):
     def __init__(self, **pickers):
         assert 'id' not in pickers, '\'id\' is a reserved field name'
         self._pickers = pickers
+        self._loaders = IdentityCache()
+        # Loaders by selector keys, shared by equal selectors which are not the same object
+        self._loaders_by_key = {}
 
     def iteritems(self):
         return self._pickers.iteritems()
@@ -127,12 +160,25 @@ class FieldPickers(object):
             picker.bind_to_field(entity_class.fields[field_name])
 
     def load_values(self, reactor, response, field_selector):
-        values = {}
-        for field_name, subfield_selector in field_selector.iteritems():
-            picker = self.get(field_name)
-            if picker is not None:
-                values[field_name] = picker.load_value(reactor, response, subfield_selector)
-        return values
+        loader = self._loaders.get(field_selector)
+        if loader is None:
+            key = get_field_selector_key(field_selector)
+            loader = self._loaders_by_key.get(key)
+            if loader is None:
+                loader = self.compile_loader(field_selector)
+                if len(self._loaders_by_key) >= _MAX_LOADERS:
+                    self._loaders_by_key.clear()
+                self._loaders_by_key[key] = loader
+            self._loaders.set(field_selector, loader)
+        return loader(reactor, response)
+
+    def compile_loader(self, field_selector):
+        """
+        Returns function loader(reactor, response) equivalent to load_values(reactor, response, field_selector).
+        """
+        return _compile_loader([(field_name, self._pickers[field_name], subfield_selector)
+                                for field_name, subfield_selector in field_selector.iteritems()
+                                if field_name in self._pickers])
 
     def update_field_selector(self, api_field_selector, field_selector):
         for field_name, subfield_selector in field_selector.iteritems():
@@ -199,6 +245,19 @@ class Picker(object):
     def load_value(self, reactor, response, subfield_selector):
         raise NotImplementedError('Subclasses should override this')
 
+    def compile(self, subfield_selector):
+        """
+        Returns function load(reactor, response) equivalent to load_value(reactor, response, subfield_selector).
+        """
+        load_value = self.load_value
+        return lambda reactor, response: load_value(reactor, response, subfield_selector)
+
+    def get_inline_key(self):
+        """
+        Returns response key if the picked value is always response[key], None otherwise.
+        """
+        return None
+
     def bind_to_field(self, field):
         if self.field is not None and field is not self.field:
             raise ValueError('Picker already bound to different field')
@@ -218,6 +277,21 @@ class ElementaryPicker(Picker):
             return None
         return self.prep_value(reactor, response[self.field_name], subfield_selector)
 
+    def compile(self, subfield_selector):
+        field_name = self.field_name
+        prep_value = self.prep_value
+
+        if self.field.variant:
+            def load(reactor, response):
+                if field_name not in response:
+                    return None
+                return prep_value(reactor, response[field_name], subfield_selector)
+        else:
+            def load(reactor, response):
+                return prep_value(reactor, response[field_name], subfield_selector)
+
+        return load
+
     def prep_value(self, reactor, value, subfield_selector):
         raise NotImplementedError('Subclasses should override this')
 
@@ -246,9 +320,24 @@ class ElementaryPicker(Picker):
 
 
 class SimplePicker(ElementaryPicker):
+    def __init__(self, field_name, intern=False):
+        super(SimplePicker, self).__init__(field_name)
+        # Should be set for strings which are often repeated across responses
+        self.intern = intern
+
     def prep_value(self, reactor, value, subfield_selector):
+        if self.intern and isinstance(value, basestring):
+            return reactor.intern(value)
+        if reactor.immutable_values and isinstance(value, list):
+            return _freeze(value)
         return value
 
+    def get_inline_key(self):
+        # Lists are frozen when reactor.immutable_values is set, so they cannot be taken from the response as is
+        if self.field.variant or self.intern or _may_be_list(getattr(self.field, 'type', None)):
+            return None
+        return self.field_name
+
 
 class DecimalPicker(ElementaryPicker):
     def prep_value(self, reactor, value, subfield_selector):
@@ -279,23 +368,54 @@ class USOSwebURLPicker(ElementaryPicker):
             return value + '?' + lang_param
 
 
+_immutable_types = (basestring, int, long, float, bool, type(None), datetime.date, decimal.Decimal)
+
+
+def _may_be_list(data_type):
+    if isinstance(data_type, OptionalType):
+        data_type = data_type.item_type
+    return isinstance(data_type, ListType)
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _make_copier(value):
+    # Returns function making fresh copies of the given value
+    if isinstance(value, _immutable_types):
+        return lambda: value
+    elif isinstance(value, list) and all(isinstance(item, _immutable_types) for item in value):
+        return lambda: list(value)
+    else:
+        return lambda: copy.deepcopy(value)
+
+
 class MappingPicker(ElementaryPicker):
     def __init__(self, field_name, mapping, open=False):
         super(MappingPicker, self).__init__(field_name)
         self.mapping = mapping
         self.open = open
+        # Mapped values are shared when reactor.immutable_values is set, copied otherwise
+        self._frozen_mapping = {k: _freeze(v) for k, v in mapping.iteritems()}
+        self._copiers = {k: _make_copier(v) for k, v in mapping.iteritems()}
 
     def prep_value(self, reactor, value, subfield_selector):
-        if self.open:
-            try:
-                value = self.mapping.get(value, value)
-            except TypeError:
-                # Probably unhashable type, just ignore it
-                pass
-
-            return copy.deepcopy(value)
-        else:
-            return copy.deepcopy(self.mapping[value])
+        immutable = reactor.immutable_values
+        try:
+            if immutable:
+                return self._frozen_mapping[value]
+            else:
+                return self._copiers[value]()
+        except (KeyError, TypeError):
+            # TypeError: probably unhashable type
+            if not self.open:
+                raise
+
+        # Values which are not mapped come straight from the response, so there is no need to copy them
+        return _freeze(value) if immutable else value
 
 
 # class CompositePicker(Picker):  # TODO unused, should be removed
@@ -442,6 +562,10 @@ class BaseEntityPicker(ElementaryPicker):
         super(BaseEntityPicker, self).bind_to_field(field)
         self.entity_subfield_pickers.bind_to_entity_class(field.ref_entity_class)
 
+    def compile(self, subfield_selector):
+        # Subclasses override load_value(...), so they can't use ElementaryPicker.compile(...)
+        return Picker.compile(self, subfield_selector)
+
 
 class EntityPicker(BaseEntityPicker):
     def load_value(self, reactor, response, subfield_selector):
@@ -547,7 +671,8 @@ class EntityListPicker(BaseEntityPicker):
 
 class EntityIdListPicker(ElementaryPicker):
     def prep_value(self, reactor, value, subfield_selector):
-        return [reactor.spawn_entity(self.field.ref_entity_class, unicode(id), subfield_selector)
+        entity_class = self.field.ref_entity_class
+        return [reactor.spawn_entity(entity_class, reactor.intern(unicode(id)), subfield_selector)
                 for id in value]
 
 
@@ -562,29 +687,56 @@ class EntityIdMapPicker(ElementaryPicker):
         else:
             it = value.iteritems()
 
-        return {key: reactor.spawn_entity(self.field.ref_entity_class, unicode(id), subfield_selector)
+        entity_class = self.field.ref_entity_class
+        return {key: reactor.spawn_entity(entity_class, reactor.intern(unicode(id)), subfield_selector)
                 for key, id in it}
 
 
-class DatePicker(ElementaryPicker):
-    _date_re = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
-
-    def prep_value(self, reactor, value, subfield_selector):
-        if value is None or value == '':
-            return None
-        match = self._date_re.match(value)
-        return datetime.date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+def _parse_date(value):
+    if value is None or value == '':
+        return None
+    # Fast path for the only format used by USOS API: YYYY-MM-DD
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        year, month, day = value[0:4], value[5:7], value[8:10]
+        if (year + month + day).isdigit():
+            return datetime.date(int(year), int(month), int(day))
+    raise ValueError('Invalid date: {0!r}'.format(value))
 
 
-def load_datetime(value):
+def _parse_datetime(value):
     if value is None or value == '':
         return None
+
+    # Fast path for YYYY-MM-DD HH:MM:SS and YYYY-MM-DD HH:MM:SS.ffffff
+    length = len(value)
+    if (length >= 19 and value[4] == '-' and value[7] == '-' and value[10] == ' ' and value[13] == ':' and
+            value[16] == ':'):
+        year, month, day = value[0:4], value[5:7], value[8:10]
+        hour, minute, second = value[11:13], value[14:16], value[17:19]
+        fraction = value[20:]
+        if length == 19 or (value[19] == '.' and 1 <= len(fraction) <= 6):
+            if (year + month + day + hour + minute + second + fraction).isdigit():
+                return datetime.datetime(
+                    int(year), int(month), int(day), int(hour), int(minute), int(second),
+                    int(fraction.ljust(6, '0'))
+                )
+
     if '.' in value:
         return datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f')
     else:
         return datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
 
 
+# Dates and datetimes are immutable, so parsed values may be shared
+load_date = memoize(4096)(_parse_date)
+load_datetime = memoize(4096)(_parse_datetime)
+
+
+class DatePicker(ElementaryPicker):
+    def prep_value(self, reactor, value, subfield_selector):
+        return load_date(value)
+
+
 class DateTimePicker(ElementaryPicker):
     def prep_value(self, reactor, value, subfield_selector):
         return load_datetime(value)
@@ -592,7 +744,7 @@ class DateTimePicker(ElementaryPicker):
 
 class LangDictPicker(ElementaryPicker):
     def prep_value(self, reactor, value, subfield_selector):
-        return value[reactor.lang] or value[DEFAULT_LANG] or ''
+        return reactor.intern(value[reactor.lang] or value[DEFAULT_LANG] or '')
 
 
 class CoordsPicker(ElementaryPicker):
@@ -610,7 +762,24 @@ class BaseGetMethod(object):
             self.fields[field_name] = field
         self.has_fields_param = has_fields_param
         self.field_names = frozenset(self.fields.keys())
+        self.field_mask = entity_class.fields.get_mask(self.field_names)
         self.field_pickers = field_pickers
+        self._fields_params = IdentityCache()
+
+    def get_fields_param(self, field_selector):
+        """
+        Returns value of the fields param for given field selector. Values are cached by selector identity.
+        """
+        fields_param = self._fields_params.get(field_selector)
+        if fields_param is None:
+            fields_param = self._make_fields_param(field_selector)
+            self._fields_params.set(field_selector, fields_param)
+        return fields_param
+
+    def _make_fields_param(self, field_selector):
+        api_field_selector = {}
+        self.field_pickers.update_field_selector(api_field_selector, field_selector)
+        return stringify_field_selector(api_field_selector)
 
 
 class BaseGetMethodCandidacy(object):
@@ -626,12 +795,13 @@ class BaseGetMethodCandidacy(object):
 
 
 class GetMethodCandidacy(BaseGetMethodCandidacy):
-    def __init__(self, method, target, field_names):
+    def __init__(self, method, target, field_mask):
+        field_selector = target.get_field_selector(field_mask)
         super(GetMethodCandidacy, self).__init__(
             method,
             [target],
-            target.get_field_selector(field_names),
-            len(field_names)
+            field_selector,
+            len(field_selector)
         )
 
     def execute(self, reactor):
@@ -646,10 +816,11 @@ class GetMethod(BaseGetMethod):
         self.extra_params = {} if extra_params is None else extra_params
 
     def make_candidacy(self, targets):
+        field_mask = self.field_mask
         for target in targets:
-            common_field_names = self.field_names.intersection(target.field_names)
-            if common_field_names:
-                return GetMethodCandidacy(self, target, common_field_names)
+            common_field_mask = field_mask & target.pending
+            if common_field_mask:
+                return GetMethodCandidacy(self, target, common_field_mask)
         return None
 
     def execute_get(self, reactor, id, field_selector):
@@ -681,9 +852,7 @@ class GetMethod(BaseGetMethod):
         self.id.update_params(params, id)
 
         if self.has_fields_param:
-            api_field_selector = {}
-            self.field_pickers.update_field_selector(api_field_selector, field_selector)
-            params['fields'] = stringify_field_selector(api_field_selector)
+            params['fields'] = self.get_fields_param(field_selector)
 
         params.update(self.extra_params)
 
@@ -691,12 +860,13 @@ class GetMethod(BaseGetMethod):
 
 
 class GetManyMethodCandidacy(BaseGetMethodCandidacy):
-    def __init__(self, method, targets, field_names):
+    def __init__(self, method, targets, field_mask):
+        field_selector = targets[0].get_field_selector(field_mask)
         super(GetManyMethodCandidacy, self).__init__(
             method,
             targets,
-            targets[0].get_field_selector(field_names),
-            len(targets) * len(field_names)
+            field_selector,
+            len(targets) * len(field_selector)
         )
 
     def execute(self, reactor):
@@ -711,23 +881,24 @@ class GetManyMethod(BaseGetMethod):
 
     def make_candidacy(self, targets):
         matched_targets = []
-        matched_field_names = None
+        matched_field_mask = 0
+        field_mask = self.field_mask
         for target in targets:
-            field_names = self.field_names.intersection(target.field_names)
-            if not field_names:
+            common_field_mask = field_mask & target.pending
+            if not common_field_mask:
                 continue
 
             if matched_targets and not target.has_same_field_selector(matched_targets[0]):
                 continue
 
             if not matched_targets:
-                matched_field_names = field_names
+                matched_field_mask = common_field_mask
             matched_targets.append(target)
             if len(matched_targets) == self.limit:
                 break
 
-        if matched_field_names:
-            return GetManyMethodCandidacy(self, matched_targets, matched_field_names)
+        if matched_field_mask:
+            return GetManyMethodCandidacy(self, matched_targets, matched_field_mask)
         else:
             return None
 
@@ -751,9 +922,7 @@ class GetManyMethod(BaseGetMethod):
         self.ids.update_params(params, ids)
 
         if self.has_fields_param:
-            api_field_selector = {}
-            self.field_pickers.update_field_selector(api_field_selector, field_selector)
-            params['fields'] = stringify_field_selector(api_field_selector)
+            params['fields'] = self.get_fields_param(field_selector)
 
         return params
 
@@ -776,20 +945,15 @@ class GetManyAsListMethod(GetManyMethod):
             ret[id] = values
         return ret
 
-    def _prep_params(self, ids, field_selector):
-        params = {}
-
-        self.ids.update_params(params, ids)
-
-        if self.has_fields_param:
-            api_field_selector = {}
-            self.entity_field_pickers.update_field_selector(api_field_selector, field_selector, with_id=True)
-            params['fields'] = stringify_field_selector(api_field_selector)
-
-        return params
+    def _make_fields_param(self, field_selector):
+        api_field_selector = {}
+        self.entity_field_pickers.update_field_selector(api_field_selector, field_selector, with_id=True)
+        return stringify_field_selector(api_field_selector)
 
 
 class SearchMethod(object):
+    page_size = 20
+
     def __init__(self, path, entity_class, picker, fields_param_mode='full', query_param_name='query'):
         self.path = path
         self.entity_class = entity_class
@@ -803,36 +967,40 @@ class SearchMethod(object):
         self.fields_param_mode = fields_param_mode
 
         picker.bind_to_field(entity_class.SearchItem.entity_field)
+        self._fields_params = IdentityCache()
 
     def execute_search(self, reactor, query, field_selector):
+        response = reactor.call_method(
+            self.path,
+            self.prep_params(reactor, query, field_selector)
+        )
+        return self.load_search_items(reactor, response, field_selector)
+
+    def prep_params(self, reactor, query, field_selector):
         params = {
             'lang': reactor.lang,
             self.query_param_name: query,
-            'num': 20,
+            'num': self.page_size,
         }
 
         if self.fields_param_mode != 'none':
-            api_field_selector = {'match': {}}
-            self.picker.update_field_selector(api_field_selector, field_selector)
-            api_field_selector = stringify_field_selector(api_field_selector)
-            if self.fields_param_mode == 'full':
-                params['fields'] = 'items[{0}]'.format(api_field_selector)
-            else:
-                params['fields'] = api_field_selector
+            fields_param = self._fields_params.get(field_selector)
+            if fields_param is None:
+                api_field_selector = {'match': {}}
+                self.picker.update_field_selector(api_field_selector, field_selector)
+                fields_param = stringify_field_selector(api_field_selector)
+                if self.fields_param_mode == 'full':
+                    fields_param = 'items[{0}]'.format(fields_param)
+                self._fields_params.set(field_selector, fields_param)
+            params['fields'] = fields_param
 
-        response = reactor.call_method(
-            self.path,
-            params
-        )
+        return params
 
+    def load_search_items(self, reactor, response, field_selector):
         ret = []
         for item_dict in response['items']:
             entity = self.picker.load_value(reactor, item_dict, field_selector)
-            search_item_entity_class = self.entity_class.SearchItem
-            search_item_entity = search_item_entity_class(id='')
-            setattr(search_item_entity, search_item_entity_class.entity_field.name, entity)
-            search_item_entity.match = MatchString.from_html(item_dict['match'])
-            ret.append(search_item_entity)
+            ret.append(reactor.make_search_item(self.entity_class, entity, MatchString.from_html(item_dict['match'])))
         return ret
 
 
@@ -877,20 +1045,32 @@ class ListMethod(object):
         self.extra_params = extra_params
         self.has_fields_param = has_fields_param
         self._x_fields_wrapper = '{0}' if x_fields_wrapper is None else x_fields_wrapper
+        self._fields_params = IdentityCache()
 
     def execute_list(self, reactor, _, field_selector):
+        return [self.load_entity(reactor, entity_dict, field_selector)
+                for entity_dict in self.call(reactor, field_selector)]
+
+    def call(self, reactor, field_selector):
+        """
+        Calls the method and returns list of listed entities in response format, to be passed to load_entity(...).
+        """
         params = {}
         params.update(self.extra_params)
         if self.has_fields_param:
-            api_field_selector = {}
-            self.entity_field_pickers.update_field_selector(api_field_selector, field_selector, with_id=True)
-            params['fields'] = self._x_fields_wrapper.format(stringify_field_selector(api_field_selector))
+            fields_param = self._fields_params.get(field_selector)
+            if fields_param is None:
+                api_field_selector = {}
+                self.entity_field_pickers.update_field_selector(api_field_selector, field_selector, with_id=True)
+                fields_param = self._x_fields_wrapper.format(stringify_field_selector(api_field_selector))
+                self._fields_params.set(field_selector, fields_param)
+            params['fields'] = fields_param
 
         response = reactor.call_method(self.path, params)
-        ret = []
-        for entity_dict in _iter_ht_selector(self._ht_selector, response):
-            ret.append(self.entity_field_pickers.load_entity(reactor, entity_dict, field_selector))
-        return ret
+        return list(_iter_ht_selector(self._ht_selector, response))
+
+    def load_entity(self, reactor, entity_dict, field_selector):
+        return self.entity_field_pickers.load_entity(reactor, entity_dict, field_selector)
 
 
 class Registry(object):
@@ -922,12 +1102,36 @@ class Registry(object):
     def get_search_method_by_entity_class(self, entity_class):
         return self._search_methods_by_entity_class[entity_class]
 
+    def get_search_entity_classes(self):
+        return list(self._search_methods_by_entity_class)
+
     def get_list_method(self, entity_class, domain):
         return self._list_methods[(entity_class, domain)]
 
     def get_getter_methods(self, entity_class):
         return list(self._getter_methods.get(entity_class, ()))
 
+    def get_get_many_method(self, entity_class, field_names):
+        """
+        Returns get-many method of given entity class able to load all given fields, or None.
+        """
+        for method in self._getter_methods.get(entity_class, ()):
+            if isinstance(method, GetManyMethod) and method.field_names.issuperset(field_names):
+                return method
+        return None
+
+    def iter_methods(self):
+        """
+        Yields all registered get, get-many, search and list methods.
+        """
+        for methods in self._getter_methods.itervalues():
+            for method in methods:
+                yield method
+        for method in self._search_methods_by_entity_class.itervalues():
+            yield method
+        for method in self._list_methods.itervalues():
+            yield method
+
     def get_list_domains(self, entity_class):
         ret = []
         for (key_entity_class, key_domain) in self._list_methods:
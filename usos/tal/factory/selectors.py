@@ -0,0 +1,115 @@
+import threading
+import weakref
+
+
+def _stringify(field_selector, ancestors, strict):
+    ancestors += (field_selector, )
+    parts = []
+    for field_name in sorted(field_selector):
+        subfield_selector = field_selector[field_name]
+        if not subfield_selector:
+            parts.append(field_name)
+        elif subfield_selector.get(field_name) is subfield_selector:
+            # Recursive field, as produced by parsing "field_name*[...]"
+            rest = {k: v for k, v in subfield_selector.iteritems() if k != field_name}
+            parts.append('{0}*[{1}]'.format(field_name, _stringify(rest, ancestors + (subfield_selector, ), strict)))
+        else:
+            for depth, ancestor in enumerate(reversed(ancestors)):
+                if subfield_selector is ancestor:
+                    if strict:
+                        raise ValueError('Field selector with cycles other than recursive fields cannot be '
+                                         'stringified')
+                    parts.append('{0}^{1}'.format(field_name, depth))
+                    break
+            else:
+                parts.append('{0}[{1}]'.format(field_name, _stringify(subfield_selector, ancestors, strict)))
+    return '|'.join(parts)
+
+
+def stringify(field_selector):
+    """
+    Returns string representation of field selector, with fields in alphabetical order. Recursive fields are
+    written as "field_name*[...]".
+    """
+    return _stringify(field_selector, (), True)
+
+
+def get_key(field_selector):
+    """
+    Returns canonical string key of field selector (FieldSelector or a nested dict); equal selectors have equal
+    keys.
+    """
+    if isinstance(field_selector, FieldSelector):
+        return field_selector.key
+    return _stringify(field_selector, (), False)
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError('FieldSelector is immutable')
+
+
+class FieldSelector(dict):
+    """
+    Immutable field selector. Instances are interned, so equal selectors made by freeze(...) are the same object
+    and can be compared by identity. Selectors are hashable and compared by their canonical key.
+    """
+
+    __slots__ = ('key', '_hash', '__weakref__')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, FieldSelector):
+            return self is other or self.key == other.key
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return 'FieldSelector({0!r})'.format(self.key)
+
+
+_interned = weakref.WeakValueDictionary()
+_interned_lock = threading.Lock()
+
+
+def _freeze(field_selector, memo):
+    if isinstance(field_selector, FieldSelector):
+        return field_selector
+    frozen = memo.get(id(field_selector))
+    if frozen is not None:
+        return frozen
+
+    key = _stringify(field_selector, (), False)
+    with _interned_lock:
+        frozen = _interned.get(key)
+    if frozen is not None:
+        memo[id(field_selector)] = frozen
+        return frozen
+
+    frozen = FieldSelector()
+    # Registered before subselectors are frozen, so that cycles lead back to this object
+    memo[id(field_selector)] = frozen
+    for field_name, subfield_selector in field_selector.iteritems():
+        dict.__setitem__(frozen, field_name, _freeze(subfield_selector, memo))
+    frozen.key = key
+    frozen._hash = hash(key)
+    with _interned_lock:
+        return _interned.setdefault(key, frozen)
+
+
+def freeze(field_selector):
+    """
+    Returns interned FieldSelector equal to given field selector (a nested dict, possibly recursive).
+    """
+    return _freeze(field_selector, {})
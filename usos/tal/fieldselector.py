@@ -1,4 +1,6 @@
 from .factory.entities import BaseEntityField
+from .factory.selectors import FieldSelector, freeze, stringify, get_key
+from ..utils.cache import LRUCache
 import re
 
 _field_selector_re = re.compile(r'([][|*])|([a-zA-Z_][a-zA-Z_0-9]*)|(.)', flags=re.DOTALL)
@@ -89,6 +91,8 @@ class Parser(object):
             subfields = field.get_default_subfield_selector()
 
         if recursive:
+            # Default subfield selectors are shared, so they must be copied before being modified
+            subfields = dict(subfields)
             subfields[field_name] = subfields
 
         return field_name, subfields
@@ -111,7 +115,10 @@ class Parser(object):
         return result
 
 
-def parse(s, entity_class):
+_parse_cache = LRUCache(1024)
+
+
+def _parse(s, entity_class):
     parser = Parser(s)
     fields = parser.parse_field_selector(entity_class)
     if parser.token_type != 'eof':
@@ -119,6 +126,17 @@ def parse(s, entity_class):
     return fields
 
 
+def parse(s, entity_class):
+    """
+    Parses field selector of given entity class and returns it as FieldSelector. Results are cached.
+    """
+    key = entity_class, s
+    field_selector = _parse_cache.get(key)
+    if field_selector is None:
+        field_selector = _parse_cache[key] = freeze(_parse(s, entity_class))
+    return field_selector
+
+
 def parse_basic(s):
     parser = BasicParser(s)
     field_selector = parser.parse_field_selector()
@@ -127,10 +145,5 @@ def parse_basic(s):
     return field_selector
 
 
-def stringify(s):
-    # Current implementation does not work with recursive fields
-    return '|'.join(('{0}[{1}]'.format(k, stringify(v)) if v else k) for k, v in s.iteritems())
-
-
 def is_recursive(field_selector, field_name):
     return field_selector.get(field_name) is field_selector
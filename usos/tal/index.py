@@ -0,0 +1,158 @@
+import bisect
+import threading
+
+from .entities import User, Course, Faculty, Thesis
+from .factory.entities import DataField
+from .textsearch import fold, split_words, split_query, make_match_string
+
+# Fields which make up indexed text, in order
+_indexed_fields = {
+    User: ('first_name', 'last_name'),
+    Course: ('name', ),
+    Faculty: ('name', ),
+    Thesis: ('name', ),
+}
+
+
+class _ClassIndex(object):
+    def __init__(self, entity_class):
+        self.entity_class = entity_class
+        self.field_names = _indexed_fields[entity_class]
+        self.entries = {}  # id -> (text, values)
+        self.postings = {}  # word -> set of ids
+        self._sorted_words = None
+
+    def add(self, entity):
+        text = ' '.join(getattr(entity, field_name) or '' for field_name in self.field_names)
+        values = {field.name: getattr(entity, field.name)
+                  for field in self.entity_class.fields
+                  if isinstance(field, DataField) and entity.is_loaded(field)}
+
+        old_entry = self.entries.get(entity.id)
+        if old_entry is not None:
+            old_text, old_values = old_entry
+            old_values.update(values)
+            values = old_values
+            if old_text != text:
+                self._remove_postings(entity.id, old_text)
+                self._add_postings(entity.id, text)
+        else:
+            self._add_postings(entity.id, text)
+        self.entries[entity.id] = text, values
+
+    def _add_postings(self, id, text):
+        for _, word in split_words(text):
+            ids = self.postings.get(word)
+            if ids is None:
+                ids = self.postings[word] = set()
+                self._sorted_words = None
+            ids.add(id)
+
+    def _remove_postings(self, id, text):
+        for _, word in split_words(text):
+            ids = self.postings.get(word)
+            if ids is not None:
+                ids.discard(id)
+                if not ids:
+                    del self.postings[word]
+                    self._sorted_words = None
+
+    def _get_sorted_words(self):
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self.postings)
+        return self._sorted_words
+
+    def _find_prefixed(self, prefix):
+        words = self._get_sorted_words()
+        ids = set()
+        i = bisect.bisect_left(words, prefix)
+        while i < len(words) and words[i].startswith(prefix):
+            ids.update(self.postings[words[i]])
+            i += 1
+        return ids
+
+    def search(self, query_words):
+        ids = None
+        for query_word in query_words:
+            word_ids = self._find_prefixed(query_word)
+            ids = word_ids if ids is None else ids & word_ids
+            if not ids:
+                return []
+
+        ret = []
+        for id in ids or ():
+            text, values = self.entries[id]
+            ret.append((id, values, make_match_string(text, query_words)))
+        ret.sort(key=lambda (id, values, match): (fold(self.entries[id][0]), id))
+        return ret
+
+
+class LocalIndex(object):
+    """
+    In-memory inverted index over names of users, courses, faculties and theses.
+
+    Assign it to Session.index to index all entities loaded by the session. Entities are indexed separately for
+    each language, since names (and other values) depend on Session.lang. Once the index holds all entities of
+    some class (e.g. after fetching the whole catalog), mark it as authoritative for this class, and
+    Session.search(...) will answer queries in the same language locally, without calling search methods.
+    """
+
+    def __init__(self):
+        self._class_indexes = {}  # (entity class, lang) -> _ClassIndex
+        self._authoritative = set()  # (entity class, lang) pairs
+        self._lock = threading.Lock()
+
+    def accepts(self, entity_class):
+        return entity_class in _indexed_fields
+
+    def add(self, entity, lang):
+        entity_class = type(entity)
+        if entity_class not in _indexed_fields or entity.id is None:
+            return
+        if not all(entity.is_loaded(field_name) for field_name in _indexed_fields[entity_class]):
+            return
+        with self._lock:
+            class_index = self._class_indexes.get((entity_class, lang))
+            if class_index is None:
+                class_index = self._class_indexes[entity_class, lang] = _ClassIndex(entity_class)
+            class_index.add(entity)
+
+    def add_many(self, entities, lang):
+        for entity in entities:
+            self.add(entity, lang)
+
+    def __len__(self):
+        return sum(len(class_index.entries) for class_index in self._class_indexes.itervalues())
+
+    def set_authoritative(self, entity_class, authoritative=True, lang=None):
+        """
+        Marks the index as authoritative for entity_class in given language or, if lang is None, in all languages
+        in which entities of the class are indexed so far.
+        """
+        if entity_class not in _indexed_fields:
+            raise ValueError('Entity class {0} is not indexed'.format(entity_class))
+        with self._lock:
+            if lang is None:
+                keys = [key for key in self._class_indexes if key[0] is entity_class]
+            else:
+                keys = [(entity_class, lang)]
+            if authoritative:
+                self._authoritative.update(keys)
+            else:
+                self._authoritative.difference_update(keys)
+
+    def is_authoritative(self, entity_class, lang):
+        return (entity_class, lang) in self._authoritative
+
+    def search(self, entity_class, query, lang, limit=None):
+        """
+        Returns list of (id, values, match string) tuples, where values is a dict with all indexed data field
+        values of the entity.
+        """
+        query_words = split_query(query)
+        if not query_words:
+            return []
+        with self._lock:
+            class_index = self._class_indexes.get((entity_class, lang))
+            ret = [] if class_index is None else class_index.search(query_words)
+        return ret if limit is None else ret[:limit]
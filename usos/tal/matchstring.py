@@ -15,6 +15,9 @@ _named_entities = dict(
 
 
 def _unescape(s):
+    if '&' not in s:
+        return s
+
     def repl(match):
         if match.group(1):
             try:
@@ -22,9 +25,9 @@ def _unescape(s):
             except KeyError:
                 raise ValueError('Unsupported HTML entity: {0}'.format(match.group(0)))
         elif match.group(2):
-            return chr(int(match.group(2)))
+            return unichr(int(match.group(2)))
         else:
-            return chr(int(match.group(3), base=16))
+            return unichr(int(match.group(3), base=16))
     return _entity_re.sub(repl, s)
 
 
@@ -33,9 +36,32 @@ def _escape_html(s):
              .replace('"', '&quot;').replace("'", '&#39;'))
 
 
+def _parse_html(s):
+    parts = []
+    normal_parts = []
+    for normal, highlighted, invalid in _split_re.findall(s):
+        if normal:
+            normal_parts.append(_unescape(normal))
+        elif highlighted:
+            parts.append(''.join(normal_parts))
+            parts.append(_unescape(highlighted))
+            normal_parts = []
+        elif invalid:
+            raise ValueError('Invalid match string: {0}'.format(s))
+    parts.append(''.join(normal_parts))
+    return parts
+
+
 class MatchString(object):
-    def __init__(self, parts):
+    def __init__(self, parts=None, html=None):
+        # Parts are parsed from HTML on first use
         self._parts = parts
+        self._html = html
+
+    def _get_parts(self):
+        if self._parts is None:
+            self._parts = _parse_html(self._html)
+        return self._parts
 
     def format(self, start, end, escape=None):
         if escape in ('html', 'xml'):
@@ -45,39 +71,33 @@ class MatchString(object):
         elif not callable(escape):
             raise ValueError('Invalid escape argument: {0}'.format(escape))
 
-        ret = [escape(self._parts[0])]
-        for i in xrange(1, len(self._parts), 2):
+        parts = self._get_parts()
+        ret = [escape(parts[0])]
+        for i in xrange(1, len(parts), 2):
             ret.append(start)
-            ret.append(escape(self._parts[i]))
+            ret.append(escape(parts[i]))
             ret.append(end)
-            ret.append(self._parts[i + 1])
+            ret.append(parts[i + 1])
         return ''.join(ret)
 
     def __iter__(self):
         highlighted = False
-        for part in self._parts:
+        for part in self._get_parts():
             if part:
                 yield part, highlighted
             highlighted = not highlighted
 
     def __eq__(self, other):
         if isinstance(other, MatchString):
+            if self._html is not None and self._html == other._html:
+                return True
             return list(self) == list(other)
         else:
             return False
 
     @classmethod
     def from_html(cls, s):
-        parts = ['']
-        for normal, highlighted, invalid in _split_re.findall(s):
-            if normal:
-                parts[-1] += _unescape(normal)
-            elif highlighted:
-                parts.append(_unescape(highlighted))
-                parts.append('')
-            elif invalid:
-                raise ValueError('Invalid match string: {0}'.format(s))
-        return MatchString(parts)
+        return MatchString(html=s)
 
     def __unicode__(self):
         return self.format('<b>', '</b>', 'html')
@@ -86,4 +106,4 @@ class MatchString(object):
         return str(unicode(self))
 
     def __repr__(self):
-        return '{0}.{1}({2!r})'.format(self.__class__.__module__, self.__class__.__name__, self._parts)
+        return '{0}.{1}({2!r})'.format(self.__class__.__module__, self.__class__.__name__, self._get_parts())
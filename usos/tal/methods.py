@@ -42,8 +42,8 @@ secondary_faculty_field_pickers = FieldPickers()
 
 default_user_field_pickers = EntityFieldPickers(
     ElementaryId('id'),
-    first_name=SimplePicker('first_name'),
-    last_name=SimplePicker('last_name'),
+    first_name=SimplePicker('first_name', intern=True),
+    last_name=SimplePicker('last_name', intern=True),
 )
 
 primary_user_field_pickers = default_user_field_pickers | FieldPickers(
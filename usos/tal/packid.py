@@ -1,12 +1,24 @@
 import re
 
+from ..utils.cache import memoize
+
+_escape_re = re.compile(r'\\(.)|\|', flags=re.DOTALL)
+
 
 def pack_id(id):
-    return '|'.join(part.replace('\\', '\\\\').replace('|', '\\|') for part in id)
+    """
+    Packs parts of a composite id into a single string, e.g. ('a', 'b|c') -> 'a|b\\|c'.
+    """
+    parts = tuple(id)
+    packed = '|'.join(parts)
+    # Fast path: no part needs escaping
+    if '\\' not in packed and packed.count('|') == len(parts) - 1:
+        return packed
+    return '|'.join(part.replace('\\', '\\\\').replace('|', '\\|') for part in parts)
 
 
-def unpack_id(id, size=None):
-    fragments = re.split(r'\\(.)|\|', id, re.DOTALL)
+def _unpack_escaped(id):
+    fragments = _escape_re.split(id)
     parts = [fragments[0]]
     for i in xrange(1, len(fragments), 2):
         sep = fragments[i]
@@ -17,7 +29,21 @@ def unpack_id(id, size=None):
         else:
             raise ValueError('Invalid escape character: {0}'.format(sep))
         parts[-1] += fragments[i + 1]
+    return tuple(parts)
+
 
+@memoize(4096)
+def _unpack(id):
+    if '\\' not in id:
+        return tuple(id.split('|'))
+    return _unpack_escaped(id)
+
+
+def unpack_id(id, size=None):
+    """
+    Reverse of pack_id(...). Tuples are accepted as already unpacked ids.
+    """
+    parts = id if isinstance(id, tuple) else _unpack(id)
     if size is not None and len(parts) != size:
         raise ValueError('Invalid number of parts')
-    return tuple(parts)
+    return parts
@@ -0,0 +1,69 @@
+from .reactor import Reactor, Target
+
+
+class RawEntity(dict):
+    """
+    Plain dict holding entity id and loaded field values, returned by sessions in raw mode. Fields can also be
+    read as attributes.
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    __setattr__ = dict.__setitem__
+
+    # Read by reactors for every loaded field, so it does not go through __getattr__
+    @property
+    def id(self):
+        return self['id']
+
+
+class RawTarget(Target):
+    __slots__ = ()
+
+    def resolve_field(self, field_name, value):
+        self.weak = False
+        self.entity[field_name] = value
+        self.pending &= ~self.entity_class.fields.bits[field_name]
+
+    def resolve_fields(self, field_selector, values):
+        self.weak = False
+        entity = self.entity
+        for field_name in field_selector:
+            entity[field_name] = values[field_name]
+        self.pending &= ~self.entity_class.fields.get_mask(field_selector)
+
+
+class RawReactor(Reactor):
+    """
+    Reactor which builds RawEntity dicts instead of Entity objects. Planning and batching of method calls are the
+    same as in Reactor, but entities loaded entirely from a response (e.g. nested ones) get no targets.
+    """
+
+    target_class = RawTarget
+
+    def __init__(self, session):
+        super(RawReactor, self).__init__(session)
+        # Raw entities are not indexed, as the index relies on Entity API
+        self._index = None
+
+    def make_entity(self, entity_class, id, field_selector):
+        entity = RawEntity()
+        entity['id'] = id
+        return entity
+
+    def spawn_entity(self, entity_class, id, field_selector, values=None, weak=False):
+        if values is None or not values.viewkeys() >= field_selector.viewkeys():
+            return super(RawReactor, self).spawn_entity(entity_class, id, field_selector, values, weak)
+        entity = RawEntity((field_name, values[field_name]) for field_name in field_selector)
+        entity['id'] = id
+        self._cache_fields(entity_class, id, field_selector, values)
+        return entity
+
+    def make_search_item(self, entity_class, entity, match):
+        return {'entity': entity, 'match': unicode(match)}
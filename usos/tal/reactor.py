@@ -1,52 +1,116 @@
+import collections
+import sys
+import threading
+import time
+import warnings
+
 from .methods import registry
-from ..client import ClientError
-from .factory.entities import BaseEntityField
+from ..client import ClientError, Timeout
+from .factory.entities import BaseEntityField, make_search_item, _setattr
+from .factory.methods import GetMethod
+from .stats import OperationStats, CallBudgetExceeded, NPlusOneWarning, NPlusOneError
+
+
+class DeadlineExceeded(Timeout):
+    """
+    Raised when an operation does not finish before its deadline.
+    """
 
 
 class Target(object):
-    def __init__(self, entity, field_selector, weak):
+    __slots__ = ('entity', 'entity_class', '_field_selector', 'weak', 'pending')
+
+    def __init__(self, entity, entity_class, field_selector, weak):
         self.entity = entity
+        self.entity_class = entity_class
         self._field_selector = field_selector
         self.weak = weak
-        self.field_names = set(self._field_selector.keys())
+        # Bitmask of fields still to be resolved
+        self.pending = entity_class.fields.get_mask(field_selector)
+
+    @property
+    def field_names(self):
+        return self.entity_class.fields.get_names(self.pending)
 
     def kill(self):
         if self.weak:
             self.entity.id = None
-            self.field_names.clear()
+            self.pending = 0
         else:
-            raise ClientError('Entity {0} with id {1} not found'.format(type(self.entity), self.entity.id))
+            raise ClientError('Entity {0} with id {1} not found'.format(self.entity_class, self.entity.id))
 
     def has_same_field_selector(self, other):
-        return self._field_selector is other._field_selector and self.field_names == other.field_names
+        # Field selectors are interned FieldSelectors, so equal selectors are identical
+        return self._field_selector is other._field_selector and self.pending == other.pending
 
     def get_subfield_selector(self, field_name):
         return self._field_selector[field_name]
 
-    def get_field_selector(self, field_names):
-        return {field_name: subfield_selector
-                for field_name, subfield_selector in self._field_selector.iteritems()
-                if field_name in field_names}
+    def get_field_selector(self, field_mask):
+        return self.entity_class.fields.select(self._field_selector, field_mask)
 
     def resolve_field(self, field_name, value):
         self.weak = False
         setattr(self.entity, field_name, value)
-        self.field_names.remove(field_name)
+        self.pending &= ~self.entity_class.fields.bits[field_name]
+
+    def resolve_fields(self, field_selector, values):
+        for field_name in field_selector:
+            self.resolve_field(field_name, values[field_name])
 
     def is_active(self):
         # TODO weak targets should always be active
-        return bool(self.field_names)
+        return bool(self.pending)
 
     def __repr__(self):
         return '<Target {0} {1}>'.format(self.entity, self.field_names)
 
 
+class EntityTarget(Target):
+    """
+    Target of an Entity object. Fields are set bypassing Entity.__setattr__, which is slow, being written in Python.
+    """
+
+    __slots__ = ()
+
+    def resolve_field(self, field_name, value):
+        self.weak = False
+        bit = self.entity_class.fields.bits[field_name]
+        entity = self.entity
+        _setattr(entity, field_name, value)
+        _setattr(entity, '_loaded_fields', entity._loaded_fields | bit)
+        self.pending &= ~bit
+
+    def resolve_fields(self, field_selector, values):
+        self.weak = False
+        mask = self.entity_class.fields.get_mask(field_selector)
+        entity = self.entity
+        for field_name in field_selector:
+            _setattr(entity, field_name, values[field_name])
+        _setattr(entity, '_loaded_fields', entity._loaded_fields | mask)
+        self.pending &= ~mask
+
+
 class Reactor(object):
+    # Class of targets of entities returned by make_entity(...)
+    target_class = EntityTarget
+
     def __init__(self, session):
         self._session = session
         self._prerequisites = []
-        self._targets = {}
+        # Ordered, so that planning (and so the number of calls) does not depend on hashes of entity classes
+        self._targets = collections.OrderedDict()
         self._values_cache = {}
+        self._index = session.index
+        self.immutable_values = session.immutable_values
+        self._strings = {} if session.string_pool is None else session.string_pool
+        self._spawned_indexed_entities = []
+        # Each reactor executes a single session operation
+        self.stats = session.last_operation = OperationStats()
+        # Time (as returned by time.time()) by which all method calls must finish
+        self.deadline = None
+        # If set, targets not resolved by the deadline are left with unloaded fields instead of failing
+        self.partial = False
 
     def __enter__(self):
         return self
@@ -59,8 +123,67 @@ class Reactor(object):
     def lang(self):
         return self._session.lang
 
+    def intern(self, s):
+        """
+        Returns the canonical copy of the string, so that equal ids and texts repeated across a response share
+        memory.
+        """
+        return self._strings.setdefault(s, s)
+
     def call_method(self, path, params):
-        return self._session.client.call_method(path, params)
+        timeout = None
+        if self.deadline is not None:
+            timeout = self.deadline - time.time()
+            if timeout <= 0:
+                raise DeadlineExceeded('Deadline exceeded before calling {0}'.format(path))
+
+        calls = self.stats.add_call(path)
+        call_budget = self._session.call_budget
+        if call_budget is not None and calls > call_budget:
+            raise CallBudgetExceeded('Operation exceeded budget of {0} calls, calling {1} with {2!r}'.format(
+                call_budget, path, params))
+        if timeout is None:
+            return self._session.client.call_method(path, params)
+
+        try:
+            response = self._session.client.call_method(path, params, timeout=timeout)
+        except Timeout as e:
+            if e.client_timeout:
+                raise
+            raise DeadlineExceeded('Deadline exceeded while calling {0}: {1}'.format(path, e))
+        # Clients need not enforce the timeout (e.g. when serving responses from a cache or a cassette)
+        if time.time() > self.deadline:
+            raise DeadlineExceeded('Deadline exceeded while calling {0}'.format(path))
+        return response
+
+    def call_methods(self, calls):
+        """
+        Calls all (path, params) pairs concurrently and returns responses in the same order. If any call fails,
+        the error of the first failed call is re-raised once all of them have finished.
+        """
+        if len(calls) <= 1:
+            return [self.call_method(path, params) for path, params in calls]
+
+        responses = [None] * len(calls)
+        errors = [None] * len(calls)
+
+        def do_call(i, path, params):
+            try:
+                responses[i] = self.call_method(path, params)
+            except Exception:
+                errors[i] = sys.exc_info()
+
+        threads = [threading.Thread(target=do_call, args=(i, path, params)) for i, (path, params) in enumerate(calls)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for error in errors:
+            if error is not None:
+                raise error[0], error[1], error[2]
+        return responses
 
     def spawn_list(self, entity_class, domain, field_selector):
         ret = []
@@ -88,65 +211,125 @@ class Reactor(object):
         self._prerequisites.append(do_search)
         return ret
 
-    def _resolve_and_cache_field(self, target, field_name, value):
-        entity_class = type(target.entity)
-        id = target.entity.id
-        field = entity_class.fields[field_name]
-        if isinstance(field, BaseEntityField):
-            self._values_cache.setdefault((entity_class, id), {})[field_name] = field.map(lambda e: e.id, value)
-        else:
-            subfield_selector = target.get_subfield_selector(field_name)
-            if not subfield_selector:  # subfield_selector == {}
-                self._values_cache.setdefault((entity_class, id), {})[field_name] = value
+    def spawn_search_all(self, entity_classes, query, field_selectors):
+        ret = {entity_class: [] for entity_class in entity_classes}
+
+        def do_search_all():
+            methods = []
+            for entity_class in entity_classes:
+                try:
+                    methods.append(registry.get_search_method_by_entity_class(entity_class))
+                except KeyError:
+                    raise ValueError('Could not find search method for {0}'.format(entity_class))
+
+            responses = self.call_methods([
+                (method.path, method.prep_params(self, query, field_selectors[method.entity_class]))
+                for method in methods
+            ])
+            for method, response in zip(methods, responses):
+                ret[method.entity_class].extend(
+                    method.load_search_items(self, response, field_selectors[method.entity_class]))
+
+        self._prerequisites.append(do_search_all)
+        return ret
 
-        target.resolve_field(field_name, value)
+    def make_search_item(self, entity_class, entity, match):
+        return make_search_item(entity_class, entity, match)
+
+    def _cache_fields(self, entity_class, id, field_selector, values):
+        fields = entity_class.fields
+        entity_field_names, value_field_names = fields.get_cacheable_names(field_selector)
+        if not entity_field_names and not value_field_names:
+            return
+        cached_values = self._values_cache.setdefault((entity_class, id), {})
+        for field_name in entity_field_names:
+            cached_values[field_name] = fields[field_name].map(lambda e: e.id, values[field_name])
+        for field_name in value_field_names:
+            cached_values[field_name] = values[field_name]
+
+    def _resolve_and_cache_fields(self, target, field_selector, values):
+        """
+        Resolves fields selected by field_selector (a subselector of the field selector of target) with values.
+        """
+        self._cache_fields(target.entity_class, target.entity.id, field_selector, values)
+        target.resolve_fields(field_selector, values)
+
+    def make_entity(self, entity_class, id, field_selector):
+        """
+        Creates object representing spawned entity. The object must support setting and reading the id with
+        setattr(...) and getattr(...); field values are set by target_class. Subclasses returning objects other
+        than Entity should set target_class to Target, which sets fields with setattr(...).
+        """
+        return entity_class(id=id)
 
     def spawn_entity(self, entity_class, id, field_selector, values=None, weak=False):
-        entity = entity_class(id=id)
-        target = Target(entity, field_selector, weak)
+        entity = self.make_entity(entity_class, id, field_selector)
+        if self._index is not None and self._index.accepts(entity_class):
+            self._spawned_indexed_entities.append(entity)
+        target = self.target_class(entity, entity_class, field_selector, weak)
         if values is not None:
-            for field_name in field_selector.iterkeys():
-                if field_name in values:
-                    self._resolve_and_cache_field(target, field_name, values[field_name])
+            if not values.viewkeys() >= field_selector.viewkeys():
+                field_selector = target.get_field_selector(entity_class.fields.get_mask(
+                    [field_name for field_name in field_selector.iterkeys() if field_name in values]))
+            self._resolve_and_cache_fields(target, field_selector, values)
         if target.is_active():
             self._targets.setdefault(entity_class, []).append(target)
         return entity
 
     def execute(self):
         prerequisites, self._prerequisites = self._prerequisites, None
-        for f in prerequisites:
-            f()
-
-        while self._targets:
-            self._execute_once()
-            self._resolve_fields_from_cache()
+        try:
+            for f in prerequisites:
+                f()
+
+            while self._targets:
+                self._execute_once()
+                self._resolve_fields_from_cache()
+        except DeadlineExceeded:
+            if not self.partial:
+                raise
+            self._abandon_targets()
 
         self._prerequisites = []
         self._values_cache = {}
 
+        # Partially loaded entities are not indexed
+        if self._index is not None and not self.stats.deadline_exceeded:
+            self._index.add_many(self._spawned_indexed_entities, self.lang)
+            self._spawned_indexed_entities = []
+
+    def _abandon_targets(self):
+        self.stats.deadline_exceeded = True
+        for entity_class, targets in self._targets.iteritems():
+            for target in targets:
+                self.stats.unresolved[(entity_class, target.entity.id)] = target.field_names
+        self._targets.clear()
+
     def _resolve_fields_from_cache(self):
         # TODO provide more efficient implementation that works with BaseEntityField subclasses
         for entity_class, targets in self._targets.items():
+            bits = entity_class.fields.bits
             new_targets = []
             for target in targets:
                 cached_values = self._values_cache.get((entity_class, target.entity.id))
                 if cached_values:
-                    for field_name in target.field_names.copy():
-                        if field_name in cached_values:
-                            field = entity_class.fields[field_name]
-                            subfield_selector = target.get_subfield_selector(field_name)
-                            if isinstance(field, BaseEntityField):
-                                pass
-                                # Won't work because new targets will be inserted :(
-                                # target.resolve_field(
-                                #     field_name,
-                                #     field.map(
-                                #         lambda id: self.spawn_entity(entity_class, id, subfield_selector),
-                                #         cached_values[field_name]
-                                #     )
-                                # )
-                            elif not subfield_selector:
-                                target.resolve_field(field_name, cached_values[field_name])
+                    for field_name, cached_value in cached_values.iteritems():
+                        if not target.pending & bits[field_name]:
+                            continue
+                        field = entity_class.fields[field_name]
+                        subfield_selector = target.get_subfield_selector(field_name)
+                        if isinstance(field, BaseEntityField):
+                            pass
+                            # Won't work because new targets will be inserted :(
+                            # target.resolve_field(
+                            #     field_name,
+                            #     field.map(
+                            #         lambda id: self.spawn_entity(entity_class, id, subfield_selector),
+                            #         cached_value
+                            #     )
+                            # )
+                        elif not subfield_selector:
+                            target.resolve_field(field_name, cached_value)
                 if target.is_active():
                     new_targets.append(target)
             if new_targets:
@@ -154,10 +337,8 @@ class Reactor(object):
             else:
                 del self._targets[entity_class]
 
-    def _execute_once(self):
+    def _find_best_candidacy(self, entity_class, available_targets):
         best_candidacy = None
-        entity_class, available_targets = next(self._targets.iteritems())
-
         for method in registry.get_getter_methods(entity_class):
             candidacy = method.make_candidacy(available_targets)
             if candidacy is not None and (best_candidacy is None or candidacy.score > best_candidacy.score):
@@ -165,7 +346,27 @@ class Reactor(object):
 
         if best_candidacy is None:
             raise ValueError('Could not find any method for targets {0}'.format(available_targets))
+        return best_candidacy
+
+    def _check_single_get(self, entity_class, candidacy):
+        get_many_method = registry.get_get_many_method(entity_class, candidacy.field_names)
+        if get_many_method is None:
+            return
+        count = self.stats.add_single_get_call(candidacy.method.path)
+        if count != self._session.n_plus_one_threshold:
+            return
+
+        message = '{0} calls of {1} loading single {2} entities, although {3} could load them at once'.format(
+            count, candidacy.method.path, entity_class.__name__, get_many_method.path)
+        if self._session.strict_calls:
+            raise NPlusOneError(message)
+        warnings.warn(message, NPlusOneWarning)
 
+    def _execute_once(self):
+        entity_class, available_targets = next(self._targets.iteritems())
+        best_candidacy = self._find_best_candidacy(entity_class, available_targets)
+        if isinstance(best_candidacy.method, GetMethod):
+            self._check_single_get(entity_class, best_candidacy)
         targets_values = best_candidacy.execute(self)
 
         for target in best_candidacy.targets:
@@ -173,8 +374,7 @@ class Reactor(object):
             if values is None:
                 target.kill()
             else:
-                for field_name in best_candidacy.field_names:
-                    self._resolve_and_cache_field(target, field_name, values[field_name])
+                self._resolve_and_cache_fields(target, best_candidacy.field_selector, values)
 
         # Caution: best_candidacy.execute(...) may have spawned new entities
         available_targets = filter(Target.is_active, self._targets[entity_class])
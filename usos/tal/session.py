@@ -1,7 +1,10 @@
 from .lang import DEFAULT_LANG
 from .reactor import Reactor
-from .fieldselector import parse as parse_field_selector
+from .table import TableReactor
+from .raw import RawReactor
+from .fieldselector import parse as parse_field_selector, freeze as freeze_field_selector
 from .entities import User
+from .methods import registry
 from .extras import get_current_user, now
 
 
@@ -10,6 +13,8 @@ def _prep_fields(fields, entity_class):
         fields = entity_class.get_default_field_selector()
     elif isinstance(fields, basestring):
         fields = parse_field_selector(fields, entity_class)
+    else:
+        fields = freeze_field_selector(fields)
     return fields
 
 
@@ -21,34 +26,157 @@ class Session(object):
     def __init__(self, client):
         self.client = client
         self.lang = DEFAULT_LANG
+        # Optional usos.tal.index.LocalIndex instance
+        self.index = None
+        # If set, values shared between entities (e.g. mapped constants) are not copied and lists are returned
+        # as tuples, so they must not be modified. By default values are mutable: lists stay lists and each
+        # entity gets its own copy of mapped values.
+        self.immutable_values = False
+        # Dict used for interning ids and repeated texts. By default each operation uses its own pool; set it to
+        # share strings between operations (the pool is never purged, so it should be bounded by the caller).
+        self.string_pool = None
+        # usos.tal.stats.OperationStats of the most recent operation
+        self.last_operation = None
+        # Maximum number of method calls per operation; exceeding it raises usos.tal.stats.CallBudgetExceeded
+        self.call_budget = None
+        # Number of single-entity get calls (where a get-many method could be used) per operation that triggers
+        # NPlusOneWarning, or NPlusOneError if strict_calls is set
+        self.n_plus_one_threshold = 3
+        self.strict_calls = False
 
-    def _make_reactor(self):
-        return Reactor(self)
+    def _make_reactor(self, raw=False):
+        return RawReactor(self) if raw else Reactor(self)
 
-    def get(self, entity_class, id, fields=None):
-        with self._make_reactor() as reactor:
+    def _prep_reactor(self, raw, deadline, partial):
+        reactor = self._make_reactor(raw)
+        reactor.deadline = deadline
+        reactor.partial = partial
+        return reactor
+
+    def get(self, entity_class, id, fields=None, raw=False, deadline=None, partial=False):
+        """
+        Loads entity with given id. If raw is set, the entity (and all entities it refers to) is returned as
+        usos.tal.raw.RawEntity dict instead of Entity object; the same applies to get_many, list and search.
+
+        If deadline (time as returned by time.time()) is given, all method calls must finish by then, otherwise
+        DeadlineExceeded is raised. If partial is set as well, entities are returned with fields loaded in time;
+        fields left unloaded are reported in last_operation.unresolved. The same applies to get_many, list, search
+        and search_all (they return no entities if the list or search call itself does not finish in time).
+        """
+        with self._prep_reactor(raw, deadline, partial) as reactor:
             entity = reactor.spawn_entity(entity_class, id, _prep_fields(fields, entity_class), weak=True)
         if entity.id is None:
             raise EntityNotFound
         return entity
 
-    def get_many(self, entity_class, ids, fields=None):
-        with self._make_reactor() as reactor:
-            entities = {id: reactor.spawn_entity(entity_class, id, _prep_fields(fields, entity_class), weak=True)
-                        for id in ids}
+    def get_many(self, entity_class, ids, fields=None, raw=False, deadline=None, partial=False):
+        field_selector = _prep_fields(fields, entity_class)
+        with self._prep_reactor(raw, deadline, partial) as reactor:
+            entities = {id: reactor.spawn_entity(entity_class, id, field_selector, weak=True) for id in ids}
         for id in entities.keys():
             if entities[id].id is None:
                 del entities[id]
         return entities
 
-    def search(self, entity_class, query, fields=None):
+    def iter_get_many(self, entity_class, ids, fields=None, chunk_size=100):
+        """
+        Yields entities with given ids, loading them in chunks of chunk_size ids, each chunk by a separate reactor.
+        Entities that were not found are skipped. Suitable for streaming large amounts of entities, e.g. to
+        usos.tal.export exporters.
+        """
+        field_selector = _prep_fields(fields, entity_class)
+        chunk = []
+        for id in ids:
+            chunk.append(id)
+            if len(chunk) >= chunk_size:
+                for entity in self._get_chunk(entity_class, chunk, field_selector):
+                    yield entity
+                chunk = []
+        if chunk:
+            for entity in self._get_chunk(entity_class, chunk, field_selector):
+                yield entity
+
+    def iter_list(self, entity_class, domain, fields=None, chunk_size=100):
+        """
+        Same as list(...), but yields listed entities loaded in chunks of chunk_size entities, like
+        iter_get_many(...). The list method is called once; fields it does not return (e.g. fields of nested
+        entities) are loaded separately for each chunk.
+        """
+        field_selector = _prep_fields(fields, entity_class)
+        try:
+            method = registry.get_list_method(entity_class, domain)
+        except KeyError:
+            raise ValueError('Could not find list method for {0} and domain {1}'.format(entity_class, domain))
         with self._make_reactor() as reactor:
-            return reactor.spawn_search(entity_class, query, _prep_fields(fields, entity_class))
+            entity_dicts = method.call(reactor, field_selector)
 
-    def list(self, entity_class, domain, fields=None):
+        for start in xrange(0, len(entity_dicts), chunk_size):
+            with self._make_reactor() as reactor:
+                entities = [method.load_entity(reactor, entity_dict, field_selector)
+                            for entity_dict in entity_dicts[start:start + chunk_size]]
+            for entity in entities:
+                if entity.id is not None:
+                    yield entity
+
+    def _get_chunk(self, entity_class, ids, field_selector):
         with self._make_reactor() as reactor:
+            entities = [reactor.spawn_entity(entity_class, id, field_selector, weak=True) for id in ids]
+        return [entity for entity in entities if entity.id is not None]
+
+    def search(self, entity_class, query, fields=None, raw=False, deadline=None, partial=False):
+        if self.index is not None and self.index.is_authoritative(entity_class, self.lang):
+            return self._search_index(entity_class, query, _prep_fields(fields, entity_class), raw, deadline, partial)
+        with self._prep_reactor(raw, deadline, partial) as reactor:
+            return reactor.spawn_search(entity_class, query, _prep_fields(fields, entity_class))
+
+    def _search_index(self, entity_class, query, field_selector, raw, deadline, partial):
+        page_size = registry.get_search_method_by_entity_class(entity_class).page_size
+        ret = []
+        with self._prep_reactor(raw, deadline, partial) as reactor:
+            for id, values, match in self.index.search(entity_class, query, self.lang, page_size):
+                entity = reactor.spawn_entity(entity_class, id, field_selector, values)
+                ret.append(reactor.make_search_item(entity_class, entity, match))
+        return ret
+
+    def search_all(self, query, entity_classes=None, fields=None, deadline=None, partial=False):
+        """
+        Searches all given entity classes (all searchable ones by default) at once. Search calls are dispatched
+        concurrently and found entities are loaded within a single reactor execution, so that they are fetched
+        in batches. ``fields`` may map entity classes to their field selectors. deadline and partial work like in
+        get(...).
+
+        Returns a dict mapping entity classes to lists of search items.
+        """
+        if entity_classes is None:
+            entity_classes = registry.get_search_entity_classes()
+        fields = fields or {}
+        field_selectors = {entity_class: _prep_fields(fields.get(entity_class), entity_class)
+                           for entity_class in entity_classes}
+        with self._prep_reactor(False, deadline, partial) as reactor:
+            return reactor.spawn_search_all(entity_classes, query, field_selectors)
+
+    def list(self, entity_class, domain, fields=None, raw=False, deadline=None, partial=False):
+        with self._prep_reactor(raw, deadline, partial) as reactor:
             return reactor.spawn_list(entity_class, domain, _prep_fields(fields, entity_class))
 
+    def get_many_table(self, entity_class, ids, fields=None):
+        """
+        Same as get_many(...), but returns EntityTable with found entities, in the order of ids.
+        """
+        field_selector = _prep_fields(fields, entity_class)
+        with TableReactor(self) as reactor:
+            row_refs = [reactor.spawn_entity(entity_class, id, field_selector, weak=True) for id in ids]
+        return reactor.make_table(entity_class, field_selector, row_refs)
+
+    def list_table(self, entity_class, domain, fields=None):
+        """
+        Same as list(...), but returns EntityTable.
+        """
+        field_selector = _prep_fields(fields, entity_class)
+        with TableReactor(self) as reactor:
+            row_refs = reactor.spawn_list(entity_class, domain, field_selector)
+        return reactor.make_table(entity_class, field_selector, row_refs)
+
     def get_current_user(self, fields=None):
         with self._make_reactor() as reactor:
             return get_current_user(reactor, _prep_fields(fields, User))
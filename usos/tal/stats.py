@@ -0,0 +1,57 @@
+import threading
+
+
+class CallBudgetExceeded(Exception):
+    """
+    Raised when an operation makes more method calls than allowed by Session.call_budget.
+    """
+
+
+class NPlusOneWarning(UserWarning):
+    """
+    Issued when an operation loads entities one by one, although they could be loaded in batches.
+    """
+
+
+class NPlusOneError(Exception):
+    """
+    Raised instead of NPlusOneWarning if Session.strict_calls is set.
+    """
+
+
+class OperationStats(object):
+    """
+    Method calls made by a single session operation (get, get_many, list, search etc.), available as
+    Session.last_operation.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.calls_by_path = {}
+        # Calls of single-entity get methods made although a get-many method could load the same fields
+        self.single_get_calls = {}
+        # Set if the deadline passed in partial mode; fields left unloaded are listed in unresolved, which maps
+        # (entity class, id) pairs to lists of field names
+        self.deadline_exceeded = False
+        self.unresolved = {}
+        self._lock = threading.Lock()
+
+    def add_call(self, path):
+        """
+        Returns number of calls made so far, including this one.
+        """
+        with self._lock:
+            self.calls += 1
+            self.calls_by_path[path] = self.calls_by_path.get(path, 0) + 1
+            return self.calls
+
+    def add_single_get_call(self, path):
+        """
+        Returns number of such calls of given method made so far, including this one.
+        """
+        with self._lock:
+            count = self.single_get_calls[path] = self.single_get_calls.get(path, 0) + 1
+            return count
+
+    def __repr__(self):
+        return '<OperationStats calls={0} calls_by_path={1}>'.format(self.calls, self.calls_by_path)
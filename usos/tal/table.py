@@ -0,0 +1,147 @@
+from .reactor import Reactor, Target
+from .factory.entities import BaseEntityField
+
+
+class EntityTable(object):
+    """
+    Columnar representation of entities of a single class, loaded with a single field selector.
+
+    Each selected field is stored as a list of values. Entity fields hold row indexes (or lists/dicts of row
+    indexes) into child tables, available as children[field_name]. Fields which could not be loaded are None.
+    """
+
+    def __init__(self, entity_class, field_selector):
+        self.entity_class = entity_class
+        self.field_selector = field_selector
+        self.ids = []
+        self.columns = {field_name: [] for field_name in field_selector}
+        self.children = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return '<EntityTable {0} rows={1} fields={2}>'.format(
+            self.entity_class.__name__, len(self.ids), sorted(self.columns))
+
+    def column(self, field_name):
+        return self.columns[field_name]
+
+    def append_row(self, id):
+        self.ids.append(id)
+        for column in self.columns.itervalues():
+            column.append(None)
+        return len(self.ids) - 1
+
+    def set_value(self, index, field_name, value):
+        if field_name == 'id':
+            self.ids[index] = value
+            return
+
+        field = self.entity_class.fields[field_name]
+        if isinstance(field, BaseEntityField):
+            if value is not None:
+                value = field.map(self._row_ref_to_index(field_name), value)
+        self.columns[field_name][index] = value
+
+    def _row_ref_to_index(self, field_name):
+        def f(row_ref):
+            # Indexes are meaningful only if all rows of the field refer to the same child table
+            child_table = self.children.setdefault(field_name, row_ref.table)
+            if child_table is not row_ref.table:
+                raise ValueError('Rows of field {0} refer to different tables'.format(field_name))
+            return row_ref.index
+        return f
+
+    def take(self, indexes):
+        """
+        Returns a new table consisting of given rows. Child tables are shared.
+        """
+        table = EntityTable(self.entity_class, self.field_selector)
+        table.ids = [self.ids[i] for i in indexes]
+        table.columns = {field_name: [column[i] for i in indexes] for field_name, column in self.columns.iteritems()}
+        table.children = self.children
+        return table
+
+    def filter(self, field_name, predicate):
+        column = self.ids if field_name == 'id' else self.columns[field_name]
+        return self.take([i for i, value in enumerate(column) if predicate(value)])
+
+    def sort(self, field_name, reverse=False):
+        """
+        Returns a new table sorted by the given field (e.g. order_key). None values go last.
+        """
+        column = self.ids if field_name == 'id' else self.columns[field_name]
+        indexes = sorted(xrange(len(column)), key=lambda i: (column[i] is None, column[i]), reverse=reverse)
+        return self.take(indexes)
+
+    def get_row(self, index):
+        """
+        Returns row as a dict, with entity fields converted to nested dicts.
+        """
+        row = {'id': self.ids[index]}
+        for field_name, column in self.columns.iteritems():
+            value = column[index]
+            child_table = self.children.get(field_name)
+            if child_table is not None and value is not None:
+                value = self.entity_class.fields[field_name].map(child_table.get_row, value)
+            row[field_name] = value
+        return row
+
+    def iter_rows(self):
+        for index in xrange(len(self.ids)):
+            yield self.get_row(index)
+
+    def to_columns(self):
+        ret = {'id': self.ids}
+        ret.update(self.columns)
+        return ret
+
+
+class RowRef(object):
+    """
+    Stands for an entity in TableReactor. Setting attributes stores values in the table.
+    """
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        object.__setattr__(self, 'table', table)
+        object.__setattr__(self, 'index', index)
+
+    @property
+    def id(self):
+        return self.table.ids[self.index]
+
+    def __setattr__(self, name, value):
+        self.table.set_value(self.index, name, value)
+
+
+class TableReactor(Reactor):
+    """
+    Reactor which stores loaded entities in EntityTables instead of creating Entity objects.
+    """
+
+    target_class = Target
+
+    def __init__(self, session):
+        super(TableReactor, self).__init__(session)
+        # Tables are keyed by field selector identity, so they keep their selectors alive
+        self._tables = {}
+
+    def get_table(self, entity_class, field_selector):
+        key = entity_class, id(field_selector)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = EntityTable(entity_class, field_selector)
+        return table
+
+    def make_entity(self, entity_class, id, field_selector):
+        table = self.get_table(entity_class, field_selector)
+        return RowRef(table, table.append_row(id))
+
+    def make_table(self, entity_class, field_selector, row_refs):
+        """
+        Makes table consisting of given rows only, skipping entities that were not found.
+        """
+        table = self.get_table(entity_class, field_selector)
+        return table.take([row_ref.index for row_ref in row_refs if row_ref.id is not None])
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+import unicodedata
+
+from .matchstring import MatchString
+
+_word_re = re.compile(r'\w+', flags=re.UNICODE)
+
+# Letters without canonical decomposition
+_special_folds = {
+    'ł': 'l',
+    'đ': 'd',
+    'ø': 'o',
+}
+
+
+def _fold_char(c):
+    c = c.lower()
+    folded = _special_folds.get(c)
+    if folded is None:
+        folded = unicodedata.normalize('NFD', c)[0]
+    return folded
+
+
+def fold(s):
+    """
+    Lowercases the string and strips diacritics. The result has the same length as the source string, so
+    positions in both strings correspond to each other.
+    """
+    if not isinstance(s, unicode):
+        s = unicode(s)
+    return ''.join(_fold_char(c) for c in s)
+
+
+def split_words(s):
+    """
+    Returns (start, folded word) pairs for all words in the string.
+    """
+    return [(match.start(), match.group(0)) for match in _word_re.finditer(fold(s))]
+
+
+def split_query(query):
+    return [word for _, word in split_words(query)]
+
+
+def matches(query_words, text):
+    """
+    Checks whether every query word is a prefix of some word in the text.
+    """
+    text_words = [word for _, word in split_words(text)]
+    return all(any(text_word.startswith(query_word) for text_word in text_words) for query_word in query_words)
+
+
+def make_match_string(text, query_words):
+    """
+    Makes MatchString out of plain text, highlighting word prefixes matched by query words.
+    """
+    parts = []
+    pos = 0
+    for start, word in split_words(text):
+        length = max([len(query_word) for query_word in query_words if word.startswith(query_word)] or [0])
+        if length:
+            parts.append(text[pos:start])
+            parts.append(text[start:start + length])
+            pos = start + length
+    parts.append(text[pos:])
+    return MatchString(parts)
+
+
+def get_plain_text(match_string):
+    return ''.join(part for part, _ in match_string)
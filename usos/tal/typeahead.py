@@ -0,0 +1,152 @@
+import threading
+
+from .methods import registry
+from .textsearch import split_query, matches, make_match_string, get_plain_text
+from .factory.entities import make_search_item
+from ..utils.cache import LRUCache
+
+
+class TypeaheadStats(object):
+    def __init__(self):
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+    @property
+    def requests(self):
+        return self.hits + self.prefix_hits + self.misses
+
+    @property
+    def hit_rate(self):
+        requests = self.requests
+        return float(self.hits + self.prefix_hits) / requests if requests else 0.0
+
+    def __repr__(self):
+        return '<TypeaheadStats hits={0} prefix_hits={1} misses={2} dropped={3}>'.format(
+            self.hits, self.prefix_hits, self.misses, self.dropped)
+
+
+class _CacheEntry(object):
+    def __init__(self, items, complete):
+        self.items = items
+        # True if the search returned all matching items, i.e. there were fewer of them than page size
+        self.complete = complete
+
+
+def _normalize_query(query):
+    # Only case is normalized: USOS API may return different results for queries with and without diacritics
+    return ' '.join(query.lower().split())
+
+
+class TypeaheadSearch(object):
+    """
+    Search front-end for autocomplete widgets.
+
+    Results are cached by (entity class, lang, query). If a shorter query returned fewer items than the page
+    size, results of longer queries are computed by filtering cached items locally. Queries submitted through
+    submit(...) are coalesced, so that only the latest query issued within the coalescing window is executed
+    and responses for superseded queries are dropped.
+    """
+
+    def __init__(self, session, fields=None, cache_size=256, coalesce_window=0.15):
+        self.session = session
+        self.fields = fields or {}
+        self.coalesce_window = coalesce_window
+        self.stats = TypeaheadStats()
+        self._cache = LRUCache(cache_size)
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._timers = {}
+
+    def search(self, entity_class, query):
+        normalized_query = _normalize_query(query)
+        key = (entity_class, self.session.lang, normalized_query)
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._count_request('hits')
+            return list(entry.items)
+
+        entry = self._find_complete_prefix_entry(entity_class, normalized_query)
+        if entry is not None:
+            self._count_request('prefix_hits')
+            entry = _CacheEntry(self._filter_items(entity_class, entry.items, query), True)
+        else:
+            self._count_request('misses')
+            items = self.session.search(entity_class, query, self.fields.get(entity_class))
+            page_size = registry.get_search_method_by_entity_class(entity_class).page_size
+            # Items are filtered by their match strings, so entries with items lacking them are never reused
+            entry = _CacheEntry(items, len(items) < page_size and all(item.is_loaded('match') for item in items))
+
+        self._cache[key] = entry
+        return list(entry.items)
+
+    def submit(self, entity_class, query, callback, errback=None):
+        """
+        Schedules a search. callback(query, items) is called from a background thread unless another query for
+        the same entity class is submitted in the meantime.
+        """
+        with self._lock:
+            generation = self._generations.get(entity_class, 0) + 1
+            self._generations[entity_class] = generation
+            timer = self._timers.pop(entity_class, None)
+            if timer is not None:
+                timer.cancel()
+                self.stats.dropped += 1
+
+            timer = threading.Timer(
+                self.coalesce_window, self._run_submitted, (entity_class, query, callback, errback, generation))
+            timer.daemon = True
+            self._timers[entity_class] = timer
+            timer.start()
+
+    def clear(self):
+        self._cache.clear()
+
+    def _count_request(self, counter):
+        # Searches run in Timer threads as well
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+    def _is_superseded(self, entity_class, generation):
+        return self._generations.get(entity_class) != generation
+
+    def _run_submitted(self, entity_class, query, callback, errback, generation):
+        with self._lock:
+            if self._timers.get(entity_class) is threading.current_thread():
+                del self._timers[entity_class]
+
+        try:
+            items = self.search(entity_class, query)
+        except Exception as e:
+            if errback is None:
+                raise
+            with self._lock:
+                superseded = self._is_superseded(entity_class, generation)
+            if not superseded:
+                errback(query, e)
+            return
+
+        with self._lock:
+            if self._is_superseded(entity_class, generation):
+                self.stats.dropped += 1
+                return
+        callback(query, items)
+
+    def _find_complete_prefix_entry(self, entity_class, normalized_query):
+        lang = self.session.lang
+        for length in xrange(len(normalized_query) - 1, 0, -1):
+            entry = self._cache.peek((entity_class, lang, normalized_query[:length]))
+            if entry is not None and entry.complete:
+                return entry
+        return None
+
+    def _filter_items(self, entity_class, items, query):
+        query_words = split_query(query)
+        ret = []
+        for item in items:
+            text = get_plain_text(item.match)
+            if matches(query_words, text):
+                ret.append(make_search_item(entity_class, item.entity, make_match_string(text, query_words)))
+        return ret
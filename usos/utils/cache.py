@@ -0,0 +1,93 @@
+import functools
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            self._items[key] = value
+            return value
+
+    def peek(self, key, default=None):
+        """
+        Same as get(...), but does not mark the key as recently used.
+        """
+        with self._lock:
+            return self._items.get(key, default)
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class IdentityCache(object):
+    """
+    Bounded cache keyed by object identity, for values derived from unhashable objects (e.g. field selectors).
+    Each entry holds a reference to its key object, so that its id cannot be reused while the entry exists.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._items = {}
+
+    def get(self, key):
+        entry = self._items.get(id(key))
+        if entry is not None and entry[0] is key:
+            return entry[1]
+        return None
+
+    def set(self, key, value):
+        if len(self._items) >= self.maxsize:
+            self._items.clear()
+        self._items[id(key)] = (key, value)
+
+
+def memoize(maxsize):
+    """
+    Memoizes results of a single-argument function. Once the cache is full, it is cleared, which is much cheaper
+    than maintaining LRU order and works well for heavily repeated values.
+    """
+    def decorator(func):
+        cache = {}
+
+        @functools.wraps(func)
+        def wrapper(arg):
+            try:
+                return cache[arg]
+            except KeyError:
+                pass
+            value = func(arg)
+            if len(cache) >= maxsize:
+                cache.clear()
+            cache[arg] = value
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,2 @@
+# Benchmarks. Each module can be run directly, e.g.:
+#   python -m usosbench.matchstring
@@ -0,0 +1,36 @@
+import datetime
+import re
+
+from usos.tal.factory.methods import load_date, load_datetime, _parse_date, _parse_datetime
+from .toolbox.timing import measure, report
+
+VALUES = 1000
+DATETIMES = ['2016-{0:02d}-{1:02d} 12:{2:02d}:00'.format(i % 12 + 1, i % 28 + 1, i % 60) for i in xrange(VALUES)]
+DATES = ['2016-{0:02d}-{1:02d}'.format(i % 12 + 1, i % 28 + 1) for i in xrange(VALUES)]
+
+_date_re = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+
+
+def _load_date_regex(value):
+    # DatePicker implementation before the fast parser was introduced
+    match = _date_re.match(value)
+    return datetime.date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+
+def _load_datetime_strptime(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+
+def main():
+    for name, values, baseline, parse, optimized in (
+            ('datetime', DATETIMES, _load_datetime_strptime, _parse_datetime, load_datetime),
+            ('date', DATES, _load_date_regex, _parse_date, load_date)):
+        baseline_time = measure(lambda: map(baseline, values), number=20)
+        report('{0}, {1} values, no memo'.format(name, VALUES), baseline_time,
+               measure(lambda: map(parse, values), number=20))
+        report('{0}, {1} values, memoized'.format(name, VALUES), baseline_time,
+               measure(lambda: map(optimized, values), number=20))
+
+
+if __name__ == '__main__':
+    main()
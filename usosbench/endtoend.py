@@ -0,0 +1,196 @@
+"""
+End-to-end benchmarks running representative workloads against a local stand-in server
+(see usosbench.toolbox.server), e.g.:
+
+    python -m usosbench.endtoend run -o before.json
+    python -m usosbench.endtoend run -o after.json --latency 0.005
+    python -m usosbench.endtoend compare before.json after.json
+
+Each operation uses a fresh Session, so nothing is cached between operations. Peak RSS is measured for the whole
+process, which also hosts the server.
+"""
+
+import argparse
+import json
+import platform
+import random
+import resource
+import sys
+import threading
+import timeit
+
+from usos.tal import Session, User, CourseEdition, CourseGroup, CourseTestNode
+from usostest.toolbox.testcase import BaseClient
+from .toolbox.dataset import Dataset
+from .toolbox.server import StandInServer
+from .toolbox.timing import format_time, percentile
+
+
+class _CountingClient(BaseClient):
+    def __init__(self, client):
+        super(_CountingClient, self).__init__(self._call_method)
+        self._client = client
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _call_method(self, path, params=None, mode=None, timeout=None):
+        with self._lock:
+            self.calls += 1
+        return self._client.call_method(path, params, mode, timeout)
+
+
+def _get_users(session, rng, size):
+    ids = rng.sample(xrange(1, size + 1), min(1000, size))
+    session.get_many(User, [str(id) for id in ids], 'first_name|last_name|sex|room')
+
+
+def _get_course_edition(session, rng, size):
+    id = '{0}|{1}'.format(rng.randint(1, size), rng.randint(1, size))
+    session.get(CourseEdition, id, 'participants|lecturers[room]')
+
+
+def _list_groups(session, rng, size):
+    session.list(CourseGroup, 'student', 'course_unit[course_edition]|group_number|participants|lecturers')
+
+
+def _get_test_tree(session, rng, size):
+    session.get(CourseTestNode, str(rng.randint(1, size)), 'name|type|subnodes*')
+
+
+def _search_users(session, rng, size):
+    session.search(User, rng.choice(['kow', 'nowak', 'jan', 'anna']), 'first_name|last_name|room')
+
+
+WORKLOADS = [
+    ('users_get_many_1k', _get_users),
+    ('course_edition', _get_course_edition),
+    ('group_lists', _list_groups),
+    ('test_tree', _get_test_tree),
+    ('search', _search_users),
+]
+
+
+def _get_peak_rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def run_workload(client, workload, operations, size, seed=0):
+    counting_client = _CountingClient(client)
+    rng = random.Random(seed)
+    timer = timeit.default_timer
+    latencies = []
+
+    start = timer()
+    for _ in xrange(operations):
+        op_start = timer()
+        workload(Session(counting_client), rng, size)
+        latencies.append(timer() - op_start)
+    elapsed = timer() - start
+
+    latencies.sort()
+    return dict(
+        operations=operations,
+        seconds=elapsed,
+        operations_per_second=operations / elapsed,
+        requests_per_second=counting_client.calls / elapsed,
+        calls_per_operation=float(counting_client.calls) / operations,
+        latency=dict(
+            mean=sum(latencies) / operations,
+            p50=percentile(latencies, 50),
+            p95=percentile(latencies, 95),
+            p99=percentile(latencies, 99),
+        ),
+        peak_rss_kb=_get_peak_rss_kb(),
+    )
+
+
+def run(args):
+    dataset = Dataset(size=args.size, list_size=args.list_size, max_depth=args.max_depth)
+    workloads = [(name, workload) for name, workload in WORKLOADS if not args.workload or name in args.workload]
+    results = dict(
+        meta=dict(
+            python=platform.python_version(),
+            platform=platform.platform(),
+            operations=args.operations,
+            size=args.size,
+            list_size=args.list_size,
+            max_depth=args.max_depth,
+            latency=args.latency,
+            jitter=args.jitter,
+        ),
+        workloads={},
+    )
+
+    with StandInServer(dataset, latency=args.latency, jitter=args.jitter, seed=0) as server:
+        client = server.make_client()
+        for name, workload in workloads:
+            result = run_workload(client, workload, args.operations, args.size)
+            results['workloads'][name] = result
+            print '{0:<20} {1:>8.1f} op/s {2:>8.1f} req/s  p50 {3:>10}  p95 {4:>10}  p99 {5:>10}  ' \
+                  '{6:>6.1f} calls/op  {7} KB'.format(
+                      name, result['operations_per_second'], result['requests_per_second'],
+                      format_time(result['latency']['p50']), format_time(result['latency']['p95']),
+                      format_time(result['latency']['p99']), result['calls_per_operation'], result['peak_rss_kb'])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+_COMPARED_METRICS = [
+    ('operations_per_second', lambda r: r['operations_per_second'], '{0:.1f}'.format),
+    ('requests_per_second', lambda r: r['requests_per_second'], '{0:.1f}'.format),
+    ('latency_p50', lambda r: r['latency']['p50'], format_time),
+    ('latency_p95', lambda r: r['latency']['p95'], format_time),
+    ('latency_p99', lambda r: r['latency']['p99'], format_time),
+    ('calls_per_operation', lambda r: r['calls_per_operation'], '{0:.1f}'.format),
+    ('peak_rss_kb', lambda r: r['peak_rss_kb'], '{0} KB'.format),
+]
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)['workloads']
+    with open(args.candidate) as f:
+        candidate = json.load(f)['workloads']
+
+    for name in sorted(set(baseline) & set(candidate)):
+        print name
+        for metric, get, format in _COMPARED_METRICS:
+            old, new = get(baseline[name]), get(candidate[name])
+            change = '{0:+.1f}%'.format((new - old) * 100.0 / old) if old else 'n/a'
+            print '    {0:<24} {1:>12} -> {2:>12}  ({3})'.format(metric, format(old), format(new), change)
+    for name in sorted(set(baseline) ^ set(candidate)):
+        print '{0}: only in {1}'.format(name, args.baseline if name in baseline else args.candidate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs end-to-end benchmarks against local stand-in server')
+    subparsers = parser.add_subparsers()
+
+    run_parser = subparsers.add_parser('run', help='run workloads')
+    run_parser.add_argument('-o', '--output', help='JSON file to write results to')
+    run_parser.add_argument('-n', '--operations', type=int, default=50, help='operations per workload')
+    run_parser.add_argument('-w', '--workload', action='append', choices=[name for name, _ in WORKLOADS],
+                            help='workload to run (may be repeated, all by default)')
+    run_parser.add_argument('--size', type=int, default=2000, help='number of entities of each class')
+    run_parser.add_argument('--list-size', type=int, default=10, help='number of items in generated lists')
+    run_parser.add_argument('--max-depth', type=int, default=3,
+                            help='depth of generated recursive structures (trees have list-size ** max-depth leaves)')
+    run_parser.add_argument('--latency', type=float, default=0.0, help='server latency in seconds')
+    run_parser.add_argument('--jitter', type=float, default=0.0, help='maximum extra server latency in seconds')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import sys
+
+from usos.tal import User, CourseGroup
+from usos.tal.factory.entities import Entity
+from usos.tal.reactor import Target, EntityTarget
+from .toolbox.timing import measure, report
+
+COUNT = 100000
+
+
+class _DictEntity(object):
+    # Entity representation used before entities became slotted
+    def __init__(self, id, **kwargs):
+        self.id = id
+        for k, v in kwargs.iteritems():
+            setattr(self, k, v)
+
+
+class _DictTarget(object):
+    # Target representation used before pending fields became a bitmask
+    def __init__(self, entity, field_selector, weak):
+        self.entity = entity
+        self._field_selector = field_selector
+        self.weak = weak
+        self.field_names = set(self._field_selector.keys())
+
+
+def _size(obj):
+    size = sys.getsizeof(obj)
+    # Accessing __dict__ of entities would create it, and entities without extra attributes have none
+    if not isinstance(obj, Entity) and hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+        if isinstance(obj, _DictTarget):
+            size += sys.getsizeof(obj.field_names)
+    return size
+
+
+def _report_size(name, baseline, optimized):
+    print '{0:<48} {1:>12} -> {2:>12} bytes ({3:.2f}x)'.format(
+        name, baseline, optimized, float(baseline) / optimized)
+
+
+def main():
+    for name, entity_class, values in (
+            ('User', User, dict(first_name='Jan', last_name='Kowalski')),
+            ('CourseGroup', CourseGroup, dict(group_number=1, course_unit=None, lecturers=[], participants=[]))):
+        dict_entities = [_DictEntity(str(i), **values) for i in xrange(COUNT)]
+        entities = [entity_class(str(i), **values) for i in xrange(COUNT)]
+        dict_size = sum(_size(entity) for entity in dict_entities)
+        size = sum(_size(entity) for entity in entities)
+        _report_size('{0}, {1} objects'.format(name, COUNT), dict_size, size)
+        report(
+            '{0}, construction'.format(name),
+            measure(lambda: _DictEntity('1', **values), number=10000),
+            measure(lambda: entity_class('1', **values), number=10000),
+        )
+
+    field_selector = User.get_default_field_selector()
+    entity = User('1')
+
+    def resolve_fields(target_class):
+        target = target_class(User('1'), User, field_selector, False)
+        for field_name in field_selector:
+            target.resolve_field(field_name, 'x')
+
+    # Target sets fields with setattr(...), going through Entity.__setattr__
+    report(
+        'User, resolving {0} fields'.format(len(field_selector)),
+        measure(lambda: resolve_fields(Target), number=10000),
+        measure(lambda: resolve_fields(EntityTarget), number=10000),
+    )
+    _report_size(
+        'Target, {0} objects'.format(COUNT),
+        sum(_size(_DictTarget(entity, field_selector, False)) for _ in xrange(COUNT)),
+        sum(_size(Target(entity, User, field_selector, False)) for _ in xrange(COUNT)),
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+from usos.tal import User, CourseEdition
+from usos.tal.fieldselector import parse, _parse, stringify
+from usos.tal.methods import registry
+from .toolbox.timing import measure, report
+
+USER_FIELDS = 'first_name|last_name|sex|room[number|building[name]]|phone_numbers'
+COURSE_EDITION_FIELDS = 'course|participants|lecturers[first_name|last_name|room]'
+
+
+def _make_fields_param_uncached(method, field_selector):
+    # Done on every call before fields params were cached
+    api_field_selector = {}
+    method.field_pickers.update_field_selector(api_field_selector, field_selector)
+    return stringify(api_field_selector)
+
+
+def main():
+    for entity_class, fields in ((User, USER_FIELDS), (CourseEdition, COURSE_EDITION_FIELDS)):
+        report(
+            'parse, {0}'.format(entity_class.__name__),
+            measure(lambda: _parse(fields, entity_class), number=10000),
+            measure(lambda: parse(fields, entity_class), number=10000),
+        )
+
+        field_selector = parse(fields, entity_class)
+        method = max(registry.get_getter_methods(entity_class), key=lambda m: len(m.field_names))
+        report(
+            'fields param, {0}'.format(entity_class.__name__),
+            measure(lambda: _make_fields_param_uncached(method, field_selector), number=10000),
+            measure(lambda: method.get_fields_param(field_selector), number=10000),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import sys
+
+from usos.tal import Session, CourseGroup
+from usos.tal.factory.entities import Entity
+from usos.tal.reactor import Reactor
+from usostest.toolbox.testcase import BaseClient
+
+GROUPS = 200
+PARTICIPANTS_PER_GROUP = 100
+USERS = 2000
+
+
+def make_participant_response():
+    groups = []
+    for i in xrange(GROUPS):
+        course = i % 20
+        groups.append({
+            'course_unit_id': 1000 + i // 2,
+            'group_number': i % 2 + 1,
+            'course_id': 'COURSE-{0}'.format(course),
+            'course_name': {'pl': 'Przedmiot {0}'.format(course), 'en': 'Course {0}'.format(course)},
+            'term_id': '2016Z',
+            'class_type_id': 'CW',
+            'class_type': {'pl': 'Cwiczenia', 'en': 'Classes'},
+            'participants': [
+                {
+                    'id': str((i * PARTICIPANTS_PER_GROUP + j) % USERS),
+                    'first_name': 'First{0}'.format(j),
+                    'last_name': 'Last{0}'.format((i * PARTICIPANTS_PER_GROUP + j) % USERS),
+                }
+                for j in xrange(PARTICIPANTS_PER_GROUP)
+            ],
+        })
+    return {'groups': {'2016Z': groups}}
+
+
+def _call_method(path, params, **kwargs):
+    return make_participant_response()
+
+
+class _NonInterningReactor(Reactor):
+    def intern(self, s):
+        return s
+
+
+class _NonInterningSession(Session):
+    def _make_reactor(self, raw=False):
+        return _NonInterningReactor(self)
+
+
+def measure_strings(value):
+    """
+    Returns total size of distinct string objects reachable from the value.
+    """
+    seen = set()
+    stack = [value]
+    size = 0
+    while stack:
+        value = stack.pop()
+        if isinstance(value, basestring):
+            if id(value) not in seen:
+                seen.add(id(value))
+                size += sys.getsizeof(value)
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            stack.extend(value.itervalues())
+        elif isinstance(value, Entity):
+            stack.append(value.id)
+            stack.extend(getattr(value, field.name) for field in value.fields if value.is_loaded(field))
+    return size
+
+
+def main():
+    fields = 'course_unit[course_edition[course]|class_type]|group_number|participants'
+    for name, session_class in (('without interning', _NonInterningSession), ('with interning', Session)):
+        groups = session_class(BaseClient(_call_method)).list(CourseGroup, 'student', fields)
+        print '{0:<24} {1:>10} bytes in strings'.format(name, measure_strings(groups))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+from __future__ import unicode_literals
+
+from usos.tal.matchstring import MatchString, _split_re, _unescape
+from .toolbox.timing import measure, report
+
+SHORT_HTML = 'Jan <b>Kow</b>alski'
+LONG_HTML = ' '.join('Word &amp; <b>wo</b>rd' for _ in xrange(200))
+
+
+def _from_html_eager(s):
+    # Parser used before MatchString became lazy
+    parts = ['']
+    for normal, highlighted, invalid in _split_re.findall(s):
+        if normal:
+            parts[-1] += _unescape(normal)
+        elif highlighted:
+            parts.append(_unescape(highlighted))
+            parts.append('')
+        elif invalid:
+            raise ValueError('Invalid match string: {0}'.format(s))
+    return MatchString(parts)
+
+
+def main():
+    for name, html in (('short', SHORT_HTML), ('long', LONG_HTML)):
+        report(
+            'from_html, unused ({0})'.format(name),
+            measure(lambda: _from_html_eager(html)),
+            measure(lambda: MatchString.from_html(html)),
+        )
+        report(
+            'from_html + format ({0})'.format(name),
+            measure(lambda: _from_html_eager(html).format('<b>', '</b>')),
+            measure(lambda: MatchString.from_html(html).format('<b>', '</b>')),
+        )
+
+
+if __name__ == '__main__':
+    main()
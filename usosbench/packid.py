@@ -0,0 +1,55 @@
+import re
+
+from usos.tal.packid import pack_id, unpack_id
+from usos.tal.factory.methods import CompositeTupleIdList
+from .toolbox.timing import measure, report
+
+IDS = [('{0}'.format(1000 + i), str(i % 4 + 1)) for i in xrange(1000)]
+
+
+def _pack_id_old(id):
+    return '|'.join(part.replace('\\', '\\\\').replace('|', '\\|') for part in id)
+
+
+def _unpack_id_old(id, size=None):
+    fragments = re.split(r'\\(.)|\|', id, flags=re.DOTALL)
+    parts = [fragments[0]]
+    for i in xrange(1, len(fragments), 2):
+        sep = fragments[i]
+        if sep is None:
+            parts.append('')
+        elif sep == '|' or sep == '\\':
+            parts[-1] += sep
+        else:
+            raise ValueError('Invalid escape character: {0}'.format(sep))
+        parts[-1] += fragments[i + 1]
+
+    if size is not None and len(parts) != size:
+        raise ValueError('Invalid number of parts')
+    return tuple(parts)
+
+
+def main():
+    packed_ids = [pack_id(id) for id in IDS]
+    report(
+        'pack_id, {0} ids'.format(len(IDS)),
+        measure(lambda: [_pack_id_old(id) for id in IDS], number=100),
+        measure(lambda: [pack_id(id) for id in IDS], number=100),
+    )
+    report(
+        'unpack_id, {0} ids'.format(len(IDS)),
+        measure(lambda: [_unpack_id_old(id, 2) for id in packed_ids], number=100),
+        measure(lambda: [unpack_id(id, 2) for id in packed_ids], number=100),
+    )
+
+    id_list = CompositeTupleIdList('group_ids')
+    report(
+        'CompositeTupleIdList.get_key, {0} ids'.format(len(IDS)),
+        measure(lambda: ['({0})'.format(','.join(map(unicode, _unpack_id_old(id)))) for id in packed_ids],
+                number=100),
+        measure(lambda: [id_list.get_key(id) for id in packed_ids], number=100),
+    )
+
+
+if __name__ == '__main__':
+    main()
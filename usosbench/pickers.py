@@ -0,0 +1,122 @@
+import copy
+import gc
+
+from usos.tal import Session, User
+from usos.tal.methods import primary_user_field_pickers
+from usos.tal.factory.methods import FieldPickers, MappingPicker
+from usos.tal.fieldselector import parse as parse_field_selector
+from usos.tal.reactor import Reactor
+from usostest.toolbox.testcase import BaseClient
+from .toolbox.timing import measure, report
+
+ROWS = 10000
+FIELDS = 'first_name|last_name|sex|profile_url|homepage_url|phone_numbers|mobile_numbers'
+
+
+def _unexpected_call(path, params, **kwargs):
+    raise AssertionError('Unexpected method call: {0}'.format(path))
+
+
+def make_user_rows(count):
+    return [
+        {
+            'id': str(i),
+            'first_name': 'First{0}'.format(i % 100),
+            'last_name': 'Last{0}'.format(i % 1000),
+            'sex': 'MF'[i % 2],
+            'profile_url': 'https://usosweb.example.com/kontroler.php?os_id={0}'.format(i),
+            'homepage_url': '',
+            'phone_numbers': None,
+            'mobile_numbers': [],
+        }
+        for i in xrange(count)
+    ]
+
+
+def _load_values_uncompiled(field_pickers, reactor, response, field_selector):
+    # Per-row loop used before loaders were compiled
+    values = {}
+    for field_name, subfield_selector in field_selector.iteritems():
+        picker = field_pickers.get(field_name)
+        if picker is not None:
+            values[field_name] = picker.load_value(reactor, response, subfield_selector)
+    return values
+
+
+class _DeepCopyMappingPicker(MappingPicker):
+    # MappingPicker as it was before mapped values were shared
+    def prep_value(self, reactor, value, subfield_selector):
+        if self.open:
+            try:
+                value = self.mapping.get(value, value)
+            except TypeError:
+                pass
+            return copy.deepcopy(value)
+        else:
+            return copy.deepcopy(self.mapping[value])
+
+
+def _make_mapping_field_pickers(picker_class):
+    field_pickers = FieldPickers(
+        sex=picker_class('sex', dict(M='male', F='female')),
+        phone_numbers=picker_class('phone_numbers', {None: []}, open=True),
+    )
+    field_pickers.bind_to_entity_class(User)
+    return field_pickers
+
+
+def _count_allocated_objects(func):
+    gc.collect()
+    before = len(gc.get_objects())
+    result = func()
+    gc.collect()
+    after = len(gc.get_objects())
+    del result
+    return after - before
+
+
+def bench_load_values(reactor, rows):
+    field_selector = parse_field_selector(FIELDS, User)
+    field_pickers = primary_user_field_pickers
+
+    report(
+        'load_values, {0} users'.format(ROWS),
+        measure(lambda: [_load_values_uncompiled(field_pickers, reactor, row, field_selector) for row in rows],
+                number=5),
+        measure(lambda: [field_pickers.load_values(reactor, row, field_selector) for row in rows], number=5),
+    )
+
+
+def bench_mapping_pickers(reactor, rows):
+    field_selector = parse_field_selector('sex|phone_numbers', User)
+    deepcopy_field_pickers = _make_mapping_field_pickers(_DeepCopyMappingPicker)
+    field_pickers = _make_mapping_field_pickers(MappingPicker)
+
+    def load_deepcopy():
+        return [deepcopy_field_pickers.load_values(reactor, row, field_selector) for row in rows]
+
+    def load():
+        return [field_pickers.load_values(reactor, row, field_selector) for row in rows]
+
+    deepcopy_time = measure(load_deepcopy, number=5)
+    deepcopy_objects = _count_allocated_objects(load_deepcopy)
+    report('MappingPicker, {0} users'.format(ROWS), deepcopy_time, measure(load, number=5))
+    print '    gc-tracked objects: {0} -> {1}'.format(deepcopy_objects, _count_allocated_objects(load))
+
+    reactor.immutable_values = True
+    try:
+        report('MappingPicker, {0} users, immutable values'.format(ROWS), deepcopy_time, measure(load, number=5))
+        print '    gc-tracked objects: {0} -> {1}'.format(deepcopy_objects, _count_allocated_objects(load))
+    finally:
+        reactor.immutable_values = False
+
+
+def main():
+    reactor = Reactor(Session(BaseClient(_unexpected_call)))
+    rows = make_user_rows(ROWS)
+    bench_load_values(reactor, rows)
+    bench_mapping_pickers(reactor, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+from usos.tal import Session, User, CourseGroup
+from usos.tal.factory.entities import BaseEntityField
+from usostest.toolbox.testcase import BaseClient
+from .pickers import make_user_rows
+from .toolbox.dataset import Dataset
+from .toolbox.replay import DatasetClient
+from .toolbox.timing import measure, report
+
+USERS = 5000
+CHUNK_SIZE = 100
+FIELDS = 'first_name|last_name|sex|profile_url|homepage_url|phone_numbers|mobile_numbers'
+GROUPS = 100
+GROUP_FIELDS = 'group_number|lecturers[first_name|last_name]|participants[first_name|last_name]'
+
+
+def _make_client(rows):
+    rows = {row['id']: row for row in rows}
+
+    def call_method(path, params, **kwargs):
+        assert path == 'services/users/users', path
+        return {id: rows[id] for id in params['user_ids'].split('|')}
+
+    return BaseClient(call_method)
+
+
+def _to_dict(entity):
+    # What endpoints re-serializing entities to JSON had to do
+    ret = {'id': entity.id}
+    for field in type(entity).fields:
+        if entity.is_loaded(field):
+            value = getattr(entity, field.name)
+            if isinstance(field, BaseEntityField):
+                value = field.map(_to_dict, value)
+            ret[field.name] = value
+    return ret
+
+
+def main():
+    session = Session(_make_client(make_user_rows(USERS)))
+    session.immutable_values = True
+    ids = [str(i) for i in xrange(USERS)]
+    chunks = [ids[i:i + CHUNK_SIZE] for i in xrange(0, USERS, CHUNK_SIZE)]
+
+    def load_objects():
+        return [_to_dict(user) for chunk in chunks for user in session.get_many(User, chunk, FIELDS).itervalues()]
+
+    def load_raw():
+        return [user for chunk in chunks for user in session.get_many(User, chunk, FIELDS, raw=True).itervalues()]
+
+    def load_entities():
+        return [user for chunk in chunks for user in session.get_many(User, chunk, FIELDS).itervalues()]
+
+    assert sorted(load_objects()) == sorted(load_raw())
+    raw_time = measure(load_raw, number=3)
+    report('get_many, {0} users'.format(USERS), measure(load_entities, number=3), raw_time)
+    report(
+        'get_many + to dict, {0} users'.format(USERS),
+        measure(load_objects, number=3),
+        raw_time,
+    )
+
+    # Lecturers and participants are loaded from the same response, so raw entities get no targets
+    session = Session(DatasetClient(Dataset(size=GROUPS), decode=False))
+    group_ids = ['{0}|{1}'.format(i, j) for i in xrange(1, GROUPS // 5 + 1) for j in xrange(1, 6)]
+    report(
+        'get_many, {0} groups with nested users'.format(GROUPS),
+        measure(lambda: session.get_many(CourseGroup, group_ids, GROUP_FIELDS), number=10),
+        measure(lambda: session.get_many(CourseGroup, group_ids, GROUP_FIELDS, raw=True), number=10),
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Offline reactor benchmarks, breaking CPU time of usos.tal down per phase:
+
+    python -m usosbench.reactor
+    python -m usosbench.reactor --sizes 1000,10000,100000 -o reactor.json
+
+Responses are generated by usosbench.toolbox.dataset once, recorded as JSON and replayed by DatasetClient, so no
+network is involved. Phases:
+
+    planning        Reactor._find_best_candidacy(...), i.e. grouping targets and scoring methods
+    client          replaying responses, i.e. JSON decoding
+    construction    Reactor.spawn_entity(...), i.e. creating entities and setting their fields
+    cache           Reactor._resolve_fields_from_cache()
+    decoding        everything else, mostly field pickers turning responses into values
+"""
+
+import argparse
+import gc
+import json
+import timeit
+
+from usos.tal import Session, User, CourseEdition, CourseTestNode
+from usos.tal.reactor import Reactor
+from .toolbox.dataset import Dataset
+from .toolbox.replay import DatasetClient
+from .toolbox.timing import format_time
+
+_timer = timeit.default_timer
+
+PHASES = ['planning', 'client', 'construction', 'cache', 'decoding']
+
+
+class _PhaseTimingReactor(Reactor):
+    def __init__(self, session):
+        super(_PhaseTimingReactor, self).__init__(session)
+        self.times = session.times
+
+    def call_method(self, path, params):
+        start = _timer()
+        try:
+            return super(_PhaseTimingReactor, self).call_method(path, params)
+        finally:
+            self.times['client'] += _timer() - start
+
+    def spawn_entity(self, entity_class, id, field_selector, values=None, weak=False):
+        start = _timer()
+        try:
+            return super(_PhaseTimingReactor, self).spawn_entity(entity_class, id, field_selector, values, weak)
+        finally:
+            self.times['construction'] += _timer() - start
+
+    def _find_best_candidacy(self, entity_class, available_targets):
+        start = _timer()
+        try:
+            return super(_PhaseTimingReactor, self)._find_best_candidacy(entity_class, available_targets)
+        finally:
+            self.times['planning'] += _timer() - start
+
+    def _resolve_fields_from_cache(self):
+        start = _timer()
+        try:
+            return super(_PhaseTimingReactor, self)._resolve_fields_from_cache()
+        finally:
+            self.times['cache'] += _timer() - start
+
+
+class _PhaseTimingSession(Session):
+    def __init__(self, client):
+        super(_PhaseTimingSession, self).__init__(client)
+        self.times = dict.fromkeys(PHASES, 0.0)
+        # Stats of all operations, since every operation replaces last_operation
+        self.operations = []
+
+    def _make_reactor(self, raw=False):
+        reactor = _PhaseTimingReactor(self)
+        self.operations.append(reactor.stats)
+        return reactor
+
+    @property
+    def calls_by_path(self):
+        calls_by_path = {}
+        for stats in self.operations:
+            for path, calls in stats.calls_by_path.iteritems():
+                calls_by_path[path] = calls_by_path.get(path, 0) + calls
+        return calls_by_path
+
+
+def _get_users(session, size):
+    session.get_many(User, [str(i) for i in xrange(1, size + 1)],
+                     'first_name|last_name|sex|phone_numbers|room[number|building[name|location]]')
+
+
+def _get_course_editions(session, size):
+    ids = ['{0}|{1}'.format(i, i % 7 + 1) for i in xrange(1, size // 20 + 1)]
+    session.get_many(CourseEdition, ids, 'course[name|faculty[name]]|term|participants[room]|lecturers[room]')
+
+
+def _get_test_tree(session, size):
+    session.get(CourseTestNode, '1', 'name|type|order_key|subnodes*')
+
+
+# Workloads with datasets they need; test trees have list_size ** max_depth leaves
+WORKLOADS = [
+    ('users_get_many', _get_users, dict(list_size=5, max_depth=4)),
+    ('course_editions_get_many', _get_course_editions, dict(list_size=20, max_depth=4)),
+    ('test_tree', _get_test_tree, dict(list_size=10, max_depth=4)),
+]
+
+
+def run_workload(workload, dataset, size, repeat):
+    """
+    Returns phase times of the fastest of repeat runs, the first (recording) run excluded, along with calls made
+    by each method. calls_vary is set if runs made different calls, in which case their times are not comparable.
+    """
+    client = DatasetClient(dataset)
+    workload(Session(client), size)
+
+    best = None
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in xrange(repeat):
+            session = _PhaseTimingSession(client)
+            start = _timer()
+            workload(session, size)
+            total = _timer() - start
+            calls_by_path = session.calls_by_path
+            if best is None or total < best['total']:
+                calls_vary = best is not None and (best['calls_vary'] or best['calls_by_path'] != calls_by_path)
+                best = dict(session.times, total=total, calls_by_path=calls_by_path, calls_vary=calls_vary)
+                best['decoding'] = total - sum(session.times.itervalues())
+            elif best['calls_by_path'] != calls_by_path:
+                best['calls_vary'] = True
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs offline reactor benchmarks')
+    parser.add_argument('-o', '--output', help='JSON file to write results to')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='runs per workload, the fastest is reported')
+    parser.add_argument('--sizes', default='1000,10000', help='comma-separated numbers of entities')
+    parser.add_argument('-w', '--workload', action='append', choices=[name for name, _, _ in WORKLOADS],
+                        help='workload to run (may be repeated, all by default)')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = {}
+    print '{0:<32} {1:>10}'.format('workload', 'total') + ''.join('{0:>20}'.format(phase) for phase in PHASES)
+    for name, workload, dataset_kwargs in WORKLOADS:
+        if args.workload and name not in args.workload:
+            continue
+        # Tree size depends only on list_size and max_depth
+        for size in sizes if workload is not _get_test_tree else [1000]:
+            times = run_workload(workload, Dataset(size=size, **dataset_kwargs), size, args.repeat)
+            label = name if workload is _get_test_tree else '{0}_{1}'.format(name, size)
+            results[label] = times
+            print '{0:<32} {1:>10}'.format(label, format_time(times['total'])) + ''.join(
+                '{0:>12} ({1:>4.1f}%)'.format(format_time(times[phase]), times[phase] * 100 / times['total'])
+                for phase in PHASES)
+            if times['calls_vary']:
+                print 'WARNING: runs of {0} made different calls'.format(label)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,380 @@
+import cgi
+import datetime
+import random
+
+from usos.client import BadRequest, FILE_METHODS
+from usos.tal.methods import registry
+from usos.tal.packid import pack_id, unpack_id
+from usos.tal.fieldselector import parse_basic
+from usos.tal.factory.entities import (
+    OptionalEntityField, OptionalType, ListType, EnumType, OpenEnumType, IntType, BoolType, DecimalType, DateType,
+    DateTimeType, CoordsType, URLType, EmailType, PhoneNumberType
+)
+from usos.tal.factory.methods import (
+    ElementaryId, ElementaryIdList, CompositeTupleIdList, EntityIdPicker, InlineEntityPicker, InlineEntityListPicker,
+    BaseEntityPicker, EntityPicker, EntityMapPicker, AncestorFromListPicker, EntityListPicker, SimplePicker,
+    DecimalPicker, URLPicker, USOSwebURLPicker, MappingPicker, DatePicker, DateTimePicker, LangDictPicker,
+    CoordsPicker, EntityIdListPicker, EntityIdMapPicker, GetMethod, GetManyMethod, GetManyAsListMethod, SearchMethod
+)
+
+# 1x1 transparent GIF
+PHOTO = ('GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00,'
+         '\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+PHOTO_CONTENT_TYPE = 'image/gif'
+
+
+def _get_id_names(id_spec):
+    return (id_spec.name, ) if isinstance(id_spec, ElementaryId) else id_spec.names
+
+
+def _get_requested(api_field_selector, name):
+    return api_field_selector is None or name in api_field_selector
+
+
+class Dataset(object):
+    """
+    Synthetic USOS API data set.
+
+    Responses of all methods registered in usos.tal.methods.registry are generated from their field pickers, so
+    they are structurally valid, honor the fields parameter and id lists, and are deterministic: each field of an
+    entity is generated from its own random generator, seeded with the entity class, id and field name, so it has
+    the same value in all responses, whatever other fields are requested. Ids of all entity classes are '1', ...,
+    str(size), composite ids are made of such parts.
+    """
+
+    def __init__(self, size=1000, list_size=5, max_depth=4, seed=0):
+        self.size = size
+        self.list_size = list_size
+        self.max_depth = max_depth
+        self.seed = seed
+        self._methods = {}
+        for method in registry.iter_methods():
+            self._methods.setdefault(method.path, []).append(method)
+
+    @property
+    def paths(self):
+        return sorted(self._methods) + sorted(FILE_METHODS) + ['services/apisrv/now']
+
+    def call_method(self, path, params=None):
+        """
+        Returns response of given method, as decoded JSON (or photo bytes for file methods). Raises BadRequest
+        like USOS API does.
+        """
+        params = {k: unicode(v) for k, v in (params or {}).iteritems()}
+        if path == 'services/apisrv/now':
+            return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+        if path in FILE_METHODS:
+            return PHOTO
+
+        method = self._find_method(path, params)
+        if isinstance(method, GetManyAsListMethod):
+            return self._get_many_as_list(method, params)
+        elif isinstance(method, GetManyMethod):
+            return self._get_many(method, params)
+        elif isinstance(method, GetMethod):
+            return self._get(method, params)
+        elif isinstance(method, SearchMethod):
+            return self._search(method, params)
+        else:
+            return self._list(method, params)
+
+    def _find_method(self, path, params):
+        methods = self._methods.get(path)
+        if not methods:
+            raise BadRequest(dict(message='Method not found: {0}'.format(path), error='method_not_found'))
+        for method in methods:
+            extra_params = getattr(method, 'extra_params', None) or {}
+            if all(params.get(k) == unicode(v) for k, v in dict(extra_params).iteritems()):
+                return method
+        return methods[0]
+
+    def _make_rng(self, *key):
+        return random.Random(hash((self.seed, ) + key))
+
+    def _is_valid_id(self, id):
+        for part in unpack_id(id):
+            if not part.isdigit() or not 1 <= int(part) <= self.size:
+                return False
+        return True
+
+    def _make_id_parts(self, id_spec, known, rng):
+        return {name: known[name] if name in known else unicode(rng.randint(1, self.size))
+                for name in _get_id_names(id_spec)}
+
+    def _prep_api_field_selector(self, params, has_fields_param=True):
+        if not has_fields_param or not params.get('fields'):
+            return None
+        return parse_basic(params['fields'])
+
+    def _not_found(self, id):
+        raise BadRequest(dict(message='Object {0} not found'.format(id), error='object_not_found'))
+
+    # Methods
+
+    def _get(self, method, params):
+        names = _get_id_names(method.id)
+        if any(name not in params for name in names):
+            raise BadRequest(dict(message='Missing id', error='param_missing', param_name=names[0]))
+        id = pack_id(params[name] for name in names)
+        if not self._is_valid_id(id):
+            self._not_found(id)
+        known = {name: params[name] for name in names}
+        api_field_selector = self._prep_api_field_selector(params, method.has_fields_param)
+        return self.make_entity_response(method.entity_class, method.field_pickers, None, id, api_field_selector, known)
+
+    def _read_ids(self, id_list, params):
+        value = params.get(id_list.param_name, '')
+        if not value:
+            return []
+        if isinstance(id_list, ElementaryIdList):
+            return value.split('|')
+        return [(key, pack_id(key[1:-1].split(','))) for key in value.split('|')]
+
+    def _get_many(self, method, params):
+        api_field_selector = self._prep_api_field_selector(params, method.has_fields_param)
+        ret = {}
+        for id in self._read_ids(method.ids, params):
+            key = id
+            if isinstance(method.ids, CompositeTupleIdList):
+                key, id = id
+            if self._is_valid_id(id):
+                ret[key] = self.make_entity_response(
+                    method.entity_class, method.field_pickers, None, id, api_field_selector)
+            else:
+                ret[key] = None
+        return ret
+
+    def _get_many_as_list(self, method, params):
+        pickers = method.entity_field_pickers
+        return [self.make_entity_response(method.entity_class, pickers, pickers.id, id, None)
+                for id in self._read_ids(method.ids, params) if self._is_valid_id(id)]
+
+    def _search(self, method, params):
+        query = params.get(method.query_param_name, '')
+        num = int(params.get('num', method.page_size))
+        api_field_selector = None
+        if method.fields_param_mode != 'none':
+            api_field_selector = self._prep_api_field_selector(params)
+            if api_field_selector is not None and method.fields_param_mode == 'full':
+                api_field_selector = api_field_selector.get('items') or None
+
+        rng = self._make_rng(method.path, query)
+        items = []
+        for _ in xrange(rng.randint(0, num)):
+            item = {}
+            self._fill_picker(item, method.picker, api_field_selector, {}, rng, 0)
+            item['match'] = '<b>{0}</b> {1}'.format(cgi.escape(query), rng.randint(1, 100))
+            items.append(item)
+        return {'items': items, 'next_page': False}
+
+    def _list(self, method, params):
+        api_field_selector = self._prep_api_field_selector(params, method.has_fields_param)
+        # Strip wrappers like 'course_editions[...]'
+        for name in method.list_selector:
+            if api_field_selector is not None and name in api_field_selector and len(api_field_selector) == 1:
+                api_field_selector = api_field_selector[name]
+
+        rng = self._make_rng(method.path, tuple(sorted(params.iteritems())))
+        pickers = method.entity_field_pickers
+        last_star = max(i for i, name in enumerate(method.list_selector) if name == '*')
+
+        def build(i):
+            if i == len(method.list_selector):
+                id = pack_id(self._make_id_parts(pickers.id, {}, rng)[name] for name in _get_id_names(pickers.id))
+                return self.make_entity_response(method.entity_class, pickers, pickers.id, id, api_field_selector)
+            name = method.list_selector[i]
+            if name == '*':
+                return [build(i + 1) for _ in xrange(self.list_size if i == last_star else 2)]
+            return {name: build(i + 1)}
+
+        return build(0)
+
+    # Generation of entities
+
+    def make_entity_response(self, entity_class, field_pickers, id_spec, id, api_field_selector, known=None,
+                             depth=0):
+        """
+        Returns response describing given entity. If id_spec is given, id fields are included as well.
+        """
+        known = dict(known or {})
+        response = {}
+        if id_spec is not None:
+            for name, part in zip(_get_id_names(id_spec), unpack_id(id)):
+                known[name] = part
+                response[name] = part
+        known = self._add_id_parts(known, entity_class, id, field_pickers)
+        for field_name, picker in sorted(field_pickers.iteritems()):
+            rng = self._make_rng(entity_class.__name__, id, field_name)
+            self._fill_picker(response, picker, api_field_selector, known, rng, depth)
+        return response
+
+    def _add_id_parts(self, known, entity_class, id, field_pickers):
+        """
+        Returns copy of known with id parts of all id and inline entity pickers added, so that they do not depend on
+        the order in which pickers are filled.
+        """
+        known = dict(known)
+        for field_name, picker in field_pickers.iteritems():
+            if isinstance(picker, EntityIdPicker):
+                names = _get_id_names(picker.id)
+            elif isinstance(picker, InlineEntityPicker):
+                names = _get_id_names(picker.entity_subfield_pickers.id)
+            else:
+                continue
+            for name in names:
+                if name not in known:
+                    known[name] = unicode(self._make_rng(entity_class.__name__, id, name).randint(1, self.size))
+        return known
+
+    def _make_nested_entity(self, picker, api_field_selector, known, rng, depth):
+        pickers = picker.entity_subfield_pickers
+        parts = self._make_id_parts(pickers.id, known, rng)
+        id = pack_id(parts[name] for name in _get_id_names(pickers.id))
+        return self.make_entity_response(
+            pickers.entity_class, pickers, pickers.id, id, api_field_selector, known, depth)
+
+    def _fill_picker(self, response, picker, api_field_selector, known, rng, depth):
+        if isinstance(picker, EntityIdPicker):
+            for name, part in self._make_id_parts(picker.id, known, rng).iteritems():
+                if _get_requested(api_field_selector, name):
+                    response.setdefault(name, part)
+        elif isinstance(picker, InlineEntityPicker):
+            self._fill_inline_entity(response, picker, api_field_selector, known, rng, depth)
+        elif isinstance(picker, InlineEntityListPicker):
+            for i in xrange(self.list_size):
+                response[unicode(i)] = self._make_nested_entity(picker, api_field_selector, {}, rng, depth + 1)
+        elif isinstance(picker, BaseEntityPicker):
+            self._fill_entity(response, picker, api_field_selector, known, rng, depth)
+        elif _get_requested(api_field_selector, picker.field_name) and picker.field_name not in response:
+            if picker.field_name in known:
+                response[picker.field_name] = known[picker.field_name]
+            else:
+                response[picker.field_name] = self._make_value(picker, rng)
+
+    def _fill_inline_entity(self, response, picker, api_field_selector, known, rng, depth):
+        pickers = picker.entity_subfield_pickers
+        parts = self._make_id_parts(pickers.id, known, rng)
+        for name, part in parts.iteritems():
+            if _get_requested(api_field_selector, name):
+                response.setdefault(name, part)
+        if depth >= self.max_depth:
+            return
+        sub_known = dict(known)
+        sub_known.update(parts)
+        id = pack_id(parts[n] for n in _get_id_names(pickers.id))
+        sub_known = self._add_id_parts(sub_known, pickers.entity_class, id, pickers)
+        for field_name, subpicker in sorted(pickers.iteritems()):
+            sub_rng = self._make_rng(pickers.entity_class.__name__, id, field_name)
+            self._fill_picker(response, subpicker, api_field_selector, sub_known, sub_rng, depth + 1)
+
+    def _fill_entity(self, response, picker, api_field_selector, known, rng, depth):
+        lifted_fields = picker.field_lifter.lifted_fields
+        if not (_get_requested(api_field_selector, picker.field_name) or
+                any(name in api_field_selector for name in lifted_fields)):
+            return
+
+        if api_field_selector is None or not picker.has_subfield_selector:
+            subfield_selector = None
+        else:
+            # Entity fields without subfields stand for their default subfields
+            subfield_selector = api_field_selector.get(picker.field_name) or None
+        if depth >= self.max_depth:
+            subfield_selector = {}
+
+        # Lifted fields are shared by the response and its subresponses
+        sub_known = {}
+        for name, lifted_name in lifted_fields.iteritems():
+            if name in response:
+                sub_known[lifted_name] = response[name]
+            elif name in known:
+                sub_known[lifted_name] = known[name]
+
+        def make():
+            return self._make_nested_entity(picker, subfield_selector, sub_known, rng, depth + 1)
+
+        field = picker.field
+        if isinstance(picker, EntityPicker):
+            value = None if isinstance(field, OptionalEntityField) and rng.random() < 0.2 else make()
+        elif isinstance(picker, EntityMapPicker):
+            value = {unicode(i): make() for i in xrange(self.list_size)}
+        elif isinstance(picker, AncestorFromListPicker):
+            value = [make() for _ in xrange(rng.randint(0, 2))]
+        elif isinstance(picker, EntityListPicker):
+            if field.ref_entity_class is field.entity_class and depth >= self.max_depth:
+                value = []
+            else:
+                value = [make() for _ in xrange(self.list_size)]
+            if field.ref_entity_class is field.entity_class:
+                # Recursive list, e.g. subnodes of CourseTestNode; trees end with empty lists
+                for subresponse in value:
+                    if picker.field_name not in subresponse:
+                        self._fill_entity(subresponse, picker, api_field_selector, known, rng, depth + 1)
+        else:
+            raise TypeError('Unsupported picker: {0!r}'.format(picker))
+
+        response[picker.field_name] = value
+        for name, lifted_name in lifted_fields.iteritems():
+            if name not in response:
+                response[name] = sub_known.get(lifted_name, unicode(rng.randint(1, self.size)))
+
+    def _make_value(self, picker, rng):
+        name = picker.field_name
+        if isinstance(picker, SimplePicker):
+            return self._make_data_value(picker.field.type, name, rng)
+        elif isinstance(picker, DecimalPicker):
+            return '{0:.1f}'.format(rng.uniform(2, 5))
+        elif isinstance(picker, URLPicker):
+            return rng.choice(['', 'https://example.com/{0}/{1}'.format(name, rng.randint(1, self.size))])
+        elif isinstance(picker, USOSwebURLPicker):
+            return 'https://usosweb.example.com/kontroler.php?_action=katalog&id={0}'.format(rng.randint(1, self.size))
+        elif isinstance(picker, MappingPicker):
+            keys = sorted(k for k in picker.mapping if k is not None)
+            if picker.open and (not keys or rng.random() < 0.5):
+                return self._make_data_value(picker.field.type, name, rng)
+            return rng.choice(keys)
+        elif isinstance(picker, DatePicker):
+            return self._make_data_value(DateType(), name, rng)
+        elif isinstance(picker, DateTimePicker):
+            return self._make_data_value(DateTimeType(), name, rng)
+        elif isinstance(picker, LangDictPicker):
+            n = rng.randint(1, 100)
+            label = name.replace('_', ' ').capitalize()
+            return {'pl': '{0} {1} (pl)'.format(label, n), 'en': '{0} {1}'.format(label, n)}
+        elif isinstance(picker, CoordsPicker):
+            return self._make_data_value(CoordsType(), name, rng)
+        elif isinstance(picker, EntityIdListPicker):
+            return [unicode(rng.randint(1, self.size)) for _ in xrange(self.list_size)]
+        elif isinstance(picker, EntityIdMapPicker):
+            pairs = [(unicode(i), unicode(rng.randint(1, self.size))) for i in xrange(self.list_size)]
+            return {id: key for key, id in pairs} if picker.flipped else dict(pairs)
+        else:
+            return self._make_data_value(None, name, rng)
+
+    def _make_data_value(self, data_type, name, rng):
+        if isinstance(data_type, OptionalType):
+            return None if rng.random() < 0.2 else self._make_data_value(data_type.item_type, name, rng)
+        elif isinstance(data_type, ListType):
+            return [self._make_data_value(data_type.item_type, name, rng) for _ in xrange(rng.randint(0, 2))]
+        elif isinstance(data_type, (EnumType, OpenEnumType)) and data_type.members:
+            return rng.choice(data_type.members)
+        elif isinstance(data_type, IntType):
+            return rng.randint(1, 100)
+        elif isinstance(data_type, BoolType):
+            return rng.random() < 0.5
+        elif isinstance(data_type, DecimalType):
+            return round(rng.uniform(0, 10), 1)
+        elif isinstance(data_type, DateTimeType):
+            return '2016-{0:02d}-{1:02d} {2:02d}:{3:02d}:00'.format(
+                rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59))
+        elif isinstance(data_type, DateType):
+            return '2016-{0:02d}-{1:02d}'.format(rng.randint(1, 12), rng.randint(1, 28))
+        elif isinstance(data_type, CoordsType):
+            return {'lat': round(rng.uniform(49, 55), 6), 'long': round(rng.uniform(14, 24), 6)}
+        elif isinstance(data_type, URLType):
+            return 'https://example.com/{0}/{1}'.format(name, rng.randint(1, self.size))
+        elif isinstance(data_type, EmailType):
+            return 'user{0}@example.com'.format(rng.randint(1, self.size))
+        elif isinstance(data_type, PhoneNumberType):
+            return '+48 {0:09d}'.format(rng.randint(0, 999999999))
+        else:
+            return '{0} {1}'.format(name.replace('_', ' ').capitalize(), rng.randint(1, 100))
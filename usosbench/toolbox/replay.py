@@ -0,0 +1,26 @@
+import json
+
+from usostest.toolbox.testcase import BaseClient
+
+
+class DatasetClient(BaseClient):
+    """
+    Fake client answering calls with responses of dataset, so that benchmarks involve no network. Responses are
+    generated once. If decode is set, they are kept as JSON and decoded on each call, as real clients do.
+    """
+
+    def __init__(self, dataset, decode=True):
+        super(DatasetClient, self).__init__(self._call_method)
+        self.dataset = dataset
+        self.decode = decode
+        self._responses = {}
+
+    def _call_method(self, path, params=None, mode=None, timeout=None):
+        key = (path, tuple(sorted((params or {}).iteritems())))
+        response = self._responses.get(key)
+        if response is None:
+            response = self.dataset.call_method(path, params)
+            if self.decode:
+                response = json.dumps(response)
+            self._responses[key] = response
+        return json.loads(response) if self.decode else response
@@ -0,0 +1,164 @@
+import BaseHTTPServer
+import SocketServer
+import argparse
+import json
+import random
+import threading
+import time
+import urlparse
+
+from usos import client
+from usos.client import BadRequest, FILE_METHODS
+from .dataset import Dataset, PHOTO_CONTENT_TYPE
+
+
+class _ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        self._handle(path, query)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.getheader('content-length') or 0))
+        path, _, query = self.path.partition('?')
+        self._handle(path, body or query)
+
+    def _handle(self, path, query):
+        stand_in = self.server.stand_in
+        path = path.lstrip('/')
+        params = {k: v.decode('UTF-8') for k, v in urlparse.parse_qsl(query, keep_blank_values=True)}
+
+        stand_in.wait()
+        if stand_in.should_fail():
+            self._send_json(500, dict(message='Internal server error (injected)'))
+            return
+
+        try:
+            response = stand_in.dataset.call_method(path, params)
+        except BadRequest as e:
+            error = dict(message=e.message)
+            for key in ('error', 'param_name'):
+                if key in e:
+                    error[key] = e[key]
+            self._send_json(404 if e.get('error') == 'method_not_found' else 400, error)
+            return
+
+        if path in FILE_METHODS:
+            self._send(200, PHOTO_CONTENT_TYPE, response)
+        else:
+            self._send_json(200, response)
+
+    def _send_json(self, status, obj):
+        self._send(status, 'application/json; charset=utf-8', json.dumps(obj))
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(object):
+    """
+    Local HTTP server standing in for USOS API, serving responses generated by Dataset for all methods registered
+    in usos.tal.methods.registry, services/apisrv/now and photo methods.
+
+    Each request is delayed by latency plus a random value from [0, jitter] seconds, and a fraction of requests
+    given by error_rate fails with HTTP 500. Clients connect over plain HTTP, so they should be created with
+    make_client(...), which passes allow_insecure_connections=True to the client.
+    """
+
+    def __init__(self, dataset=None, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.dataset = Dataset() if dataset is None else dataset
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return 'http://{0}:{1}/'.format(host, port)
+
+    def start(self):
+        self._server = _ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.stand_in = self
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def wait(self):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def should_fail(self):
+        with self._lock:
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return fail
+
+    def make_client(self, client_class=client.Client, **kwargs):
+        """
+        Returns client_class instance (Client by default) calling this server. Extra arguments are passed to
+        client_class.
+        """
+        # The server speaks plain HTTP
+        return client_class(self.base_url, allow_insecure_connections=True, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs local USOS API stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help='base latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random extra latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests failing with HTTP 500')
+    parser.add_argument('--size', type=int, default=1000, help='number of entities of each class')
+    parser.add_argument('--list-size', type=int, default=5, help='number of items in generated lists')
+    args = parser.parse_args()
+
+    server = StandInServer(
+        Dataset(size=args.size, list_size=args.list_size), args.host, args.port, args.latency, args.jitter,
+        args.error_rate)
+    server.start()
+    print 'Serving at {0}'.format(server.base_url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
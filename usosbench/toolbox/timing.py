@@ -0,0 +1,38 @@
+import gc
+import math
+import timeit
+
+
+def measure(func, number=1000, repeat=5):
+    """
+    Returns the best time of a single func() call, in seconds.
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{0:.2f} {1}'.format(seconds / scale, unit)
+    return '{0:.2f} ns'.format(seconds / 1e-9)
+
+
+def report(name, baseline, optimized):
+    print '{0:<48} {1:>12} -> {2:>12}  ({3:.2f}x)'.format(
+        name, format_time(baseline), format_time(optimized), baseline / optimized)
+
+
+def percentile(values, p):
+    """
+    Returns p-th percentile (0-100) of sorted values, using the nearest-rank method.
+    """
+    if not values:
+        return None
+    rank = max(int(math.ceil(p / 100.0 * len(values))), 1)
+    return values[rank - 1]
@@ -1,9 +1,15 @@
 import unittest
 
-from . import user
+from . import (
+    user, search, typeahead, table, export, raw, fieldselector, packid, cassette, stats, hedging, concurrency,
+    ratelimit, deadline, methods
+)
 
 
 def load_tests(loader, tests, pattern):
-    mods = [user]
+    mods = [
+        user, search, typeahead, table, export, raw, fieldselector, packid, cassette, stats, hedging, concurrency,
+        ratelimit, deadline, methods
+    ]
 
     return unittest.TestSuite(map(loader.loadTestsFromModule, mods))
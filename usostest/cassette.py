@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from usos import tal
+from usos.client import ClientError, BadRequest, HttpError
+from usos.cassette import CassetteWriter, RecordingClient, ReplayClient, CassetteError
+from usosbench.toolbox.dataset import PHOTO_CONTENT_TYPE
+from usosbench.toolbox.server import StandInServer
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, 'cassette.jsonl.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_replay(self):
+        with CassetteWriter(self.filename, 'https://usosapps.example.com/') as writer:
+            writer.write(
+                'services/users/user',
+                {'user_id': '1', 'fields': 'last_name|first_name'},
+                'format',
+                0.25,
+                response={'first_name': 'Jan', 'last_name': 'Kowalski'},
+            )
+            writer.write(
+                'services/users/user',
+                {'user_id': '2', 'fields': 'first_name|last_name'},
+                'format',
+                0.5,
+                error=BadRequest({'message': 'Not found', 'error': 'object_not_found'}),
+            )
+            writer.write('services/users/photo', {'user_id': '1'}, 'file', 0.1, file=('image/jpeg', b'\xff\xd8'))
+
+        delays = []
+        client = ReplayClient(self.filename, latency=lambda path, elapsed: delays.append(elapsed) or 0)
+        self.assertEqual(client.base_url, 'https://usosapps.example.com/')
+
+        user = tal.Session(client).get(tal.User, '1', 'first_name|last_name')
+        self.assertEqual(user.first_name, 'Jan')
+        with self.assertRaises(BadRequest) as cm:
+            client.call_method('services/users/user', {'user_id': '2', 'fields': 'first_name|last_name'})
+        self.assertEqual(cm.exception['error'], 'object_not_found')
+        with client.call_method('services/users/photo', {'user_id': '1'}) as f:
+            self.assertEqual(f.content_type, 'image/jpeg')
+            self.assertEqual(f.read(), b'\xff\xd8')
+        self.assertEqual(delays, [0.25, 0.5, 0.1])
+
+        # Recorded calls are used up
+        with self.assertRaises(CassetteError):
+            client.call_method('services/users/user', {'user_id': '1', 'fields': 'first_name|last_name'})
+
+    def test_reuse(self):
+        with CassetteWriter(self.filename, 'http://127.0.0.1:8000/') as writer:
+            writer.write('services/apisrv/now', {}, 'format', 0.0, response='2016-01-01 00:00:00.000000')
+
+        client = ReplayClient(self.filename, reuse=True)
+        for _ in xrange(3):
+            self.assertEqual(client.call_method('services/apisrv/now'), '2016-01-01 00:00:00.000000')
+        with self.assertRaises(CassetteError):
+            client.call_method('services/apisrv/now', {'extra': 'param'})
+
+    def test_record(self):
+        with StandInServer(latency=0.05) as server:
+            with server.make_client(RecordingClient, filename=self.filename) as client:
+                user = tal.Session(client).get(tal.User, '1', 'first_name|last_name')
+                with client.call_method('services/users/photo', {'user_id': '1'}) as f:
+                    photo = f.read()
+                with self.assertRaises(BadRequest):
+                    client.call_method('services/users/user', {'fields': 'first_name'})
+                with self.assertRaises(HttpError):
+                    client.call_method('services/no/such_method')
+                client.writer.write('services/apisrv/now', {}, 'format', 0.0, error=CassetteError('Unexpected'))
+
+        client = ReplayClient(self.filename, latency='recorded')
+        self.assertEqual(client.base_url, server.base_url)
+        start = time.time()
+        replayed_user = tal.Session(client).get(tal.User, '1', 'first_name|last_name')
+        self.assertEqual((replayed_user.first_name, replayed_user.last_name), (user.first_name, user.last_name))
+        self.assertGreaterEqual(time.time() - start, 0.05)
+        with client.call_method('services/users/photo', {'user_id': '1'}) as f:
+            self.assertEqual(f.content_type, PHOTO_CONTENT_TYPE)
+            self.assertEqual(f.read(), photo)
+        with self.assertRaises(BadRequest) as cm:
+            client.call_method('services/users/user', {'fields': 'first_name'})
+        self.assertEqual(cm.exception['error'], 'param_missing')
+        with self.assertRaises(HttpError) as cm:
+            client.call_method('services/no/such_method')
+        self.assertEqual(cm.exception.status, 404)
+        with self.assertRaises(ClientError) as cm:
+            client.call_method('services/apisrv/now')
+        self.assertEqual(str(cm.exception), 'CassetteError: Unexpected')
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import threading
+import time
+import unittest
+
+from usos.client import HttpError, BadRequest
+from usos.concurrency import ConcurrencyLimiter, get_limiter
+
+
+class TestConcurrencyLimiter(unittest.TestCase):
+    def test_limit(self):
+        limiter = ConcurrencyLimiter(initial_limit=2, max_limit=2)
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        def call_method(path):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        threads = [threading.Thread(target=limiter.call, args=(call_method, 'services/users/user'))
+                   for _ in xrange(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(max_running[0], 2)
+        self.assertEqual(limiter.get_metrics(), dict(limit=2, in_flight=0, queue_depth=0, decreases=0))
+
+    def test_aimd(self):
+        limiter = ConcurrencyLimiter(initial_limit=8)
+
+        def overloaded(path):
+            raise HttpError(503, 'Service unavailable')
+
+        def bad_request(path):
+            raise BadRequest({'message': 'Invalid id'})
+
+        with self.assertRaises(HttpError):
+            limiter.call(overloaded, 'services/users/user')
+        self.assertEqual(limiter.limit, 4)
+
+        with self.assertRaises(BadRequest):
+            limiter.call(bad_request, 'services/users/user')
+        for _ in xrange(8):
+            limiter.call(lambda path: None, 'services/users/user')
+        self.assertEqual(limiter.limit, 5)
+
+    def test_shared(self):
+        self.assertIs(get_limiter('https://usosapps.example.com/'), get_limiter('https://usosapps.example.com/'))
+        self.assertIsNot(get_limiter('https://usosapps.example.com/'), get_limiter('https://usosapps.example.org/'))
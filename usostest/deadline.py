@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import BaseHTTPServer
+import threading
+import time
+
+from usos import tal
+from usos.client import Client, Timeout
+from usos.concurrency import ConcurrencyLimiter
+from usos.ratelimit import RateLimiter
+from .toolbox.testcase import BaseClient, TestCase
+
+
+class _SlowClient(Client):
+    def __init__(self, latency, **kwargs):
+        super(_SlowClient, self).__init__('https://usosapps.example.com/', **kwargs)
+        self.latency = latency
+
+    def _call_method(self, path, params, mode, timeout=None):
+        timeout, client_timeout = self._get_timeout(timeout)
+        if timeout is not None and self.latency > timeout:
+            raise Timeout('timed out', client_timeout=client_timeout)
+        time.sleep(self.latency)
+        return {'id': params['user_id'], 'first_name': 'Jan'}
+
+
+class _DrippingHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # Sends the body byte by byte, each write well within the socket timeout of the client
+    def do_POST(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '100')
+        self.end_headers()
+        try:
+            for _ in xrange(100):
+                self.wfile.write(b' ')
+                self.wfile.flush()
+                time.sleep(0.01)
+        except IOError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestDeadline(TestCase):
+    def add_course_edition_calls(self):
+        self.add_method_call(
+            'services/courses/course_edition',
+            {'course_id': 'C1', 'term_id': '2016Z', 'fields': 'lecturers'},
+            {'lecturers': [{'id': '3', 'first_name': 'Jan', 'last_name': 'Kowalski'}]}
+        )
+        self.add_method_call(
+            'services/users/user',
+            {'user_id': '3', 'fields': 'room[id|number|building_id|building_name]'},
+            Timeout('timed out')
+        )
+
+    def test_deadline_passed(self):
+        with self.assertRaises(tal.DeadlineExceeded):
+            self.get(tal.User, '1', 'first_name', deadline=time.time() - 1)
+        self.assertEqual(self._session.last_operation.calls, 0)
+
+    def test_deadline_exceeded(self):
+        self.add_course_edition_calls()
+        with self.assertRaises(tal.DeadlineExceeded):
+            self.get(tal.CourseEdition, 'C1|2016Z', 'lecturers[first_name|room]', deadline=time.time() + 60)
+
+    def test_partial(self):
+        self.add_course_edition_calls()
+        course_edition = self.get(tal.CourseEdition, 'C1|2016Z', 'lecturers[first_name|room]',
+                                  deadline=time.time() + 60, partial=True)
+
+        lecturer, = course_edition.lecturers
+        self.assertEqual(lecturer.first_name, 'Jan')
+        self.assertFalse(lecturer.is_loaded('room'))
+        self.assertTrue(self._session.last_operation.deadline_exceeded)
+        self.assertEqual(self._session.last_operation.unresolved, {(tal.User, '3'): ['room']})
+
+    def test_rate_limiter(self):
+        session = tal.Session(_SlowClient(0, rate_limiter=RateLimiter(0.5, burst=1)))
+        session.get(tal.User, '1', 'first_name', deadline=time.time() + 0.2)
+        start = time.time()
+        with self.assertRaises(tal.DeadlineExceeded):
+            session.get(tal.User, '2', 'first_name', deadline=time.time() + 0.2)
+        self.assertLess(time.time() - start, 0.2)
+
+    def test_concurrency_limiter(self):
+        limiter = ConcurrencyLimiter(initial_limit=1, max_limit=1)
+        session = tal.Session(_SlowClient(0, concurrency_limiter=limiter))
+        start = limiter.acquire()
+        with self.assertRaises(tal.DeadlineExceeded):
+            session.get(tal.User, '1', 'first_name', deadline=time.time() + 0.05)
+        limiter.release(start, 'services/users/user')
+        self.assertEqual(session.get(tal.User, '1', 'first_name', deadline=time.time() + 0.05).first_name, 'Jan')
+
+    def test_deadline_is_not_overload(self):
+        limiter = ConcurrencyLimiter(initial_limit=8)
+        session = tal.Session(_SlowClient(0.05, concurrency_limiter=limiter))
+        for _ in xrange(4):
+            with self.assertRaises(tal.DeadlineExceeded):
+                session.get(tal.User, '1', 'first_name', deadline=time.time() + 0.01)
+        self.assertEqual(limiter.decreases, 0)
+
+        # Timeouts of the client itself are overload signals
+        session = tal.Session(_SlowClient(0.05, concurrency_limiter=limiter, timeout=0.01))
+        with self.assertRaises(Timeout) as cm:
+            session.get(tal.User, '1', 'first_name', deadline=time.time() + 0.5)
+        self.assertNotIsInstance(cm.exception, tal.DeadlineExceeded)
+        self.assertEqual(limiter.decreases, 1)
+
+    def test_response_after_deadline(self):
+        def call_method(path, params, **kwargs):
+            time.sleep(0.05)
+            return {'id': params['user_id'], 'first_name': 'Jan'}
+
+        session = tal.Session(BaseClient(call_method))
+        with self.assertRaises(tal.DeadlineExceeded):
+            session.get(tal.User, '1', 'first_name', deadline=time.time() + 0.01)
+
+    def test_search_all(self):
+        for _ in xrange(2):
+            self.add_method_call(
+                'services/users/search2',
+                {'fields': 'items[user[first_name|last_name|id]|match]', 'lang': 'en', 'num': 20, 'query': 'kow'},
+                Timeout('timed out')
+            )
+        with self.assertRaises(tal.DeadlineExceeded):
+            self.search_all('kow', [tal.User], deadline=time.time() + 60)
+        self.assertEqual(self.search_all('kow', [tal.User], deadline=time.time() + 60, partial=True), {tal.User: []})
+        self.assertTrue(self._session.last_operation.deadline_exceeded)
+
+    def test_slow_response(self):
+        server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), _DrippingHandler)
+        thread = threading.Thread(target=server.handle_request)
+        thread.daemon = True
+        thread.start()
+        try:
+            client = Client('http://127.0.0.1:{0}/'.format(server.server_address[1]), timeout=1,
+                            allow_insecure_connections=True)
+            start = time.time()
+            with self.assertRaises(Timeout) as cm:
+                client.call_method('services/apisrv/now', timeout=0.2)
+            self.assertFalse(cm.exception.client_timeout)
+            self.assertLess(time.time() - start, 0.5)
+        finally:
+            thread.join()
+            server.server_close()
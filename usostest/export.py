@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import unittest
+from cStringIO import StringIO
+from io import BytesIO
+
+from usos import tal
+from usos.tal.export import export, NDJSONExporter, pyarrow
+from .toolbox.testcase import TestCase
+
+
+class TestExport(TestCase):
+    def setUp(self):
+        self.add_method_call(
+            'services/users/users',
+            {
+                'fields': 'first_name|last_name|room[id|number]',
+                'user_ids': '1|2|3',
+            },
+            {
+                '1': {
+                    'first_name': 'Jan',
+                    'last_name': 'Żak',
+                    'room': {
+                        'id': '10',
+                        'number': '101',
+                    },
+                },
+                '2': {
+                    'first_name': 'Anna',
+                    'last_name': 'Nowak',
+                    'room': None,
+                },
+                '3': None,
+            }
+        )
+
+    def _iter_users(self):
+        return self._session.iter_get_many(tal.User, ['1', '2', '3'], 'first_name|last_name|room[number]')
+
+    def test_ndjson(self):
+        f = StringIO()
+        export(self._iter_users(), f, tal.User, 'first_name|last_name|room[number]', chunk_size=1)
+
+        self.assertEqual(
+            [json.loads(line) for line in f.getvalue().splitlines()],
+            [
+                {'id': '1', 'first_name': 'Jan', 'last_name': 'Żak', 'room.id': '10', 'room.number': '101'},
+                {'id': '2', 'first_name': 'Anna', 'last_name': 'Nowak', 'room.id': None, 'room.number': None},
+            ]
+        )
+
+    def test_csv(self):
+        f = StringIO()
+        table = self._session.get_many_table(tal.User, ['1', '2', '3'], 'first_name|last_name|room[number]')
+        export(table, f, tal.User, 'first_name|last_name|room[number]', format='csv', lineterminator='\n')
+
+        self.assertEqual(
+            f.getvalue().decode('UTF-8'),
+            'id,first_name,last_name,room.id,room.number\n'
+            '1,Jan,Żak,10,101\n'
+            '2,Anna,Nowak,,\n'
+        )
+
+    def test_list(self):
+        self.add_method_call(
+            'services/groups/participant',
+            {
+                'fields': 'course_unit_id|group_number|group_url|lecturers',
+                'active_terms': 'false',
+            },
+            {
+                'groups': {
+                    '2016Z': [
+                        {
+                            'course_unit_id': '5',
+                            'group_number': 1,
+                            'group_url': 'https://usos.example.com/5/1',
+                            'lecturers': [{'id': '1', 'first_name': 'Jan', 'last_name': 'Żak'}],
+                        },
+                        {
+                            'course_unit_id': '6',
+                            'group_number': 2,
+                            'group_url': None,
+                            'lecturers': [{'id': '2', 'first_name': 'Anna', 'last_name': 'Nowak'}],
+                        },
+                    ],
+                },
+            }
+        )
+        # Rooms of lecturers are loaded separately for each chunk
+        for user_id, room in [('1', {'id': '10', 'number': '101'}), ('2', None)]:
+            self.add_method_call(
+                'services/users/user',
+                {
+                    'fields': 'room[id|number]',
+                    'user_id': user_id,
+                },
+                {
+                    'room': room,
+                }
+            )
+
+        f = StringIO()
+        fields = 'group_number|homepage_url|lecturers[room[number]]'
+        groups = self._session.iter_list(tal.CourseGroup, 'student_all', fields, chunk_size=1)
+        export(groups, f, tal.CourseGroup, 'group_number|homepage_url', format='csv', lineterminator='\n')
+
+        self.assertEqual(
+            f.getvalue(),
+            'id,group_number,homepage_url\n'
+            '5|1,1,https://usos.example.com/5/1\n'
+            '6|2,2,\n'
+        )
+
+    def test_list_without_getter(self):
+        self.add_method_call(
+            'services/cards/user',
+            {},
+            [
+                {'barcode_number': '123', 'type': 'student', 'expiration_date': '2017-09-30'},
+                {'barcode_number': '456', 'type': 'staff', 'expiration_date': '2018-09-30'},
+            ]
+        )
+
+        cards = list(self._session.iter_list(tal.Card, 'user', 'type', chunk_size=1))
+        self.assertEqual([(card.id, card.type) for card in cards], [('123', 'student'), ('456', 'staff')])
+        self.assertEqual(self._session.last_operation.calls, 0)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        f = BytesIO()
+        export(self._iter_users(), f, tal.User, 'first_name|last_name|room[number]', format='parquet')
+
+        self.assertEqual(
+            pyarrow.parquet.read_table(BytesIO(f.getvalue())).to_pydict(),
+            {
+                'id': ['1', '2'],
+                'first_name': ['Jan', 'Anna'],
+                'last_name': ['Żak', 'Nowak'],
+                'room.id': ['10', None],
+                'room.number': ['101', None],
+            }
+        )
+
+    def test_close_on_error(self):
+        closed = []
+
+        class FailingExporter(NDJSONExporter):
+            def _close(self):
+                closed.append(True)
+
+        f = StringIO()
+        with self.assertRaises(ValueError):
+            with FailingExporter(f, tal.User, 'first_name', chunk_size=1) as exporter:
+                exporter.write_many(self._iter_users())
+                raise ValueError('Export failed')
+        self.assertEqual(closed, [True])
@@ -0,0 +1,47 @@
+from usos import tal
+from usos.tal.fieldselector import parse, is_recursive, freeze, stringify, FieldSelector
+from usos.tal.reactor import Target
+from .toolbox.testcase import TestCase
+
+
+class TestParse(TestCase):
+    def test_cached(self):
+        self.assertIs(parse('first_name|last_name', tal.User), parse('first_name|last_name', tal.User))
+
+    def test_recursive_field_does_not_modify_default_selector(self):
+        default_field_selector = tal.CourseTestNode.get_default_field_selector()
+        field_selector = parse('name|subnodes*', tal.CourseTestNode)
+
+        self.assertTrue(is_recursive(field_selector['subnodes'], 'subnodes'))
+        self.assertNotIn('subnodes', default_field_selector)
+
+
+class TestFieldSelector(TestCase):
+    def test_interned(self):
+        field_selector = freeze({'first_name': {}, 'room': {'number': {}}})
+
+        self.assertIsInstance(field_selector, FieldSelector)
+        self.assertIs(field_selector, parse('room[number]|first_name', tal.User))
+        self.assertEqual(field_selector, {'first_name': {}, 'room': {'number': {}}})
+        self.assertEqual(hash(field_selector), hash(freeze({'room': {'number': {}}, 'first_name': {}})))
+        self.assertRaises(TypeError, field_selector.__setitem__, 'last_name', {})
+
+    def test_recursive(self):
+        subnodes = {'name': {}}
+        subnodes['subnodes'] = subnodes
+        field_selector = freeze({'name': {}, 'subnodes': subnodes})
+
+        self.assertTrue(is_recursive(field_selector['subnodes'], 'subnodes'))
+        self.assertEqual(stringify(field_selector), 'name|subnodes*[name]')
+        self.assertIs(parse(stringify(field_selector), tal.CourseTestNode), field_selector)
+
+
+class TestTargetFieldSelector(TestCase):
+    def test_same_subselector(self):
+        field_selector = parse('first_name|last_name|sex', tal.User)
+        target = Target(tal.User('1'), tal.User, field_selector, False)
+        mask = tal.User.fields.get_mask(['first_name', 'sex'])
+
+        self.assertIs(target.get_field_selector(target.pending), field_selector)
+        self.assertEqual(target.get_field_selector(mask), {'first_name': {}, 'sex': {}})
+        self.assertIs(target.get_field_selector(mask), target.get_field_selector(mask))
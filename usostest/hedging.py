@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import threading
+import time
+import unittest
+
+from usos.client import NetworkError
+from usos.hedging import HedgingPolicy
+
+
+class TestHedging(unittest.TestCase):
+    def make_policy(self):
+        policy = HedgingPolicy(percentile=50, min_samples=4)
+        for _ in xrange(4):
+            policy.add_latency('services/users/user', 0.01)
+        return policy
+
+    def test_no_samples(self):
+        policy = HedgingPolicy(min_samples=4)
+        self.assertEqual(policy.call(lambda path, params: params['x'], 'services/users/user', {'x': 1}), 1)
+        self.assertIsNone(policy.get_delay('services/users/user'))
+        self.assertEqual(policy.stats.hedges, 0)
+
+    def test_hedge_wins(self):
+        policy = self.make_policy()
+        calls = []
+        lock = threading.Lock()
+
+        def call_method(path, params):
+            with lock:
+                calls.append(path)
+                first = len(calls) == 1
+            time.sleep(0.5 if first else 0.0)
+            return 'slow' if first else 'fast'
+
+        self.assertEqual(policy.call(call_method, 'services/users/user', {}), 'fast')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual((policy.stats.calls, policy.stats.hedges, policy.stats.hedge_wins), (1, 1, 1))
+
+    def test_fast_answer(self):
+        policy = self.make_policy()
+        policy.min_delay = 0.5
+        self.assertEqual(policy.call(lambda path: 'ok', 'services/users/user'), 'ok')
+        self.assertEqual(policy.stats.hedges, 0)
+
+    def test_all_failed(self):
+        policy = self.make_policy()
+
+        def call_method(path):
+            time.sleep(0.05)
+            raise NetworkError('Connection refused')
+
+        with self.assertRaises(NetworkError):
+            policy.call(call_method, 'services/users/user')
+        self.assertEqual(policy.stats.hedges, 1)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from usos import tal
+from usos.tal.fieldselector import parse
+from usos.tal.reactor import Reactor
+from usos.tal.factory.methods import FieldPickers, SimplePicker
+from usos.tal.methods import primary_user_field_pickers, primary_course_group_field_pickers
+from .toolbox.testcase import TestCase
+
+
+class TestCompiledLoaders(TestCase):
+    def test_equal_selectors_share_loader(self):
+        pickers = FieldPickers(first_name=SimplePicker('first_name'))
+        pickers.bind_to_entity_class(tal.User)
+        compiled = []
+        compile_loader = pickers.compile_loader
+        pickers.compile_loader = lambda field_selector: compiled.append(field_selector) or compile_loader(
+            field_selector)
+
+        field_selectors = [{'first_name': {}} for _ in xrange(3)]
+        for field_selector in field_selectors:
+            self.assertEqual(pickers.load_values(None, {'first_name': 'Jan'}, field_selector),
+                             {'first_name': 'Jan'})
+        self.assertEqual(len(compiled), 1)
+
+        # Each selector object maps to the shared loader in the identity cache
+        loader = pickers._loaders.get(field_selectors[0])
+        self.assertIsNotNone(loader)
+        for field_selector in field_selectors:
+            self.assertIs(pickers._loaders.get(field_selector), loader)
+
+    def assert_same_as_pickers(self, pickers, response, field_selector):
+        reactor = Reactor(self._session)
+        compiled_values = pickers.compile_loader(field_selector)(reactor, response)
+        values = {field_name: pickers[field_name].load_value(reactor, response, subfield_selector)
+                  for field_name, subfield_selector in field_selector.iteritems()}
+        self.assert_same(compiled_values, values)
+
+    def test_nested_and_optional_fields(self):
+        field_selector = parse(
+            'first_name|last_name|sex|profile_url|homepage_url|phone_numbers|mobile_numbers|room[number|building]',
+            tal.User)
+        response = {
+            'first_name': 'Jan',
+            'last_name': 'Kowalski',
+            'sex': 'M',
+            'profile_url': 'https://usosweb.example.com/kontroler.php?_action=katalog&id=1',
+            'homepage_url': '',
+            'phone_numbers': None,
+            'mobile_numbers': ['+48 123'],
+            'room': {
+                'id': '10',
+                'number': '101',
+                'building_id': '3',
+                'building_name': {'en': 'Main building', 'pl': 'Budynek główny'},
+            },
+        }
+        self.assert_same_as_pickers(primary_user_field_pickers, response, field_selector)
+
+        response.update(room=None, homepage_url='https://example.com/', phone_numbers=['+48 456'])
+        self.assert_same_as_pickers(primary_user_field_pickers, response, field_selector)
+
+    def test_inline_entities(self):
+        field_selector = parse(
+            'course_unit[course_edition[course[name]|term]|class_type[name]]|group_number|lecturers|homepage_url',
+            tal.CourseGroup)
+        response = {
+            'course_unit_id': '5',
+            'group_number': 1,
+            'course_id': 'C1',
+            'term_id': '2016Z',
+            'course_name': {'en': 'Smithing', 'pl': 'Kowalstwo'},
+            'class_type_id': 'WYK',
+            'class_type': {'en': 'Lecture', 'pl': 'Wykład'},
+            'lecturers': [{'id': '3', 'first_name': 'Jan', 'last_name': 'Kowalski'}],
+            'group_url': '',
+        }
+        self.assert_same_as_pickers(primary_course_group_field_pickers, response, field_selector)
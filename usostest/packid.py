@@ -0,0 +1,17 @@
+from usos.tal.packid import pack_id, unpack_id
+from .toolbox.testcase import TestCase
+
+
+class TestPackId(TestCase):
+    def test_round_trip(self):
+        for id in [('1', '2'), ('a|b', 'c\\d', ''), ('|', '\\|'), tuple(str(i) for i in xrange(30))]:
+            self.assertEqual(unpack_id(pack_id(id)), id)
+
+    def test_escaping(self):
+        self.assertEqual(pack_id(('a|b', 'c\\d')), 'a\\|b|c\\\\d')
+        self.assertEqual(pack_id(('a', 'b')), 'a|b')
+        self.assertRaises(ValueError, unpack_id, 'a\\b')
+
+    def test_tuple_id(self):
+        self.assertEqual(unpack_id(('1', '2'), 2), ('1', '2'))
+        self.assertRaises(ValueError, unpack_id, '1|2', 3)
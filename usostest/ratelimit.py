@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from usos.client import Timeout
+from usos.ratelimit import TokenBucket, FileTokenBucket, RateLimiter
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_token_bucket(self):
+        bucket = TokenBucket(10, burst=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        # Waiting callers queue up
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+    def test_file_token_bucket(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmp_dir, 'bucket')
+            first = FileTokenBucket(filename, 10, burst=2)
+            second = FileTokenBucket(filename, 10, burst=2)
+            self.assertEqual(first.reserve(), 0)
+            self.assertEqual(second.reserve(), 0)
+            self.assertAlmostEqual(first.reserve(), 0.1, places=2)
+            first.close()
+            second.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_rate_limiter(self):
+        limiter = RateLimiter(1000, path_rates={'services/users/search': (10, 1)})
+        self.assertIs(limiter.get_bucket('key'), limiter.get_bucket('key'))
+        self.assertIsNot(limiter.get_bucket('key'), limiter.get_bucket('other key'))
+        self.assertEqual(limiter.get_bucket('key', 'services/users/search').rate, 10)
+
+        self.assertEqual(limiter.get_bucket('key', 'services/users/search').reserve(), 0)
+        self.assertAlmostEqual(limiter.get_bucket('key', 'services/users/search').reserve(), 0.1, places=2)
+        self.assertEqual(limiter.get_bucket('other key', 'services/users/search').reserve(), 0)
+
+    def test_path_timeout_releases_consumer_token(self):
+        limiter = RateLimiter(10, burst=2, path_rates={'services/users/search': (1, 1)})
+        limiter.acquire('key', 'services/users/search')
+        # The consumer bucket has a token left, but the path bucket is empty
+        with self.assertRaises(Timeout):
+            limiter.acquire('key', 'services/users/search', timeout=0.5)
+        self.assertEqual(limiter.get_bucket('key').reserve(timeout=0), 0)
+
+    def test_shared_files(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            first = RateLimiter(10, burst=1, directory=tmp_dir)
+            second = RateLimiter(10, burst=1, directory=tmp_dir)
+            self.assertEqual(first.get_bucket(b'key').reserve(), 0)
+            self.assertAlmostEqual(second.get_bucket('key').reserve(), 0.1, places=2)
+            self.assertEqual(len(os.listdir(tmp_dir)), 1)
+            first.close()
+            second.close()
+        finally:
+            shutil.rmtree(tmp_dir)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from usos import tal
+from .toolbox.testcase import TestCase
+
+
+class TestRaw(TestCase):
+    def test_get_many(self):
+        self.add_method_call(
+            'services/users/users',
+            {
+                'fields': 'first_name|last_name|room[id|number]',
+                'user_ids': '1|2|3',
+            },
+            {
+                '1': {
+                    'first_name': 'Jan',
+                    'last_name': 'Kowalski',
+                    'room': {
+                        'id': '10',
+                        'number': '101',
+                    },
+                },
+                '2': None,
+                '3': None,
+            }
+        )
+
+        users = self._session.get_many(tal.User, ['1', '2', '3'], 'first_name|last_name|room[number]', raw=True)
+
+        self.assertEqual(
+            users,
+            {
+                '1': {
+                    'id': '1',
+                    'first_name': 'Jan',
+                    'last_name': 'Kowalski',
+                    'room': {
+                        'id': '10',
+                        'number': '101',
+                    },
+                },
+            }
+        )
+        self.assertEqual(users['1'].room.number, '101')
+        self.assertEqual(users['1'].room.id, '10')
+
+    def test_search(self):
+        self.add_method_call(
+            'services/users/search2',
+            {
+                'fields': 'items[user[first_name|last_name|id]|match]',
+                'lang': 'en',
+                'num': 20,
+                'query': 'kow',
+            },
+            {
+                'items': [
+                    {
+                        'user': {
+                            'id': '1',
+                            'first_name': 'Jan',
+                            'last_name': 'Kowalski',
+                        },
+                        'match': 'Jan <b>Kow</b>alski',
+                    },
+                ],
+            }
+        )
+
+        self.assertEqual(
+            self._session.search(tal.User, 'kow', raw=True),
+            [
+                {
+                    'entity': {
+                        'id': '1',
+                        'first_name': 'Jan',
+                        'last_name': 'Kowalski',
+                    },
+                    'match': 'Jan <b>Kow</b>alski',
+                },
+            ]
+        )
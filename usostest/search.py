@@ -0,0 +1,168 @@
+from usos import tal
+from usos.tal.index import LocalIndex
+from .toolbox.testcase import TestCase
+
+
+class TestSearchAll(TestCase):
+    def test_users_and_courses(self):
+        self.add_method_call(
+            'services/users/search2',
+            {
+                'fields': 'items[user[first_name|last_name|id]|match]',
+                'lang': 'en',
+                'num': 20,
+                'query': 'kow',
+            },
+            {
+                'items': [
+                    {
+                        'user': {
+                            'id': '1',
+                            'first_name': 'Jan',
+                            'last_name': 'Kowalski',
+                        },
+                        'match': 'Jan <b>Kow</b>alski',
+                    },
+                ],
+            }
+        )
+        self.add_method_call(
+            'services/courses/search',
+            {
+                'lang': 'en',
+                'name': 'kow',
+                'num': 20,
+            },
+            {
+                'items': [
+                    {
+                        'course_id': '1000-A',
+                        'match': '<b>Kow</b>alstwo',
+                    },
+                    {
+                        'course_id': '1000-B',
+                        'match': '<b>Kow</b>alstwo II',
+                    },
+                ],
+            }
+        )
+        self.add_method_call(
+            'services/courses/courses',
+            {
+                'course_ids': '1000-A|1000-B',
+                'fields': 'name',
+            },
+            {
+                '1000-A': {
+                    'name': {
+                        'en': 'Smithing',
+                        'pl': 'Kowalstwo',
+                    },
+                },
+                '1000-B': {
+                    'name': {
+                        'en': 'Smithing II',
+                        'pl': 'Kowalstwo II',
+                    },
+                },
+            }
+        )
+
+        self.assert_same(
+            self.search_all('kow', [tal.User, tal.Course]),
+            {
+                tal.User: [
+                    tal.User.SearchItem(
+                        '',
+                        user=tal.User(
+                            '1',
+                            first_name='Jan',
+                            last_name='Kowalski',
+                        ),
+                        match=tal.MatchString.from_html('Jan <b>Kow</b>alski'),
+                    ),
+                ],
+                tal.Course: [
+                    tal.Course.SearchItem(
+                        '',
+                        course=tal.Course(
+                            '1000-A',
+                            name='Smithing',
+                        ),
+                        match=tal.MatchString.from_html('<b>Kow</b>alstwo'),
+                    ),
+                    tal.Course.SearchItem(
+                        '',
+                        course=tal.Course(
+                            '1000-B',
+                            name='Smithing II',
+                        ),
+                        match=tal.MatchString.from_html('<b>Kow</b>alstwo II'),
+                    ),
+                ],
+            }
+        )
+
+
+class TestLocalIndex(TestCase):
+    def test_authoritative_index(self):
+        self._session.index = LocalIndex()
+        self.add_method_call(
+            'services/users/users',
+            {
+                'fields': 'first_name|last_name',
+                'user_ids': '1|2',
+            },
+            {
+                '1': {
+                    'first_name': 'Jan',
+                    'last_name': 'Kowalski',
+                },
+                '2': {
+                    'first_name': 'Anna',
+                    'last_name': 'Nowak',
+                },
+            }
+        )
+        self.get_many(tal.User, ['1', '2'])
+        self._session.index.set_authoritative(tal.User)
+
+        self.assert_same(
+            self.search(tal.User, 'kow'),
+            [
+                tal.User.SearchItem(
+                    '',
+                    user=tal.User(
+                        '1',
+                        first_name='Jan',
+                        last_name='Kowalski',
+                    ),
+                    match=tal.MatchString.from_html('Jan <b>Kow</b>alski'),
+                ),
+            ]
+        )
+
+    def test_lang(self):
+        self._session.index = LocalIndex()
+        for _ in xrange(2):
+            self.add_method_call(
+                'services/courses/courses',
+                {
+                    'fields': 'name',
+                    'course_ids': 'C1|C2',
+                },
+                {
+                    'C1': {'name': {'pl': 'Analiza', 'en': 'Analysis'}},
+                    'C2': {'name': {'pl': 'Algebra', 'en': 'Algebra'}},
+                }
+            )
+        self.get_many(tal.Course, ['C1', 'C2'], 'name')
+        self._session.index.set_authoritative(tal.Course)
+        self.assertEqual([item.course.name for item in self.search(tal.Course, 'anal')], ['Analysis'])
+
+        self._session.lang = 'pl'
+        self.assertFalse(self._session.index.is_authoritative(tal.Course, 'pl'))
+        self.get_many(tal.Course, ['C1', 'C2'], 'name')
+        self._session.index.set_authoritative(tal.Course, lang='pl')
+        self.assertEqual([item.course.name for item in self.search(tal.Course, 'anal')], ['Analiza'])
+        self.assertEqual(self.search(tal.Course, 'analys'), [])
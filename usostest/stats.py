@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import warnings
+
+from usos import tal
+from usos.tal.fieldselector import parse as parse_field_selector
+from .toolbox.testcase import TestCase
+
+
+class TestStats(TestCase):
+    def add_user_calls(self, calls):
+        for id, fields in calls:
+            self.add_method_call('services/users/user', {'user_id': id, 'fields': fields},
+                                 {field_name: 'X' for field_name in fields.split('|')})
+
+    def spawn_users(self, users):
+        # Users with different field selectors cannot be loaded with a single services/users/users call
+        with self._session._make_reactor() as reactor:
+            for id, fields in users:
+                reactor.spawn_entity(tal.User, id, parse_field_selector(fields, tal.User))
+
+    def test_last_operation(self):
+        self.add_method_call(
+            'services/users/users',
+            {'user_ids': '1|2', 'fields': 'first_name'},
+            {'1': {'first_name': 'Jan'}, '2': {'first_name': 'Anna'}}
+        )
+
+        with self.assert_max_calls(1):
+            self.get_many(tal.User, ['1', '2'], 'first_name')
+        self.assertEqual(self._session.last_operation.calls, 1)
+        self.assertEqual(self._session.last_operation.calls_by_path, {'services/users/users': 1})
+
+    def test_call_budget(self):
+        with self.assertRaises(AssertionError):
+            with self.assert_max_calls(0):
+                self.get(tal.User, '1', 'first_name')
+
+    def test_n_plus_one_warning(self):
+        users = [('1', 'first_name'), ('2', 'last_name'), ('3', 'first_name|last_name')]
+        self.add_user_calls(users)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.spawn_users(users)
+        self.assertEqual([w.category for w in caught], [tal.NPlusOneWarning])
+        self.assertEqual(self._session.last_operation.single_get_calls, {'services/users/user': 3})
+
+    def test_n_plus_one_strict(self):
+        users = [('1', 'first_name'), ('2', 'last_name'), ('3', 'first_name|last_name')]
+        self.add_user_calls(users[:2])
+
+        self._session.strict_calls = True
+        with self.assertRaises(tal.NPlusOneError):
+            self.spawn_users(users)
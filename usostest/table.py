@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from usos import tal
+from usos.tal.table import EntityTable, RowRef
+from .toolbox.testcase import TestCase
+
+
+class TestGetManyTable(TestCase):
+    def setUp(self):
+        self.add_method_call(
+            'services/users/users',
+            {
+                'fields': 'first_name|last_name|room[id|building_id|number|building_name]',
+                'user_ids': '1|2|3',
+            },
+            {
+                '1': {
+                    'first_name': 'Jan',
+                    'last_name': 'Kowalski',
+                    'room': {
+                        'id': '10',
+                        'number': '101',
+                        'building_id': '5',
+                        'building_name': {
+                            'en': 'Main building',
+                            'pl': 'Budynek główny',
+                        },
+                    },
+                },
+                '2': {
+                    'first_name': 'Anna',
+                    'last_name': 'Nowak',
+                    'room': None,
+                },
+                '3': None,
+            }
+        )
+
+    def test_columns(self):
+        table = self._session.get_many_table(tal.User, ['1', '2', '3'], 'first_name|last_name|room')
+
+        self.assertEqual(table.ids, ['1', '2'])
+        self.assertEqual(table.column('last_name'), ['Kowalski', 'Nowak'])
+        self.assertEqual(table.column('room'), [0, None])
+        self.assertEqual(table.children['room'].ids, ['10'])
+        self.assertEqual(
+            table.get_row(0),
+            {
+                'id': '1',
+                'first_name': 'Jan',
+                'last_name': 'Kowalski',
+                'room': {
+                    'id': '10',
+                    'number': '101',
+                    'building': {
+                        'id': '5',
+                        'name': 'Main building',
+                    },
+                },
+            }
+        )
+
+    def test_sort_and_filter(self):
+        table = self._session.get_many_table(tal.User, ['1', '2', '3'], 'first_name|last_name|room')
+
+        self.assertEqual(table.sort('first_name').ids, ['2', '1'])
+        self.assertEqual(table.filter('room', lambda room: room is not None).ids, ['1'])
+
+    def test_single_child_table(self):
+        table = EntityTable(tal.User, {'room': {}})
+        rooms = EntityTable(tal.Room, {})
+        other_rooms = EntityTable(tal.Room, {})
+        table.set_value(table.append_row('1'), 'room', RowRef(rooms, rooms.append_row('10')))
+        with self.assertRaises(ValueError):
+            table.set_value(table.append_row('2'), 'room', RowRef(other_rooms, other_rooms.append_row('20')))
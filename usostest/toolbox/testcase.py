@@ -1,7 +1,8 @@
+import contextlib
 import copy
 import unittest
 
-from usos.tal import Session
+from usos.tal import Session, CallBudgetExceeded
 from usos.tal.factory.entities import Entity
 from usos.tal.fieldselector import parse_basic as parse_basic_field_selector
 
@@ -43,7 +44,7 @@ class TestCase(unittest.TestCase):
         self._session = Session(BaseClient(self._call_method))
         self._session.lang = 'en'
 
-    def _call_method(self, path, params):
+    def _call_method(self, path, params, **kwargs):
         method_calls = self._method_calls.get(path)
         self.assertIsNotNone(method_calls)
         for method_call in method_calls:
@@ -55,17 +56,34 @@ class TestCase(unittest.TestCase):
     def add_method_call(self, path, params, response):
         self._method_calls.setdefault(path, []).append(MethodCall(params, response))
 
-    def get(self, entity_class, id, fields=None):
-        return self._session.get(entity_class, id, fields)
+    def get(self, entity_class, id, fields=None, **kwargs):
+        return self._session.get(entity_class, id, fields, **kwargs)
 
-    def get_many(self, entity_class, ids, fields=None):
-        return self._session.get_many(entity_class, ids, fields)
+    def get_many(self, entity_class, ids, fields=None, **kwargs):
+        return self._session.get_many(entity_class, ids, fields, **kwargs)
 
-    def list(self, entity_class, domain, fields=None):
-        return self._session.list(entity_class, domain, fields)
+    def list(self, entity_class, domain, fields=None, **kwargs):
+        return self._session.list(entity_class, domain, fields, **kwargs)
 
-    def search(self, entity_class, query, fields=None):
-        return self._session.search(entity_class, query, fields)
+    def search(self, entity_class, query, fields=None, **kwargs):
+        return self._session.search(entity_class, query, fields, **kwargs)
+
+    def search_all(self, query, entity_classes=None, fields=None, **kwargs):
+        return self._session.search_all(query, entity_classes, fields, **kwargs)
+
+    @contextlib.contextmanager
+    def assert_max_calls(self, n):
+        """
+        Fails if any session operation within the block makes more than n method calls.
+        """
+        call_budget = self._session.call_budget
+        self._session.call_budget = n
+        try:
+            yield
+        except CallBudgetExceeded as e:
+            self.fail(str(e))
+        finally:
+            self._session.call_budget = call_budget
 
     def assert_same(self, first, second):
         if isinstance(first, (list, tuple)):
@@ -81,10 +99,10 @@ class TestCase(unittest.TestCase):
         elif isinstance(first, Entity):
             self.assertIs(type(first), type(second))
             for field in type(first).fields:
-                if field.name in first.__dict__:
-                    self.assertIn(field.name, second.__dict__)
+                if first.is_loaded(field):
+                    self.assertTrue(second.is_loaded(field), 'Field {0} not loaded'.format(field.name))
                     self.assert_same(getattr(first, field.name), getattr(second, field.name))
                 else:
-                    self.assertNotIn(field.name, second.__dict__)
+                    self.assertFalse(second.is_loaded(field), 'Field {0} loaded'.format(field.name))
         else:
             self.assertEqual(first, second)
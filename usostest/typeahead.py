@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import threading
+import time
+
+from usos import tal
+from .toolbox.testcase import TestCase
+
+
+class _FakeSession(object):
+    lang = 'en'
+
+    def __init__(self, items=(), blocking_query=None):
+        self.items = list(items)
+        self.queries = []
+        # Search for blocking_query waits for release, so that other queries can be submitted in the meantime
+        self.blocking_query = blocking_query
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def search(self, entity_class, query, fields=None):
+        self.queries.append(query)
+        if query == self.blocking_query:
+            self.started.set()
+            self.release.wait(5)
+        return list(self.items)
+
+
+class TestTypeaheadSearch(TestCase):
+    def _add_search2_call(self, query, items):
+        self.add_method_call(
+            'services/users/search2',
+            {
+                'fields': 'items[user[first_name|last_name|id]|match]',
+                'lang': 'en',
+                'num': 20,
+                'query': query,
+            },
+            {
+                'items': [
+                    {
+                        'user': {
+                            'id': id,
+                            'first_name': first_name,
+                            'last_name': last_name,
+                        },
+                        'match': match,
+                    }
+                    for id, first_name, last_name, match in items
+                ],
+            }
+        )
+
+    def test_prefix_reuse(self):
+        self._add_search2_call('ko', [
+            ('1', 'Jan', 'Kowalski', 'Jan <b>Ko</b>walski'),
+            ('2', 'Anna', 'Kołodziej', 'Anna <b>Ko</b>łodziej'),
+        ])
+        typeahead = tal.TypeaheadSearch(self._session)
+
+        self.assertEqual(len(typeahead.search(tal.User, 'ko')), 2)
+        self.assert_same(
+            typeahead.search(tal.User, 'Kol'),
+            [
+                tal.User.SearchItem(
+                    '',
+                    user=tal.User(
+                        '2',
+                        first_name='Anna',
+                        last_name='Kołodziej',
+                    ),
+                    match=tal.MatchString.from_html('Anna <b>Koł</b>odziej'),
+                ),
+            ]
+        )
+        self.assertEqual(len(typeahead.search(tal.User, 'ko')), 2)
+
+        self.assertEqual((typeahead.stats.hits, typeahead.stats.prefix_hits, typeahead.stats.misses), (1, 1, 1))
+
+    def test_no_prefix_reuse_for_full_page(self):
+        self._add_search2_call('a', [
+            (unicode(i), 'Adam', 'Nowak', '<b>A</b>dam Nowak')
+            for i in xrange(20)
+        ])
+        self._add_search2_call('ad', [
+            ('1', 'Adam', 'Nowak', '<b>Ad</b>am Nowak'),
+        ])
+        typeahead = tal.TypeaheadSearch(self._session)
+
+        self.assertEqual(len(typeahead.search(tal.User, 'a')), 20)
+        self.assertEqual(len(typeahead.search(tal.User, 'ad')), 1)
+        self.assertEqual(typeahead.stats.misses, 2)
+
+    def test_diacritics_not_shared(self):
+        self._add_search2_call('Kol', [
+            ('1', 'Jan', 'Kolski', 'Jan <b>Kol</b>ski'),
+            ('2', 'Anna', 'Kołodziej', 'Anna <b>Koł</b>odziej'),
+        ] + [(unicode(i), 'Adam', 'Kolski', 'Adam <b>Kol</b>ski') for i in xrange(3, 21)])
+        self._add_search2_call('Koł', [
+            ('2', 'Anna', 'Kołodziej', 'Anna <b>Koł</b>odziej'),
+        ])
+        typeahead = tal.TypeaheadSearch(self._session)
+
+        self.assertEqual(len(typeahead.search(tal.User, 'Kol')), 20)
+        self.assertEqual(len(typeahead.search(tal.User, 'kol')), 20)
+        self.assertEqual([item.user.id for item in typeahead.search(tal.User, 'Koł')], ['2'])
+        self.assertEqual((typeahead.stats.hits, typeahead.stats.misses), (1, 2))
+
+    def test_no_prefix_reuse_without_match(self):
+        session = _FakeSession([tal.User.SearchItem('', user=tal.User('1', first_name='Jan'))])
+        typeahead = tal.TypeaheadSearch(session)
+
+        self.assertEqual(len(typeahead.search(tal.User, 'ko')), 1)
+        self.assertEqual(len(typeahead.search(tal.User, 'kow')), 1)
+        self.assertEqual(session.queries, ['ko', 'kow'])
+
+    def test_submit_coalesces(self):
+        session = _FakeSession()
+        typeahead = tal.TypeaheadSearch(session, coalesce_window=0.05)
+        results = []
+        done = threading.Event()
+
+        def callback(query, items):
+            results.append(query)
+            done.set()
+
+        for query in ('k', 'ko', 'kow'):
+            typeahead.submit(tal.User, query, callback)
+        self.assertTrue(done.wait(5))
+        time.sleep(0.1)
+
+        self.assertEqual(results, ['kow'])
+        self.assertEqual(session.queries, ['kow'])
+        self.assertEqual(typeahead.stats.dropped, 2)
+
+    def test_submit_drops_stale_results(self):
+        session = _FakeSession(blocking_query='ko')
+        typeahead = tal.TypeaheadSearch(session, coalesce_window=0)
+        results = []
+        done = threading.Event()
+
+        def callback(query, items):
+            results.append(query)
+            done.set()
+
+        typeahead.submit(tal.User, 'ko', callback)
+        self.assertTrue(session.started.wait(5))
+        typeahead.submit(tal.User, 'kow', callback)
+        self.assertTrue(done.wait(5))
+        session.release.set()
+        for _ in xrange(100):
+            if typeahead.stats.dropped:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(results, ['kow'])
+        self.assertEqual(sorted(session.queries), ['ko', 'kow'])
+        self.assertEqual(typeahead.stats.dropped, 1)
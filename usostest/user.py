@@ -1,3 +1,5 @@
+import pickle
+
 from usos import tal
 from .toolbox.testcase import TestCase
 
@@ -73,6 +75,24 @@ class TestUserGet(TestCase):
             )
         )
 
+    def test_immutable_values(self):
+        for immutable_values, mobile_numbers in ((False, ['+48 123']), (True, ('+48 123', ))):
+            self.add_method_call(
+                'services/users/user',
+                {
+                    'fields': 'mobile_numbers|phone_numbers',
+                    'user_id': '777',
+                },
+                {
+                    'mobile_numbers': ['+48 123'],
+                    'phone_numbers': None,
+                }
+            )
+            self._session.immutable_values = immutable_values
+            user = self.get(tal.User, '777', 'mobile_numbers|phone_numbers')
+            self.assert_same(user.mobile_numbers, mobile_numbers)
+            self.assert_same(user.phone_numbers, type(mobile_numbers)())
+
     def test_authored_theses(self):
         self.add_method_call(
             'services/theses/user',
@@ -128,3 +148,20 @@ class TestUserGet(TestCase):
         )
         
         self.assertRaises(tal.EntityNotFound, self.get, tal.User, '5555555555', None)
+
+
+class TestUserEntity(TestCase):
+    def test_extra_attributes(self):
+        user = tal.User('1', first_name='Jan', note='extra')
+        user.other_note = 'extra'
+        self.assertEqual((user.note, user.other_note), ('extra', 'extra'))
+        self.assertTrue(user.is_loaded('first_name'))
+        self.assertFalse(user.is_loaded('note'))
+
+    def test_pickle(self):
+        user = tal.User('1', first_name='Jan', room=tal.Room('2', number='101'), note='extra')
+        for protocol in xrange(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(user, protocol))
+            self.assert_same(copy, user)
+            self.assertEqual(copy.note, 'extra')
+            self.assertFalse(copy.is_loaded('last_name'))